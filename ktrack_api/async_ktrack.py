@@ -0,0 +1,115 @@
+"""
+Asyncio facade for Ktrack, Python 3 only.
+AsyncKtrack offers the same create / update / find / find_one / delete surface as Ktrack, but every call returns a
+coroutine. The blocking database calls run on a thread pool, so UI and service code can overlap database latency
+instead of serializing it. find_links and find_many use asyncio.gather to resolve a lot of entities concurrently.
+Example:
+    kt = get_async_ktrack()
+    project, task = asyncio.run(kt.find_links([context.project, context.task]))
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import List, Optional, Dict, Tuple
+
+import ktrack_api
+from ktrack_api.ktrack import Ktrack, KtrackIdType
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def get_async_ktrack(max_workers=DEFAULT_MAX_WORKERS):
+    # type: (int) -> AsyncKtrack
+    """
+    Returns a new AsyncKtrack wrapping ktrack_api.get_ktrack()
+    :param max_workers: number of threads used for concurrent database calls
+    :return: new AsyncKtrack instance
+    """
+    return AsyncKtrack(ktrack_api.get_ktrack(), max_workers=max_workers)
+
+
+class AsyncKtrack(object):
+    def __init__(self, ktrack, executor=None, max_workers=DEFAULT_MAX_WORKERS):
+        # type: (Ktrack, Optional[ThreadPoolExecutor], int) -> None
+        """
+        :param ktrack: Ktrack instance doing the actual database calls
+        :param executor: executor to run the calls on. If None, an own ThreadPoolExecutor is created and shut down on close
+        :param max_workers: number of threads of the own executor, ignored if an executor is given
+        """
+        self._kt = ktrack
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def ktrack(self):
+        # type: () -> Ktrack
+        return self._kt
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    async def create(self, entity_type, data={}):
+        # type: (str, dict) -> dict
+        return await self._run(self._kt.create, entity_type, data)
+
+    async def update(self, entity_type, entity_id, data):
+        # type: (str, KtrackIdType, dict) -> None
+        return await self._run(self._kt.update, entity_type, entity_id, data)
+
+    async def find(self, entity_type, filters=[]):
+        # type: (str, list) -> list
+        return await self._run(self._kt.find, entity_type, filters)
+
+    async def find_one(self, entity_type, entity_id):
+        # type: (str, KtrackIdType) -> Optional[Dict]
+        return await self._run(self._kt.find_one, entity_type, entity_id)
+
+    async def delete(self, entity_type, entity_id):
+        # type: (str, KtrackIdType) -> None
+        return await self._run(self._kt.delete, entity_type, entity_id)
+
+    async def find_links(self, links):
+        # type: (List[Optional[dict]]) -> List[Optional[Dict]]
+        """
+        Resolves all given entity links concurrently.
+        :param links: list of dicts like {'type': 'task', 'id': 'asdf'}, None entries are allowed
+        :return: list of full entities in the same order as links, None for None links or not existing entities
+        """
+
+        async def resolve(link):
+            if not link:
+                return None
+            return await self.find_one(link["type"], link["id"])
+
+        return list(await asyncio.gather(*[resolve(link) for link in links]))
+
+    async def find_many(self, queries):
+        # type: (List[Tuple[str, list]]) -> List[list]
+        """
+        Runs all given find queries concurrently.
+        :param queries: list of (entity_type, filters) tuples
+        :return: list of find results in the same order as queries
+        """
+        return list(
+            await asyncio.gather(
+                *[self.find(entity_type, filters) for entity_type, filters in queries]
+            )
+        )
+
+    def close(self):
+        # type: () -> None
+        """
+        Shuts the executor down, if it was created by this instance
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,135 @@
+"""
+Database connection settings.
+Every setting is read from general.yml and can be overridden by an environment variable named KTRACK_ followed by the
+upper case key, for example KTRACK_DATABASE_READ_PREFERENCE=secondaryPreferred lets a read-heavy tool read from
+replicas without changing the config for everyone else.
+"""
+import os
+
+import attr
+from pymongo import ReadPreference
+from typing import Optional, Union
+
+DATABASE_URI = "database_uri"
+DATABASE_NAME = "database_name"
+DATABASE_MAX_POOL_SIZE = "database_max_pool_size"
+DATABASE_SERVER_SELECTION_TIMEOUT_MS = "database_server_selection_timeout_ms"
+DATABASE_CONNECT_TIMEOUT_MS = "database_connect_timeout_ms"
+DATABASE_SOCKET_TIMEOUT_MS = "database_socket_timeout_ms"
+DATABASE_READ_PREFERENCE = "database_read_preference"
+DATABASE_WRITE_CONCERN = "database_write_concern"
+
+ENV_PREFIX = "KTRACK_"
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+DEFAULT_URI = "mongodb://localhost:27090/ktrack"
+DEFAULT_DATABASE_NAME = "mongoeengine_test"
+
+
+@attr.s
+class ConnectionSettings(object):
+    uri = attr.ib(default=DEFAULT_URI)  # type: str
+    # only used if the uri contains no database name
+    database_name = attr.ib(default=DEFAULT_DATABASE_NAME)  # type: str
+    max_pool_size = attr.ib(default=None)  # type: Optional[int]
+    server_selection_timeout_ms = attr.ib(default=None)  # type: Optional[int]
+    connect_timeout_ms = attr.ib(default=None)  # type: Optional[int]
+    socket_timeout_ms = attr.ib(default=None)  # type: Optional[int]
+    read_preference = attr.ib(default="primary")  # type: str
+    write_concern = attr.ib(default=None)  # type: Optional[Union[int, str]]
+
+    def mongo_connect_kwargs(self):
+        # type: () -> dict
+        """
+        Returns the keyword arguments for mongoengine.connect, settings not set are left to the driver defaults
+        """
+        kwargs = {"read_preference": READ_PREFERENCES[self.read_preference]}
+        optional_kwargs = {
+            "maxPoolSize": self.max_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "w": self.write_concern,
+        }
+        kwargs.update(
+            {key: value for key, value in optional_kwargs.items() if value is not None}
+        )
+        return kwargs
+
+
+def get_setting(key):
+    # type: (str) -> Optional[str]
+    """
+    Returns the value of a setting from the environment or general.yml
+    :param key: key of the setting in general.yml
+    :return: the value or None if the setting is not set or empty
+    """
+    value = os.environ.get(ENV_PREFIX + key.upper())
+    if value is None:
+        # imported here, kttk imports ktrack_api
+        from kttk.config import config_manager
+
+        try:
+            value = config_manager.get_value(key)
+        except KeyError:
+            return None
+    return value or None
+
+
+def _invalid_setting(key, reason):
+    from kttk.config import config_manager
+
+    return config_manager.InvalidConfigException(
+        "general.yml", "{} {}".format(key, reason)
+    )
+
+
+def _get_int_setting(key):
+    # type: (str) -> Optional[int]
+    value = get_setting(key)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise _invalid_setting(key, "has to be a number, got {}".format(value))
+
+
+def load_connection_settings():
+    # type: () -> ConnectionSettings
+    """
+    Loads the connection settings from the environment and general.yml, not set settings get their defaults
+    """
+    read_preference = get_setting(DATABASE_READ_PREFERENCE) or "primary"
+    if read_preference not in READ_PREFERENCES:
+        raise _invalid_setting(
+            DATABASE_READ_PREFERENCE,
+            "has to be one of {}, got {}".format(
+                ", ".join(sorted(READ_PREFERENCES)), read_preference
+            ),
+        )
+
+    # w is the number of servers which have to acknowledge a write or a tag like majority
+    write_concern = get_setting(DATABASE_WRITE_CONCERN)
+    if write_concern is not None and write_concern.isdigit():
+        write_concern = int(write_concern)
+
+    return ConnectionSettings(
+        uri=get_setting(DATABASE_URI) or DEFAULT_URI,
+        database_name=get_setting(DATABASE_NAME) or DEFAULT_DATABASE_NAME,
+        max_pool_size=_get_int_setting(DATABASE_MAX_POOL_SIZE),
+        server_selection_timeout_ms=_get_int_setting(
+            DATABASE_SERVER_SELECTION_TIMEOUT_MS
+        ),
+        connect_timeout_ms=_get_int_setting(DATABASE_CONNECT_TIMEOUT_MS),
+        socket_timeout_ms=_get_int_setting(DATABASE_SOCKET_TIMEOUT_MS),
+        read_preference=read_preference,
+        write_concern=write_concern,
+    )
@@ -14,3 +14,11 @@ class EntityNotFoundException(Exception):
         super(EntityNotFoundException, self).__init__(
             "No entity with id {} exists".format(entity_id)
         )
+
+
+class ReadOnlyException(Exception):
+    def __init__(self, operation):
+        # type: (str) -> None
+        super(ReadOnlyException, self).__init__(
+            "Can not {}, the database is read-only".format(operation)
+        )
@@ -1,25 +1,57 @@
-import os
-import shutil
-import uuid
+import threading
+from concurrent.futures import Future
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
+from ktrack_api import connection_settings, thumbnails
 from ktrack_api.ktrack_impl import AbtractKtrackImpl
 
 KtrackIdType = str
+from ktrack_api.exceptions import EntityNotFoundException
 from ktrack_api.mongo_impl.ktrack_mongo_impl import KtrackMongoImpl
+from ktrack_api.sqlite_impl import ktrack_sqlite_impl, snapshot
+from ktrack_api.sqlite_impl.ktrack_sqlite_impl import KtrackSqliteImpl
+from ktrack_api.sqlite_impl.snapshot import KtrackSnapshotImpl
 
-# todo make easy to config
-_connection_url = "mongodb://localhost:27090/ktrack"
+# overrides the configured database_uri if set, for example by tests
+_connection_url = None  # type: Optional[str]
+
+# SQLite implementations by connection url. Like the mongo connection, a database is opened only once per process
+_sqlite_impls = {}  # type: Dict[str, KtrackSqliteImpl]
+_sqlite_impls_lock = threading.Lock()
+
+THUMBNAIL_ROOT = "thumbnail_root"
+THUMBNAIL_MAX_SIZE = "thumbnail_max_size"
 
 
 def get_ktrack():
     # type: () -> Ktrack
-    connection_uri = _connection_url
-    mongo_impl = KtrackMongoImpl(connection_uri)
+    """
+    Returns a Ktrack for the configured connection url, the implementation is selected by the scheme of the url:
+    sqlite:///path/to/ktrack.db uses a SQLite file, snapshot:///path/to/project.db a read-only project snapshot and all
+    other urls use MongoDB. The url and all other connection settings are configured in general.yml or by environment
+    variables, see connection_settings
+    """
+    settings = connection_settings.load_connection_settings()
+    connection_uri = _connection_url or settings.uri
+    if connection_uri.startswith(ktrack_sqlite_impl.SCHEME):
+        return Ktrack(_get_sqlite_impl(KtrackSqliteImpl, connection_uri))
+    if connection_uri.startswith(snapshot.SCHEME):
+        return Ktrack(_get_sqlite_impl(KtrackSnapshotImpl, connection_uri))
+    mongo_impl = KtrackMongoImpl(connection_uri, settings)
     return Ktrack(mongo_impl)
 
 
+def _get_sqlite_impl(impl_cls, connection_uri):
+    # type: (type, str) -> KtrackSqliteImpl
+    with _sqlite_impls_lock:
+        impl = _sqlite_impls.get(connection_uri)
+        if impl is None:
+            impl = impl_cls(connection_uri)
+            _sqlite_impls[connection_uri] = impl
+        return impl
+
+
 class Ktrack(object):
     def __init__(self, impl):
         # type: (AbtractKtrackImpl) -> None
@@ -32,6 +64,19 @@ class Ktrack(object):
 
         return self._impl.create(entity_type, data)
 
+    def create_many(self, entity_type, data_list):
+        # type: (str, List[dict]) -> List[dict]
+        """
+        Creates many entities of the same type at once
+        :param entity_type: type of the entities to create
+        :param data_list: data for each new entity
+        :return: the newly created entities in the same order as data_list
+        """
+        assert isinstance(entity_type, str) or isinstance(entity_type, unicode)
+        assert isinstance(data_list, list)
+
+        return self._impl.create_many(entity_type, data_list)
+
     def update(self, entity_type, entity_id, data):
         # type: (str, KtrackIdType, dict) -> None
         assert isinstance(entity_type, str) or isinstance(entity_type, unicode)
@@ -42,6 +87,13 @@ class Ktrack(object):
 
     def find(self, entity_type, filters=[]):
         # type: (str, list) -> list
+        """
+        Finds all entities of given type matching all filters
+        :param entity_type: type of the entities to find
+        :param filters: list of [field_name, operator, value] filters, operator is "is" or "in".
+        Values can be entity links, for "in" the value is a list of values
+        :return: all matching entities
+        """
 
         assert isinstance(entity_type, str) or isinstance(entity_type, unicode)
         assert isinstance(filters, list)
@@ -55,6 +107,31 @@ class Ktrack(object):
         assert isinstance(entity_id, str) or isinstance(entity_id, unicode)
         return self._impl.find_one(entity_type, entity_id)
 
+    def find_links(self, links):
+        # type: (List[Optional[dict]]) -> List[Optional[Dict]]
+        """
+        Resolves a list of entity links like {'type': 'task', 'id': 'asdf'} to full entities in one batched call
+        :param links: entity links to resolve, None entries are allowed
+        :return: list of full entities in the same order as links, None for None links or not existing entities
+        """
+        assert isinstance(links, list)
+
+        return self._impl.find_links(links)
+
+    def allocate_version(self, task, minimum_version=1):
+        # type: (dict, int) -> int
+        """
+        Atomically allocates the next workfile version number for a task. Every call returns a different version
+        number, even if many processes save workfiles for the same task at the same time
+        :param task: task or link to the task to allocate a version for
+        :param minimum_version: the allocated version is at least this version, for example when higher versions
+        exist on disk
+        :return: the allocated version number
+        """
+        assert isinstance(minimum_version, int)
+
+        return self._impl.allocate_version(task, minimum_version)
+
     def delete(self, entity_type, entity_id):
         # type: (str, KtrackIdType) -> None
 
@@ -63,21 +140,102 @@ class Ktrack(object):
 
         return self._impl.delete(entity_type, entity_id)
 
-    def _get_thumbnail_path_template(self):
+    def _get_thumbnail_root(self):
         # type: () -> str
-        # todo make thumbnail folder editable in config, so its not hardcoded,
-        return "M:/ktrack_thumbnails/thumbnail_{entity_type}_{entity_id}_{uuid}{ext}"
+        # imported here, kttk imports ktrack_api
+        from kttk.config import config_manager
+
+        try:
+            return config_manager.get_value(THUMBNAIL_ROOT)
+        except KeyError:
+            raise config_manager.InvalidConfigException(
+                "general.yml", "{} is missing".format(THUMBNAIL_ROOT)
+            )
+
+    def _get_thumbnail_max_size(self):
+        # type: () -> int
+        from kttk.config import config_manager
+
+        try:
+            max_size = config_manager.get_value(THUMBNAIL_MAX_SIZE)
+        except KeyError:
+            return thumbnails.DEFAULT_MAX_SIZE
+        try:
+            return int(max_size)
+        except ValueError:
+            raise config_manager.InvalidConfigException(
+                "general.yml",
+                "{} has to be a number, got {}".format(THUMBNAIL_MAX_SIZE, max_size),
+            )
 
     def upload_thumbnail(self, entity_type, entity_id, path):
-        # type: (str, KtrackIdType, str) -> None
-
-        # todo should resize thumbnail
-        thumbnail_path_template = self._get_thumbnail_path_template()
-        thumbnail_path = thumbnail_path_template.format(
-            entity_type=entity_type,
-            entity_id=entity_id,
-            uuid=uuid.uuid4(),
-            ext=os.path.splitext(path)[1],
+        # type: (str, KtrackIdType, str) -> str
+        """
+        Stores a resized thumbnail of given image and sets it as thumbnail of given entity. Images with the same content
+        share their thumbnail
+        :param entity_type: type of the entity to set the thumbnail for
+        :param entity_id: id of the entity to set the thumbnail for
+        :param path: path to the image
+        :return: path to the stored thumbnail
+        """
+        thumbnail_path = thumbnails.store_thumbnail(
+            path, self._get_thumbnail_root(), self._get_thumbnail_max_size()
         )
-        shutil.copy(path, thumbnail_path)
         self.update(entity_type, entity_id, {"thumbnail": {"path": thumbnail_path}})
+        return thumbnail_path
+
+    def upload_thumbnails(self, items):
+        # type: (List[Tuple[str, KtrackIdType, str]]) -> List[thumbnails.ThumbnailUploadResult]
+        """
+        Uploads thumbnails for many entities at once. Thumbnails are stored in parallel, afterwards all entities are
+        updated with a single bulk write. A failing item does not stop the other items
+        :param items: (entity_type, entity_id, path) for every thumbnail to upload
+        :return: a result for every item in the same order, failed items contain the error
+        """
+        assert isinstance(items, list)
+
+        results = [
+            thumbnails.ThumbnailUploadResult(entity_type, entity_id, path)
+            for entity_type, entity_id, path in items
+        ]
+
+        thumbnail_root = self._get_thumbnail_root()
+        max_size = self._get_thumbnail_max_size()
+        futures = [
+            thumbnails.get_executor().submit(
+                thumbnails.store_thumbnail, result.path, thumbnail_root, max_size
+            )
+            for result in results
+        ]
+        for result, future in zip(results, futures):
+            try:
+                result.thumbnail_path = future.result()
+            except Exception as e:
+                result.error = e
+
+        stored_results = [result for result in results if result.succeeded]
+        updated = self._impl.update_many(
+            [
+                (
+                    result.entity_type,
+                    result.entity_id,
+                    {"thumbnail": {"path": result.thumbnail_path}},
+                )
+                for result in stored_results
+            ]
+        )
+        for result, result_updated in zip(stored_results, updated):
+            if not result_updated:
+                result.error = EntityNotFoundException(result.entity_id)
+
+        return results
+
+    def upload_thumbnail_async(self, entity_type, entity_id, path):
+        # type: (str, KtrackIdType, str) -> Future
+        """
+        Same as upload_thumbnail, but resizing, copying and updating the entity happen on a background thread pool
+        :return: future of the path to the stored thumbnail
+        """
+        return thumbnails.get_executor().submit(
+            self.upload_thumbnail, entity_type, entity_id, path
+        )
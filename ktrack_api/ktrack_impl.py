@@ -7,10 +7,38 @@ class AbtractKtrackImpl(object):
         # type: (str, dict) -> dict
         raise NotImplementedError()
 
+    def create_many(self, entity_type, data_list):
+        # type: (str, List[dict]) -> List[dict]
+        """
+        Creates an entity for every data dict. Implementations should override this with a bulk insert,
+        this default implementation creates each entity on its own
+        """
+        return [self.create(entity_type, data) for data in data_list]
+
     def update(self, entity_type, entity_id, data):
         # type: (str, KtrackIdType, dict) -> None
         raise NotImplementedError()
 
+    def update_many(self, updates):
+        # type: (List[Tuple[str, KtrackIdType, dict]]) -> List[bool]
+        """
+        Applies many updates, possibly of different entity types. Implementations should override this with a bulk
+        write, this default implementation updates each entity on its own
+        :return: for every update, True if the entity was updated, False if it does not exist
+        """
+        # imported here, exceptions imports ktrack, which imports this module
+        from ktrack_api.exceptions import EntityNotFoundException
+
+        updated = []
+        for entity_type, entity_id, data in updates:
+            try:
+                self.update(entity_type, entity_id, data)
+            except EntityNotFoundException:
+                updated.append(False)
+            else:
+                updated.append(True)
+        return updated
+
     def find(self, entity_type, filters):
         # type: (str, list) -> List[dict]
         raise NotImplementedError()
@@ -19,6 +47,20 @@ class AbtractKtrackImpl(object):
         # type: (str, KtrackIdType) -> Optional[Dict]
         raise NotImplementedError()
 
+    def allocate_version(self, task, minimum_version=1):
+        # type: (dict, int) -> int
+        raise NotImplementedError()
+
     def delete(self, entity_type, entity_id):
         # type: (str, KtrackIdType) -> None
         raise NotImplementedError()
+
+    def find_links(self, links):
+        # type: (List[Optional[dict]]) -> List[Optional[Dict]]
+        """
+        Resolves the given entity links to full entities. Implementations should override this with a batched query,
+        this default implementation queries each link on its own
+        """
+        return [
+            self.find_one(link["type"], link["id"]) if link else None for link in links
+        ]
@@ -9,7 +9,7 @@ from mongoengine import (
     DictField,
     IntField,
 )
-from typing import Dict
+from typing import Dict, List, Tuple
 
 
 def update_modified(sender, document):
@@ -31,6 +31,48 @@ def register_entity(name, entity_cls):
     entities[name.lower()] = entity_cls
 
 
+_field_specs = {}  # type: Dict[type, List[Tuple[str, str, object]]]
+
+
+def get_field_specs(entity_cls):
+    # type: (type) -> List[Tuple[str, str, object]]
+    """
+    Returns (field name, db field, default) of all fields of an entity class, computed once per class
+    """
+    field_specs = _field_specs.get(entity_cls)
+    if field_specs is None:
+        field_specs = [
+            (
+                field_name,
+                entity_cls._fields[field_name].db_field,
+                entity_cls._fields[field_name].default,
+            )
+            for field_name in entity_cls._fields_ordered
+            if not field_name.startswith("_")
+        ]
+        _field_specs[entity_cls] = field_specs
+    return field_specs
+
+
+_index_specs = {}  # type: Dict[type, List[Tuple[str, ...]]]
+
+
+def get_index_specs(entity_cls):
+    # type: (type) -> List[Tuple[str, ...]]
+    """
+    Returns the field names of every index of an entity class, compound indexes like ("entity_type", "entity_id")
+    contain more than one name. Computed once per class from meta["indexes"]
+    """
+    index_specs = _index_specs.get(entity_cls)
+    if index_specs is None:
+        index_specs = [
+            tuple(field_name for field_name, _ in index_spec["fields"])
+            for index_spec in entity_cls._meta.get("index_specs", [])
+        ]
+        _index_specs[entity_cls] = index_specs
+    return index_specs
+
+
 class NonProjectEntity(Document):
     created_at = DateTimeField(default=datetime.datetime.now())
     created_by = StringField(default=getpass.getuser())
@@ -72,6 +114,8 @@ class Shot(ProjectEntity):
     cut_out = IntField()
     cut_duration = IntField()
 
+    meta = {"indexes": ["project.id"]}
+
 
 register_entity("shot", Shot)
 
@@ -81,6 +125,15 @@ class PathEntry(NonProjectEntity):
     path = StringField()
     context = DictField()
 
+    # ids of the context as top level fields, so all paths of a project, entity or task can be found using an index
+    project_id = StringField()
+    entity_type = StringField()
+    entity_id = StringField()
+    task_id = StringField()
+    step = StringField()
+
+    meta = {"indexes": ["path", "project_id", ("entity_type", "entity_id"), "task_id"]}
+
 
 register_entity("path_entry", PathEntry)
 
@@ -92,6 +145,8 @@ class Task(ProjectEntity):
     entity = DictField(required=True)
     assigned = DictField()  # todo assign mulitple people to one task
 
+    meta = {"indexes": ["entity.id", "assigned.id"]}
+
 
 register_entity("task", Task)
 
@@ -105,14 +160,32 @@ class WorkFile(ProjectEntity):
     version_number = IntField()
     created_from = DictField(default=None)
 
+    # the highest version of a task is read from the index without sorting all workfiles of the task
+    meta = {"indexes": [("entity.id", "-version_number")]}
+
 
 register_entity("workfile", WorkFile)
 
 
 class User(NonProjectEntity):
+    type = "user"
     name = StringField()
     first_name = StringField()
     second_name = StringField()
 
+    meta = {"indexes": ["name"]}
+
 
 register_entity("user", User)
+
+
+class VersionCounter(Document):
+    """
+    Highest workfile version allocated for a task, only changed with atomic updates, see
+    KtrackMongoImpl.allocate_version. Not registered as entity, because it is no part of the production data
+    """
+
+    task_id = StringField(primary_key=True)
+    version = IntField(default=0)
+
+    meta = {"collection": "version_counter"}
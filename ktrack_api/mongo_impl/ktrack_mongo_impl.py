@@ -1,13 +1,22 @@
-from typing import List, Optional, Dict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import datetime
+
+from typing import List, Optional, Dict, Tuple
 
 from bson import ObjectId
+from pymongo import UpdateOne
 from mongoengine import connect
 
+from ktrack_api.connection_settings import ConnectionSettings
 from ktrack_api.exceptions import EntityMissing, EntityNotFoundException
 from ktrack_api.ktrack import KtrackIdType
 from ktrack_api.ktrack_impl import AbtractKtrackImpl
 from ktrack_api.mongo_impl import entities
-from ktrack_api.mongo_impl.entities import NonProjectEntity
+from ktrack_api.mongo_impl.entities import NonProjectEntity, VersionCounter
 
 
 def _convert_to_dict(entity):
@@ -28,11 +37,42 @@ def _convert_to_dict(entity):
     return obj_dict
 
 
+def _convert_raw_to_dict(entity_cls, raw):
+    # type: (type, dict) -> dict
+    """
+    Converts a raw document as returned by pymongo to the same dict as _convert_to_dict, without creating a
+    mongoengine document first. Missing fields get their defaults like in a document
+    """
+    obj_dict = {"type": entity_cls.type}
+
+    for field_name, db_field, default in entities.get_field_specs(entity_cls):
+        if db_field in raw:
+            field_value = raw[db_field]
+        else:
+            field_value = default() if callable(default) else default
+
+        if isinstance(field_value, ObjectId):
+            obj_dict[field_name] = str(field_value)
+        else:
+            obj_dict[field_name] = field_value
+
+    return obj_dict
+
+
 class KtrackMongoImpl(AbtractKtrackImpl):
-    def __init__(self, connection_uri):
-        # type: (str) -> None
+    def __init__(self, connection_uri, settings=None):
+        # type: (str, Optional[ConnectionSettings]) -> None
+        """
+        :param connection_uri: mongodb:// or mongomock:// uri to connect to
+        :param settings: database name, pool size, timeouts, read preference and write concern, defaults if None
+        """
         super(KtrackMongoImpl, self).__init__(connection_uri)
-        connect("mongoeengine_test", host=connection_uri)
+        settings = settings or ConnectionSettings()
+        connect(
+            settings.database_name,
+            host=connection_uri,
+            **settings.mongo_connect_kwargs()
+        )
 
     def create(self, entity_type, data={}):
         # type: (str, dict) -> dict
@@ -51,6 +91,31 @@ class KtrackMongoImpl(AbtractKtrackImpl):
 
         return _convert_to_dict(entity)
 
+    def create_many(self, entity_type, data_list):
+        # type: (str, List[dict]) -> List[dict]
+        try:
+            entity_cls = entities.entities[entity_type.lower()]
+        except KeyError:
+            raise EntityMissing(entity_type)
+
+        new_entities = []
+        for data in data_list:
+            entity = entity_cls()
+            for key, value in data.items():
+                setattr(entity, key, value)
+            # insert does not send pre_save and does not validate like save does
+            entities.update_modified(entity_cls, entity)
+            entity.validate()
+            new_entities.append(entity)
+
+        if not new_entities:
+            return []
+
+        # one insert for all documents instead of one save per document
+        new_entities = entity_cls.objects.insert(new_entities)
+
+        return [_convert_to_dict(entity) for entity in new_entities]
+
     def update(self, entity_type, entity_id, data):
         try:
             entity_cls = entities.entities[entity_type]
@@ -69,6 +134,59 @@ class KtrackMongoImpl(AbtractKtrackImpl):
 
         entity.save()
 
+    def update_many(self, updates):
+        # type: (List[Tuple[str, KtrackIdType, dict]]) -> List[bool]
+        updated = [False] * len(updates)
+
+        indices_by_type = {}
+        for index, (entity_type, _, _) in enumerate(updates):
+            indices_by_type.setdefault(entity_type, []).append(index)
+
+        updated_at = datetime.datetime.now()
+        for entity_type, indices in indices_by_type.items():
+            try:
+                entity_cls = entities.entities[entity_type]
+            except KeyError:
+                raise EntityMissing(entity_type)
+
+            # bulk writes do not report which updates matched, so check which entities exist first
+            entity_ids = [
+                str(updates[index][1])
+                for index in indices
+                if ObjectId.is_valid(updates[index][1])
+            ]
+            existing_ids = {
+                str(entity.id)
+                for entity in entity_cls.objects(id__in=entity_ids).only("id")
+            }
+
+            operations = []
+            for index in indices:
+                _, entity_id, data = updates[index]
+                if str(entity_id) not in existing_ids:
+                    continue
+
+                fields = dict(data)
+                fields["updated_at"] = updated_at
+                mongo_fields = {
+                    entity_cls._fields[key]
+                    .db_field: entity_cls._fields[key]
+                    .to_mongo(value)
+                    for key, value in fields.items()
+                    # like update, values for unknown fields are not stored
+                    if key in entity_cls._fields
+                }
+                operations.append(
+                    UpdateOne({"_id": ObjectId(entity_id)}, {"$set": mongo_fields})
+                )
+                updated[index] = True
+
+            # one round trip for all updates of this entity type
+            if operations:
+                entity_cls._get_collection().bulk_write(operations, ordered=False)
+
+        return updated
+
     def find(self, entity_type, filters):
         # type: (str, list) -> List[dict]
 
@@ -81,16 +199,28 @@ class KtrackMongoImpl(AbtractKtrackImpl):
 
         if len(filters) > 0:
             for f in filters:
-                if isinstance(f[2], dict):
-                    filter_dict["{}__id".format(f[0])] = f[2]["id"]
+                field_name = f[0]
+                operator = f[1]
+                field_value = f[2]
+
+                if operator == "in":
+                    # links are matched by their ids
+                    if any(isinstance(value, Mapping) for value in field_value):
+                        filter_dict["{}__id__in".format(field_name)] = [
+                            value["id"] for value in field_value
+                        ]
+                    else:
+                        filter_dict["{}__in".format(field_name)] = list(field_value)
+                # entity links, for example from a Context, are mappings but no dicts
+                elif isinstance(field_value, Mapping):
+                    filter_dict["{}__id".format(field_name)] = field_value["id"]
                 else:
-                    field_name = f[0]
-                    field_value = f[2]
                     filter_dict[field_name] = field_value
 
-        entity_candidates = entity_cls.objects(**filter_dict).all()
-
-        return [_convert_to_dict(x) for x in entity_candidates]
+        return [
+            _convert_raw_to_dict(entity_cls, raw)
+            for raw in entity_cls.objects(**filter_dict).as_pymongo()
+        ]
 
     def find_one(self, entity_type, entity_id):
         # type: (str, KtrackIdType) -> Optional[Dict]
@@ -99,12 +229,47 @@ class KtrackMongoImpl(AbtractKtrackImpl):
         except KeyError:
             raise EntityMissing(entity_type)
 
-        entity_candidates = entity_cls.objects(id=entity_id).all()
+        raw = entity_cls.objects(id=entity_id).as_pymongo().first()
 
-        if len(entity_candidates) == 0:
+        if raw is None:
             return None
 
-        return _convert_to_dict(entity_candidates[0])
+        return _convert_raw_to_dict(entity_cls, raw)
+
+    def find_links(self, links):
+        # type: (List[Optional[dict]]) -> List[Optional[Dict]]
+        # group ids by type, so we need only one query for each type
+        ids_by_type = {}
+        for link in links:
+            if link:
+                ids_by_type.setdefault(link["type"], set()).add(link["id"])
+
+        entities_by_link = {}
+        for entity_type, entity_ids in ids_by_type.items():
+            try:
+                entity_cls = entities.entities[entity_type]
+            except KeyError:
+                raise EntityMissing(entity_type)
+
+            for raw in entity_cls.objects(id__in=list(entity_ids)).as_pymongo():
+                entity_dict = _convert_raw_to_dict(entity_cls, raw)
+                entities_by_link[(entity_type, entity_dict["id"])] = entity_dict
+
+        return [
+            entities_by_link.get((link["type"], str(link["id"]))) if link else None
+            for link in links
+        ]
+
+    def allocate_version(self, task, minimum_version=1):
+        # type: (dict, int) -> int
+        counter = VersionCounter.objects(task_id=str(task["id"]))
+
+        # $max and $inc can not change the same field in one update. Raising the counter first is still safe, it never
+        # lowers the counter, so the following $inc always returns a version no one got before
+        if minimum_version > 1:
+            counter.update_one(upsert=True, max__version=minimum_version - 1)
+
+        return counter.modify(upsert=True, new=True, inc__version=1).version
 
     def delete(self, entity_type, entity_id):
         # type: (str, KtrackIdType) -> None
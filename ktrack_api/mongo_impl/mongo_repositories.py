@@ -1,13 +1,161 @@
 from collections import Iterable
 
-from typing import Optional, List
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne
+from typing import Any, Callable, Iterator, Optional, List
 
-from ktrack_api.mongo_impl.entities import Project as MongoProject, Asset as MongoAsset
-from ktrack_api.repositories import ProjectRepository, AssetRepository
-from kttk.domain.entities import Project, Thumbnail, Asset
+from ktrack_api.mongo_impl.entities import (
+    NonProjectEntity as MongoNonProjectEntity,
+    Project as MongoProject,
+    Asset as MongoAsset,
+    Shot as MongoShot,
+    Task as MongoTask,
+    WorkFile as MongoWorkfile,
+    User as MongoUser,
+    update_modified,
+)
+from ktrack_api.repositories import (
+    ProjectRepository,
+    AssetRepository,
+    ShotRepository,
+    TaskRepository,
+    WorkfileRepository,
+    UserRepository,
+)
+from kttk.domain.entities import (
+    Project,
+    Thumbnail,
+    Asset,
+    Shot,
+    CutInformation,
+    Task,
+    EntityLink,
+    Workfile,
+    VersionNumber,
+    User,
+)
 
 
-class MongoProjectRepository(ProjectRepository[str]):
+def _bulk_save(mongo_entities):
+    # type: (List[MongoNonProjectEntity]) -> None
+    """
+    Saves all given documents of the same type with one bulk write. New documents are inserted, existing documents
+    are replaced by id
+    """
+    if not mongo_entities:
+        return
+
+    operations = []
+    for mongo_entity in mongo_entities:
+        # like save: validate and set updated_at
+        mongo_entity.validate()
+        update_modified(type(mongo_entity), mongo_entity)
+        if mongo_entity.id is None:
+            # id is created here, so the saved entities can be returned with their ids
+            mongo_entity.id = ObjectId()
+            operations.append(InsertOne(mongo_entity.to_mongo()))
+        else:
+            operations.append(
+                ReplaceOne(
+                    {"_id": mongo_entity.id}, mongo_entity.to_mongo(), upsert=True
+                )
+            )
+
+    type(mongo_entities[0])._get_collection().bulk_write(operations, ordered=False)
+
+
+def _raw_thumbnail(raw):
+    # type: (dict) -> Thumbnail
+    return Thumbnail(path=(raw.get("thumbnail") or {}).get("path"))
+
+
+def _to_mongo_link(entity_type, the_id):
+    """
+    Links are stored with string ids, like links created using Ktrack, so both can be found with the same query
+    """
+    if the_id:
+        return {"type": entity_type, "id": str(the_id)}
+
+
+def _to_entity_link(mongo_link):
+    # type: (dict) -> Optional[EntityLink]
+    if mongo_link:
+        return EntityLink(type=mongo_link["type"], id=mongo_link["id"])
+
+
+class _MongoRepository(object):
+    """
+    Finds and saves domain entities stored as documents of one mongo entity class. Subclasses pass their entity class
+    and mappers and only add the queries of their entity type
+    """
+
+    def __init__(self, entity_cls, to_domain, from_domain):
+        # type: (type, Callable[[dict], Any], Callable[[Any], MongoNonProjectEntity]) -> None
+        """
+        :param entity_cls: mongo entity class the domain entities are stored as
+        :param to_domain: converts a raw pymongo document to a domain entity
+        :param from_domain: converts a domain entity to a mongo entity
+        """
+        self._entity_cls = entity_cls
+        self._to_domain = to_domain
+        self._from_domain = from_domain
+
+    def _find(self, **query):
+        # type: (**Any) -> List[Any]
+        return list(
+            map(self._to_domain, self._entity_cls.objects(**query).as_pymongo())
+        )
+
+    def _first(self, query_set):
+        # type: (Any) -> Optional[Any]
+        raw = query_set.as_pymongo().first()
+        if raw:
+            return self._to_domain(raw)
+
+    def find_one(self, the_id):
+        # type: (str) -> Optional[Any]
+        return self._first(self._entity_cls.objects(id=the_id))
+
+    def find_all(self):
+        # type: () -> Iterable[Any]
+        return self._find()
+
+    def iter_all(self, batch_size=1000):
+        # type: (int) -> Iterator[Any]
+        for raw in self._entity_cls.objects.all().batch_size(batch_size).as_pymongo():
+            yield self._to_domain(raw)
+
+    def find_by_ids(self, ids):
+        # type: (List[str]) -> List[Optional[Any]]
+        found = {
+            str(raw["_id"]): self._to_domain(raw)
+            for raw in self._entity_cls.objects(
+                id__in=[the_id for the_id in ids if ObjectId.is_valid(the_id)]
+            ).as_pymongo()
+        }
+        return [found.get(str(the_id)) for the_id in ids]
+
+    def save(self, entity):
+        # type: (Any) -> Any
+        mongo_entity = self._from_domain(entity)
+        mongo_entity.save()
+        return self._to_domain(mongo_entity.to_mongo())
+
+    def save_all(self, entities):
+        # type: (Iterable[Any]) -> Iterable[Any]
+        mongo_entities = [self._from_domain(entity) for entity in entities]
+        _bulk_save(mongo_entities)
+        return [
+            self._to_domain(mongo_entity.to_mongo()) for mongo_entity in mongo_entities
+        ]
+
+
+class MongoProjectRepository(_MongoRepository, ProjectRepository[str]):
+    def __init__(self):
+        super(MongoProjectRepository, self).__init__(
+            MongoProject, self.raw_to_project, self.to_mongo_project
+        )
+
     @classmethod
     def to_mongo_project(cls, project):
         # type: (Project) -> MongoProject
@@ -32,27 +180,24 @@ class MongoProjectRepository(ProjectRepository[str]):
                 name=mongo_project.name,
             )
 
-    def find_one(self, the_id):
-        # type: (str) -> Optional[Project]
-        mongo_project = MongoProject.objects(id=the_id).first()
-        return MongoProjectRepository.to_project(mongo_project)
-
-    def find_all(self):
-        # type: () -> Iterable[Project]
-        return list(map(self.to_project, MongoProject.objects.all()))
+    @classmethod
+    def raw_to_project(cls, raw):
+        # type: (dict) -> Project
+        return Project(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            name=raw.get("name"),
+        )
 
-    def save(self, entity):
-        # type: (Project) -> Project
-        mongo_project = MongoProjectRepository.to_mongo_project(entity)
-        mongo_project.save()
-        return MongoProjectRepository.to_project(mongo_project)
 
-    def save_all(self, entities):
-        # type: (Iterable[Project]) -> Iterable[Project]
-        return list(map(self.save, entities))
+class MongoAssetRepository(_MongoRepository, AssetRepository):
+    def __init__(self):
+        super(MongoAssetRepository, self).__init__(
+            MongoAsset, self.raw_to_domain_entity, self.to_mongo_entity
+        )
 
-
-class MongoAssetRepository(AssetRepository):
     @classmethod
     def to_mongo_entity(cls, domain_entity):
         # type: (Asset) -> MongoAsset
@@ -66,9 +211,7 @@ class MongoAssetRepository(AssetRepository):
                 else {},
                 code=domain_entity.name,
                 asset_type=domain_entity.asset_type,
-                project={"type": "project", "id": domain_entity.project}
-                if domain_entity.project
-                else None,
+                project=_to_mongo_link("project", domain_entity.project),
             )
 
     @classmethod
@@ -85,26 +228,301 @@ class MongoAssetRepository(AssetRepository):
                 project=mongo_entity.project["id"],
             )
 
-    def find_one(self, the_id):
-        # type: (str) -> Optional[Asset]
-        mongo_entity = MongoAsset.objects(id=the_id).first()
-        return MongoAssetRepository.to_domain_entity(mongo_entity)
+    @classmethod
+    def raw_to_domain_entity(cls, raw):
+        # type: (dict) -> Asset
+        return Asset(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            name=raw.get("code"),
+            asset_type=raw.get("asset_type"),
+            project=raw["project"]["id"],
+        )
 
-    def find_all(self):
-        # type: () -> Iterable[Asset]
-        return list(map(self.to_domain_entity, MongoAsset.objects.all()))
+    def find_by_project(self, project):
+        # type: (str) -> List[Asset]
+        return self._find(project__id=str(project))
 
-    def save(self, entity):
-        # type: (Asset) -> Asset
-        mongo_asset = MongoAssetRepository.to_mongo_entity(entity)
-        mongo_asset.save()
-        return MongoAssetRepository.to_domain_entity(mongo_asset)
 
-    def save_all(self, entities):
-        # type: (Iterable[Asset]) -> Iterable[Asset]
-        return list(map(self.save, entities))
+class MongoShotRepository(_MongoRepository, ShotRepository):
+    def __init__(self):
+        super(MongoShotRepository, self).__init__(
+            MongoShot, self.raw_to_domain_entity, self.to_mongo_entity
+        )
+
+    @classmethod
+    def to_mongo_entity(cls, domain_entity):
+        # type: (Shot) -> MongoShot
+        if domain_entity:
+            cut_information = domain_entity.cut_information
+            return MongoShot(
+                id=domain_entity.id,
+                created_at=domain_entity.created_at,
+                updated_at=domain_entity.updated_at,
+                thumbnail={"path": domain_entity.thumbnail.path}
+                if domain_entity.thumbnail
+                else {},
+                code=domain_entity.code,
+                cut_in=cut_information.cut_in if cut_information else None,
+                cut_out=cut_information.cut_out if cut_information else None,
+                cut_duration=cut_information.cut_duration if cut_information else None,
+                project=_to_mongo_link("project", domain_entity.project),
+            )
+
+    @classmethod
+    def to_domain_entity(cls, mongo_entity):
+        # type: (MongoShot) -> Shot
+        if mongo_entity:
+            has_cut = (
+                mongo_entity.cut_in is not None and mongo_entity.cut_out is not None
+            )
+            return Shot(
+                id=mongo_entity.id,
+                created_at=mongo_entity.created_at,
+                updated_at=mongo_entity.updated_at,
+                thumbnail=Thumbnail(path=mongo_entity.thumbnail.get("path")),
+                code=mongo_entity.code,
+                cut_information=CutInformation(
+                    cut_in=mongo_entity.cut_in, cut_out=mongo_entity.cut_out
+                )
+                if has_cut
+                else None,
+                project=mongo_entity.project["id"],
+            )
+
+    @classmethod
+    def raw_to_domain_entity(cls, raw):
+        # type: (dict) -> Shot
+        cut_in = raw.get("cut_in")
+        cut_out = raw.get("cut_out")
+        return Shot(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            code=raw.get("code"),
+            cut_information=CutInformation(cut_in=cut_in, cut_out=cut_out)
+            if cut_in is not None and cut_out is not None
+            else None,
+            project=raw["project"]["id"],
+        )
 
     def find_by_project(self, project):
-        # type: (str) -> List[Asset]
-        mongo_entity = MongoAsset.objects(project__id=project).all()
-        return list(map(self.to_domain_entity, mongo_entity))
+        # type: (str) -> List[Shot]
+        return self._find(project__id=str(project))
+
+
+class MongoTaskRepository(_MongoRepository, TaskRepository):
+    def __init__(self):
+        super(MongoTaskRepository, self).__init__(
+            MongoTask, self.raw_to_domain_entity, self.to_mongo_entity
+        )
+
+    @classmethod
+    def to_mongo_entity(cls, domain_entity):
+        # type: (Task) -> MongoTask
+        if domain_entity:
+            return MongoTask(
+                id=domain_entity.id,
+                created_at=domain_entity.created_at,
+                updated_at=domain_entity.updated_at,
+                thumbnail={"path": domain_entity.thumbnail.path}
+                if domain_entity.thumbnail
+                else {},
+                name=domain_entity.name,
+                step=domain_entity.step,
+                entity=_to_mongo_link(
+                    domain_entity.entity.type, domain_entity.entity.id
+                )
+                if domain_entity.entity
+                else None,
+                assigned=_to_mongo_link(
+                    domain_entity.assigned.type, domain_entity.assigned.id
+                )
+                if domain_entity.assigned
+                else {},
+                project=_to_mongo_link("project", domain_entity.project),
+            )
+
+    @classmethod
+    def to_domain_entity(cls, mongo_entity):
+        # type: (MongoTask) -> Task
+        if mongo_entity:
+            return Task(
+                id=mongo_entity.id,
+                created_at=mongo_entity.created_at,
+                updated_at=mongo_entity.updated_at,
+                thumbnail=Thumbnail(path=mongo_entity.thumbnail.get("path")),
+                name=mongo_entity.name,
+                step=mongo_entity.step,
+                entity=_to_entity_link(mongo_entity.entity),
+                assigned=_to_entity_link(mongo_entity.assigned),
+                project=mongo_entity.project["id"],
+            )
+
+    @classmethod
+    def raw_to_domain_entity(cls, raw):
+        # type: (dict) -> Task
+        return Task(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            name=raw.get("name"),
+            step=raw.get("step"),
+            entity=_to_entity_link(raw.get("entity")),
+            assigned=_to_entity_link(raw.get("assigned")),
+            project=raw["project"]["id"],
+        )
+
+    def find_by_entity(self, entity):
+        # type: (EntityLink) -> List[Task]
+        return self._find(entity__id=str(entity.id))
+
+    def find_by_entities(self, entities):
+        # type: (List[EntityLink]) -> List[Task]
+        return self._find(entity__id__in=[str(entity.id) for entity in entities])
+
+    def find_assigned_to(self, user):
+        # type: (str) -> List[Task]
+        return self._find(assigned__id=str(user))
+
+
+class MongoWorkfileRepository(_MongoRepository, WorkfileRepository):
+    def __init__(self):
+        super(MongoWorkfileRepository, self).__init__(
+            MongoWorkfile, self.raw_to_domain_entity, self.to_mongo_entity
+        )
+
+    @classmethod
+    def to_mongo_entity(cls, domain_entity):
+        # type: (Workfile) -> MongoWorkfile
+        if domain_entity:
+            return MongoWorkfile(
+                id=domain_entity.id,
+                created_at=domain_entity.created_at,
+                updated_at=domain_entity.updated_at,
+                thumbnail={"path": domain_entity.thumbnail.path}
+                if domain_entity.thumbnail
+                else {},
+                name=domain_entity.name,
+                entity=_to_mongo_link(
+                    domain_entity.entity.type, domain_entity.entity.id
+                )
+                if domain_entity.entity
+                else None,
+                path=domain_entity.path,
+                comment=domain_entity.comment,
+                version_number=domain_entity.version_number.number
+                if domain_entity.version_number
+                else None,
+                created_from=_to_mongo_link("workfile", domain_entity.created_from),
+                project=_to_mongo_link("project", domain_entity.project),
+            )
+
+    @classmethod
+    def to_domain_entity(cls, mongo_entity):
+        # type: (MongoWorkfile) -> Workfile
+        if mongo_entity:
+            return Workfile(
+                id=mongo_entity.id,
+                created_at=mongo_entity.created_at,
+                updated_at=mongo_entity.updated_at,
+                thumbnail=Thumbnail(path=mongo_entity.thumbnail.get("path")),
+                name=mongo_entity.name,
+                entity=_to_entity_link(mongo_entity.entity),
+                path=mongo_entity.path,
+                comment=mongo_entity.comment,
+                version_number=VersionNumber(mongo_entity.version_number)
+                if mongo_entity.version_number
+                else None,
+                created_from=mongo_entity.created_from["id"]
+                if mongo_entity.created_from
+                else None,
+                project=mongo_entity.project["id"],
+            )
+
+    @classmethod
+    def raw_to_domain_entity(cls, raw):
+        # type: (dict) -> Workfile
+        version_number = raw.get("version_number")
+        created_from = raw.get("created_from")
+        return Workfile(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            name=raw.get("name"),
+            entity=_to_entity_link(raw.get("entity")),
+            path=raw.get("path"),
+            comment=raw.get("comment"),
+            version_number=VersionNumber(version_number) if version_number else None,
+            created_from=created_from["id"] if created_from else None,
+            project=raw["project"]["id"],
+        )
+
+    def find_by_entity(self, entity):
+        # type: (EntityLink) -> List[Workfile]
+        return self._find(entity__id=str(entity.id))
+
+    def find_highest_version(self, entity):
+        # type: (EntityLink) -> Optional[Workfile]
+        return self._first(
+            MongoWorkfile.objects(entity__id=str(entity.id)).order_by("-version_number")
+        )
+
+
+class MongoUserRepository(_MongoRepository, UserRepository):
+    def __init__(self):
+        super(MongoUserRepository, self).__init__(
+            MongoUser, self.raw_to_domain_entity, self.to_mongo_entity
+        )
+
+    @classmethod
+    def to_mongo_entity(cls, domain_entity):
+        # type: (User) -> MongoUser
+        if domain_entity:
+            return MongoUser(
+                id=domain_entity.id,
+                created_at=domain_entity.created_at,
+                updated_at=domain_entity.updated_at,
+                thumbnail={"path": domain_entity.thumbnail.path}
+                if domain_entity.thumbnail
+                else {},
+                name=domain_entity.name,
+                first_name=domain_entity.first_name,
+                second_name=domain_entity.second_name,
+            )
+
+    @classmethod
+    def to_domain_entity(cls, mongo_entity):
+        # type: (MongoUser) -> User
+        if mongo_entity:
+            return User(
+                id=mongo_entity.id,
+                created_at=mongo_entity.created_at,
+                updated_at=mongo_entity.updated_at,
+                thumbnail=Thumbnail(path=mongo_entity.thumbnail.get("path")),
+                name=mongo_entity.name,
+                first_name=mongo_entity.first_name,
+                second_name=mongo_entity.second_name,
+            )
+
+    @classmethod
+    def raw_to_domain_entity(cls, raw):
+        # type: (dict) -> User
+        return User(
+            id=raw["_id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            thumbnail=_raw_thumbnail(raw),
+            name=raw.get("name"),
+            first_name=raw.get("first_name"),
+            second_name=raw.get("second_name"),
+        )
+
+    def find_by_name(self, name):
+        # type: (str) -> Optional[User]
+        return self._first(MongoUser.objects(name=name))
@@ -1,6 +1,6 @@
-from typing import TypeVar, Generic, Iterable, Optional, Union, List
+from typing import TypeVar, Generic, Iterable, Iterator, Optional, Union, List
 
-from kttk.domain.entities import Project, Asset
+from kttk.domain.entities import Project, Asset, Shot, Task, Workfile, User, EntityLink
 
 T = TypeVar("T")
 ID = TypeVar("ID")
@@ -15,6 +15,22 @@ class AbstractRepository(Generic[T, ID]):
         # type: () -> Iterable[T]
         raise NotImplementedError()
 
+    def iter_all(self, batch_size=1000):
+        # type: (int) -> Iterator[T]
+        """
+        Iterates over all entities without loading all of them into memory at once
+        :param batch_size: number of entities fetched from the database at once
+        """
+        raise NotImplementedError()
+
+    def find_by_ids(self, ids):
+        # type: (List[ID]) -> List[Optional[T]]
+        """
+        Finds all entities with given ids with a single query
+        :return: entities in the same order as ids, None for not existing entities
+        """
+        raise NotImplementedError()
+
     def save(self, entity):
         # type: (T) -> T
         raise NotImplementedError()
@@ -32,3 +48,56 @@ class AssetRepository(AbstractRepository[Asset, ID]):
     def find_by_project(self, project):
         # type: (ID) -> List[Asset]
         raise NotImplementedError()
+
+
+class ShotRepository(AbstractRepository[Shot, ID]):
+    def find_by_project(self, project):
+        # type: (ID) -> List[Shot]
+        raise NotImplementedError()
+
+
+class TaskRepository(AbstractRepository[Task, ID]):
+    def find_by_entity(self, entity):
+        # type: (EntityLink) -> List[Task]
+        """
+        Finds all tasks of given asset or shot
+        """
+        raise NotImplementedError()
+
+    def find_by_entities(self, entities):
+        # type: (List[EntityLink]) -> List[Task]
+        """
+        Finds all tasks of all given assets or shots with a single query, for example to show the tasks of a list of
+        shots without querying every shot on its own
+        """
+        raise NotImplementedError()
+
+    def find_assigned_to(self, user):
+        # type: (ID) -> List[Task]
+        """
+        Finds all tasks assigned to the user with given id
+        """
+        raise NotImplementedError()
+
+
+class WorkfileRepository(AbstractRepository[Workfile, ID]):
+    def find_by_entity(self, entity):
+        # type: (EntityLink) -> List[Workfile]
+        """
+        Finds all workfiles of given task
+        """
+        raise NotImplementedError()
+
+    def find_highest_version(self, entity):
+        # type: (EntityLink) -> Optional[Workfile]
+        """
+        Finds the workfile with the highest version number of given task
+        :return: the workfile or None if the task has no workfiles
+        """
+        raise NotImplementedError()
+
+
+class UserRepository(AbstractRepository[User, ID]):
+    def find_by_name(self, name):
+        # type: (str) -> Optional[User]
+        raise NotImplementedError()
@@ -0,0 +1,465 @@
+"""
+Ktrack implementation storing all entities in a single SQLite file, so small installs and tests need no database server.
+Every entity type has its own table with the entity as JSON document. Links to other entities are additionally written
+to an indexed link table, so entities can be found by their links without reading all documents. Fields indexed in
+the mongo entities get an index on their JSON value. Field names, defaults and indexes are read from the entity
+registry of the mongo implementation, so both implementations return the same dicts.
+"""
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import contextlib
+import datetime
+import itertools
+import json
+import sqlite3
+import threading
+
+from bson import ObjectId
+from typing import List, Optional, Dict, Tuple, Iterator
+
+from ktrack_api.exceptions import EntityMissing, EntityNotFoundException
+from ktrack_api.ktrack import KtrackIdType
+from ktrack_api.ktrack_impl import AbtractKtrackImpl
+from ktrack_api.mongo_impl import entities
+
+SCHEME = "sqlite:"
+
+_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# SQLite before 3.32 allows at most 999 variables per statement
+_MAX_VARIABLES = 500
+
+# stored as user_version of the database file, increase when the tables or indexes change
+SCHEMA_VERSION = 1
+
+
+def database_path(connection_uri):
+    # type: (str) -> str
+    """
+    Returns the path of the database file of a sqlite connection uri. Like in SQLAlchemy, sqlite:///ktrack.db is a
+    relative and sqlite:////data/ktrack.db an absolute path, sqlite:// or sqlite:///:memory: is an in-memory database
+    """
+    path = connection_uri.split(":", 1)[1]
+    if path.startswith("///"):
+        path = path[3:]
+    else:
+        path = path.lstrip("/")
+    return path or ":memory:"
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return {"$date": value.strftime(_DATE_FORMAT)}
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError("{} is not JSON serializable".format(repr(value)))
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.datetime.strptime(obj["$date"], _DATE_FORMAT)
+    return obj
+
+
+def _encode(document):
+    # type: (dict) -> str
+    return json.dumps(document, default=_json_default)
+
+
+def _decode(data):
+    # type: (str) -> dict
+    return json.loads(data, object_hook=_json_object_hook)
+
+
+def _is_link(value):
+    return isinstance(value, Mapping) and "type" in value and "id" in value
+
+
+def _chunks(values, size=_MAX_VARIABLES):
+    for index in range(0, len(values), size):
+        yield values[index : index + size]
+
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+class KtrackSqliteImpl(AbtractKtrackImpl):
+    def __init__(self, connection_uri):
+        # type: (str) -> None
+        super(KtrackSqliteImpl, self).__init__(connection_uri)
+        self._lock = threading.RLock()
+        self._connection = self._open_database(database_path(connection_uri))
+        self._prepare_database()
+
+    def _open_database(self, path):
+        # type: (str) -> sqlite3.Connection
+        # one connection shared by all threads, access is serialized by the lock. isolation_level None disables the
+        # implicit transactions of the sqlite3 module, transactions are started explicitly in _transaction
+        return sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+
+    def _prepare_database(self):
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+        # journal mode and schema are stored in the file, so only a new file needs the write lock to set them up
+        if self._query("PRAGMA user_version")[0][0] != SCHEMA_VERSION:
+            # readers don't block writers and the other way round, also between processes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._create_tables()
+
+    def close(self):
+        # type: () -> None
+        with self._lock:
+            self._connection.close()
+
+    def _create_tables(self):
+        with self._transaction() as cursor:
+            for entity_type, entity_cls in entities.entities.items():
+                cursor.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, data TEXT NOT NULL)'.format(
+                        entity_type
+                    )
+                )
+                for field_names in entities.get_index_specs(entity_cls):
+                    # indexes on link ids like entity.id are covered by the link table
+                    if any("." in field_name for field_name in field_names):
+                        continue
+                    cursor.execute(
+                        'CREATE INDEX IF NOT EXISTS "{}_{}" ON "{}" ({})'.format(
+                            entity_type,
+                            "_".join(field_names),
+                            entity_type,
+                            ", ".join(
+                                self._field_expression(field_name)
+                                for field_name in field_names
+                            ),
+                        )
+                    )
+
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS link "
+                "(owner_type TEXT NOT NULL, owner_id TEXT NOT NULL, field TEXT NOT NULL, target_id TEXT)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS link_target ON link (owner_type, field, target_id)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS link_owner ON link (owner_type, owner_id)"
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS version_counter (task_id TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            cursor.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # type: () -> Iterator[sqlite3.Cursor]
+        """
+        Runs all statements in one transaction. The write lock is taken at the start, so a transaction never has to be
+        retried because someone else wrote in between
+        """
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            else:
+                cursor.execute("COMMIT")
+
+    def _query(self, sql, parameters=()):
+        # type: (str, tuple) -> List[tuple]
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _field_expression(field_name):
+        # type: (str) -> str
+        return "json_extract(data, '$.{}')".format(field_name)
+
+    @staticmethod
+    def _get_entity_cls(entity_type):
+        try:
+            return entities.entities[entity_type]
+        except KeyError:
+            raise EntityMissing(entity_type)
+
+    @staticmethod
+    def _to_entity_dict(entity_type, entity_id, data):
+        # type: (str, str, str) -> dict
+        entity_dict = _decode(data)
+        entity_dict["type"] = entity_type
+        entity_dict["id"] = entity_id
+        return entity_dict
+
+    def _new_document(self, entity_cls, data):
+        # type: (type, dict) -> dict
+        now = datetime.datetime.now()
+        document = {}
+        for field_name, _, default in entities.get_field_specs(entity_cls):
+            if field_name != "id":
+                document[field_name] = default() if callable(default) else default
+        document["created_at"] = now
+        self._apply_data(entity_cls, document, data)
+        document["updated_at"] = now
+        return document
+
+    @staticmethod
+    def _apply_data(entity_cls, document, data):
+        # type: (type, dict, dict) -> None
+        # like setting attributes of a mongoengine document, unknown fields are not stored
+        for key, value in data.items():
+            if key in entity_cls._fields and key != "id":
+                document[key] = value
+
+    @staticmethod
+    def _write(cursor, entity_type, entity_id, document, insert):
+        # type: (sqlite3.Cursor, str, str, dict, bool) -> None
+        if insert:
+            cursor.execute(
+                'INSERT INTO "{}" (id, data) VALUES (?, ?)'.format(entity_type),
+                (entity_id, _encode(document)),
+            )
+        else:
+            cursor.execute(
+                'UPDATE "{}" SET data = ? WHERE id = ?'.format(entity_type),
+                (_encode(document), entity_id),
+            )
+            cursor.execute(
+                "DELETE FROM link WHERE owner_type = ? AND owner_id = ?",
+                (entity_type, entity_id),
+            )
+
+        cursor.executemany(
+            "INSERT INTO link (owner_type, owner_id, field, target_id) VALUES (?, ?, ?, ?)",
+            [
+                (entity_type, entity_id, field_name, str(value["id"]))
+                for field_name, value in document.items()
+                if _is_link(value)
+            ],
+        )
+
+    def create(self, entity_type, data={}):
+        # type: (str, dict) -> dict
+        return self.create_many(entity_type, [data])[0]
+
+    def create_many(self, entity_type, data_list):
+        # type: (str, List[dict]) -> List[dict]
+        entity_type = entity_type.lower()
+        entity_cls = self._get_entity_cls(entity_type)
+
+        created = []
+        with self._transaction() as cursor:
+            for data in data_list:
+                entity_id = str(ObjectId())
+                document = self._new_document(entity_cls, data)
+                self._write(cursor, entity_type, entity_id, document, insert=True)
+                created.append((entity_id, document))
+
+        # encoded and decoded again, so created entities look exactly like found entities
+        return [
+            self._to_entity_dict(entity_type, entity_id, _encode(document))
+            for entity_id, document in created
+        ]
+
+    def insert_entities(self, entity_type, entity_dicts):
+        # type: (str, List[dict]) -> None
+        """
+        Inserts entities as they are, keeping their ids and dates, for example to copy entities from another
+        implementation
+        """
+        entity_cls = self._get_entity_cls(entity_type)
+
+        with self._transaction() as cursor:
+            for entity_dict in entity_dicts:
+                document = {
+                    key: value
+                    for key, value in entity_dict.items()
+                    if key in entity_cls._fields and key != "id"
+                }
+                self._write(
+                    cursor, entity_type, str(entity_dict["id"]), document, insert=True
+                )
+
+    def update(self, entity_type, entity_id, data):
+        # type: (str, KtrackIdType, dict) -> None
+        if not self.update_many([(entity_type, entity_id, data)])[0]:
+            raise EntityNotFoundException(str(entity_id))
+
+    def update_many(self, updates):
+        # type: (List[Tuple[str, KtrackIdType, dict]]) -> List[bool]
+        for entity_type, _, _ in updates:
+            self._get_entity_cls(entity_type)
+
+        updated = []
+        now = datetime.datetime.now()
+        with self._transaction() as cursor:
+            for entity_type, entity_id, data in updates:
+                row = cursor.execute(
+                    'SELECT data FROM "{}" WHERE id = ?'.format(entity_type),
+                    (str(entity_id),),
+                ).fetchone()
+                if row is None:
+                    updated.append(False)
+                    continue
+
+                document = _decode(row[0])
+                self._apply_data(entities.entities[entity_type], document, data)
+                document["updated_at"] = now
+                self._write(cursor, entity_type, str(entity_id), document, insert=False)
+                updated.append(True)
+
+        return updated
+
+    def find(self, entity_type, filters):
+        # type: (str, list) -> List[dict]
+        entity_cls = self._get_entity_cls(entity_type)
+
+        # values of in filters are split into chunks, so no statement has too many variables
+        chunked_filters = []
+        for field_name, operator, field_value in filters:
+            if field_name != "id" and field_name not in entity_cls._fields:
+                raise ValueError("{} has no field {}".format(entity_type, field_name))
+
+            values = list(field_value) if operator == "in" else [field_value]
+            values = [str(v) if isinstance(v, ObjectId) else v for v in values]
+
+            mappings = [value for value in values if isinstance(value, Mapping)]
+            if mappings and not all(_is_link(value) for value in values):
+                raise ValueError(
+                    "{}.{} can only be matched by links with type and id, got {}".format(
+                        entity_type, field_name, mappings[0]
+                    )
+                )
+
+            if operator == "in":
+                chunks = [(field_name, operator, chunk) for chunk in _chunks(values)]
+                chunked_filters.append(chunks or [(field_name, operator, [])])
+            else:
+                chunked_filters.append([(field_name, operator, values)])
+
+        # a value of a field is only in one chunk, so the results of all chunk combinations are distinct
+        found = []
+        for chunk_filters in itertools.product(*chunked_filters):
+            found.extend(self._find_chunk(entity_type, chunk_filters))
+        return found
+
+    def _find_chunk(self, entity_type, filters):
+        # type: (str, Tuple[Tuple[str, str, list], ...]) -> List[dict]
+        clauses = []
+        parameters = []
+        for field_name, operator, values in filters:
+            if not values:
+                clauses.append("0")
+            elif _is_link(values[0]):
+                # links are matched by their ids using the link table
+                clauses.append(
+                    "id IN (SELECT owner_id FROM link WHERE owner_type = ? AND field = ? AND target_id IN ({}))".format(
+                        _placeholders(values)
+                    )
+                )
+                parameters.extend(
+                    [entity_type, field_name] + [str(value["id"]) for value in values]
+                )
+            else:
+                column = (
+                    "id" if field_name == "id" else self._field_expression(field_name)
+                )
+                if operator == "in":
+                    clauses.append("{} IN ({})".format(column, _placeholders(values)))
+                    parameters.extend(values)
+                elif values[0] is None:
+                    clauses.append("{} IS NULL".format(column))
+                else:
+                    clauses.append("{} = ?".format(column))
+                    parameters.append(values[0])
+
+        sql = 'SELECT id, data FROM "{}"'.format(entity_type)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        return [
+            self._to_entity_dict(entity_type, entity_id, data)
+            for entity_id, data in self._query(sql, tuple(parameters))
+        ]
+
+    def find_one(self, entity_type, entity_id):
+        # type: (str, KtrackIdType) -> Optional[Dict]
+        self._get_entity_cls(entity_type)
+
+        rows = self._query(
+            'SELECT data FROM "{}" WHERE id = ?'.format(entity_type), (str(entity_id),)
+        )
+        if not rows:
+            return None
+
+        return self._to_entity_dict(entity_type, str(entity_id), rows[0][0])
+
+    def find_links(self, links):
+        # type: (List[Optional[dict]]) -> List[Optional[Dict]]
+        # group ids by type, so we need only one query for each type
+        ids_by_type = {}
+        for link in links:
+            if link:
+                ids_by_type.setdefault(link["type"], set()).add(str(link["id"]))
+
+        entities_by_link = {}
+        for entity_type, entity_ids in ids_by_type.items():
+            self._get_entity_cls(entity_type)
+
+            for chunk in _chunks(list(entity_ids)):
+                rows = self._query(
+                    'SELECT id, data FROM "{}" WHERE id IN ({})'.format(
+                        entity_type, _placeholders(chunk)
+                    ),
+                    tuple(chunk),
+                )
+                for entity_id, data in rows:
+                    entities_by_link[(entity_type, entity_id)] = self._to_entity_dict(
+                        entity_type, entity_id, data
+                    )
+
+        return [
+            entities_by_link.get((link["type"], str(link["id"]))) if link else None
+            for link in links
+        ]
+
+    def allocate_version(self, task, minimum_version=1):
+        # type: (dict, int) -> int
+        task_id = str(task["id"])
+
+        # the write lock is held for the whole transaction, so no one else can allocate in between
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT OR IGNORE INTO version_counter (task_id, version) VALUES (?, 0)",
+                (task_id,),
+            )
+            cursor.execute(
+                "UPDATE version_counter SET version = MAX(version, ?) + 1 WHERE task_id = ?",
+                (minimum_version - 1, task_id),
+            )
+            return cursor.execute(
+                "SELECT version FROM version_counter WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+
+    def delete(self, entity_type, entity_id):
+        # type: (str, KtrackIdType) -> None
+        self._get_entity_cls(entity_type)
+
+        with self._transaction() as cursor:
+            cursor.execute(
+                'DELETE FROM "{}" WHERE id = ?'.format(entity_type), (str(entity_id),)
+            )
+            if cursor.rowcount == 0:
+                raise EntityNotFoundException(str(entity_id))
+            cursor.execute(
+                "DELETE FROM link WHERE owner_type = ? AND owner_id = ?",
+                (entity_type, str(entity_id)),
+            )
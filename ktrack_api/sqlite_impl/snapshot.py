@@ -0,0 +1,116 @@
+"""
+Read-only project snapshots for render farm nodes.
+Farm tasks only read a project, its assets, shots, tasks, workfiles and path entries. Instead of thousands of farm
+processes querying the database, the project is exported once to a SQLite file, which is then opened read-only with
+snapshot:///path/to/project.db. The file is memory mapped, so all processes on a node share the pages in the OS cache.
+"""
+import os
+import sqlite3
+import uuid
+
+from typing import Dict
+
+from ktrack_api.exceptions import EntityNotFoundException, ReadOnlyException
+from ktrack_api.ktrack import KtrackIdType
+from ktrack_api.sqlite_impl.ktrack_sqlite_impl import KtrackSqliteImpl
+
+SCHEME = "snapshot:"
+
+# entity types linked to the project, exported together with the project
+PROJECT_ENTITY_TYPES = ["asset", "shot", "task", "workfile"]
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+class KtrackSnapshotImpl(KtrackSqliteImpl):
+    """
+    Serves reads from a snapshot created by export_project, all writes raise a ReadOnlyException
+    """
+
+    def _open_database(self, path):
+        # type: (str) -> sqlite3.Connection
+        # connect would create an empty database
+        if not os.path.isfile(path):
+            raise IOError("Snapshot {} does not exist".format(path))
+        return sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+    def _prepare_database(self):
+        self._connection.execute("PRAGMA query_only=ON")
+        self._connection.execute("PRAGMA mmap_size={}".format(MMAP_SIZE))
+
+    def create(self, entity_type, data={}):
+        raise ReadOnlyException("create {}".format(entity_type))
+
+    def create_many(self, entity_type, data_list):
+        raise ReadOnlyException("create {}".format(entity_type))
+
+    def insert_entities(self, entity_type, entity_dicts):
+        raise ReadOnlyException("create {}".format(entity_type))
+
+    def update(self, entity_type, entity_id, data):
+        raise ReadOnlyException("update {}".format(entity_type))
+
+    def update_many(self, updates):
+        raise ReadOnlyException("update")
+
+    def allocate_version(self, task, minimum_version=1):
+        raise ReadOnlyException("allocate version")
+
+    def delete(self, entity_type, entity_id):
+        raise ReadOnlyException("delete {}".format(entity_type))
+
+
+def export_project(kt, project_id, path):
+    # type: (object, KtrackIdType, str) -> Dict[str, int]
+    """
+    Writes a snapshot of a project with all its entities, path entries and all users to path. The snapshot is written
+    to a temporary file first and replaces an existing snapshot at once, so farm nodes never read a half written file
+    :param kt: Ktrack or Ktrack implementation to read from
+    :param project_id: id of the project to export
+    :param path: path of the snapshot file
+    :return: number of exported entities by entity type
+    """
+    project = kt.find_one("project", project_id)
+    if project is None:
+        raise EntityNotFoundException(project_id)
+    project_link = {"type": "project", "id": project["id"]}
+
+    entities_by_type = {"project": [project]}
+    for entity_type in PROJECT_ENTITY_TYPES:
+        entities_by_type[entity_type] = kt.find(
+            entity_type, [["project", "is", project_link]]
+        )
+    entities_by_type["path_entry"] = kt.find(
+        "path_entry", [["project_id", "is", str(project["id"])]]
+    )
+    entities_by_type["user"] = kt.find("user", [])
+
+    temp_path = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+    snapshot = KtrackSqliteImpl("sqlite:///" + temp_path)
+    try:
+        for entity_type, entity_dicts in entities_by_type.items():
+            snapshot.insert_entities(entity_type, entity_dicts)
+
+        # a single file without -wal and -shm files, readers need no write access to the folder
+        snapshot._connection.execute("PRAGMA journal_mode=DELETE")
+        snapshot._connection.execute("ANALYZE")
+        snapshot._connection.execute("VACUUM")
+        snapshot.close()
+
+        if hasattr(os, "replace"):
+            os.replace(temp_path, path)
+        else:
+            # Python 2 on Windows can not rename to an existing file
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except Exception:
+        snapshot.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return {
+        entity_type: len(entity_dicts)
+        for entity_type, entity_dicts in entities_by_type.items()
+    }
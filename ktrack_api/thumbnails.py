@@ -0,0 +1,161 @@
+"""
+Thumbnail storage.
+Thumbnails are resized to fit into a bounded size and stored content-addressed: the file name is the sha1 hash of the
+source image, so uploading the same image again reuses the existing thumbnail instead of copying it again. Stored
+thumbnails never change, which makes them easy to cache.
+Images are resized with Pillow if installed, otherwise with Qt if available. Without both, images are copied unchanged.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import attr
+from typing import Optional
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    from Qt import QtCore, QtGui
+except ImportError:
+    QtGui = None
+
+DEFAULT_MAX_SIZE = 512
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_executor = None  # type: Optional[ThreadPoolExecutor]
+_executor_lock = threading.Lock()
+
+
+@attr.s
+class ThumbnailUploadResult(object):
+    entity_type = attr.ib()  # type: str
+    entity_id = attr.ib()  # type: str
+    path = attr.ib()  # type: str
+    thumbnail_path = attr.ib(default=None)  # type: Optional[str]
+    error = attr.ib(default=None)  # type: Optional[Exception]
+
+    @property
+    def succeeded(self):
+        # type: () -> bool
+        return self.error is None
+
+
+def file_hash(path):
+    # type: (str) -> str
+    """
+    Returns the sha1 hex digest of the content of given file
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def thumbnail_path(thumbnail_root, digest, ext):
+    # type: (str, str, str) -> str
+    """
+    Returns the path of the thumbnail with given hash. Thumbnails are spread over sub folders named by the first two
+    chars of the hash, so no folder gets too many files
+    """
+    return "/".join([thumbnail_root, digest[:2], digest + ext.lower()])
+
+
+def store_thumbnail(path, thumbnail_root, max_size=DEFAULT_MAX_SIZE):
+    # type: (str, str, int) -> str
+    """
+    Stores a thumbnail for given image, if there is no thumbnail for an image with the same content yet
+    :param path: path to the image
+    :param thumbnail_root: folder containing all thumbnails
+    :param max_size: maximum width and height of the thumbnail, aspect ratio is kept
+    :return: path to the thumbnail
+    """
+    target_path = thumbnail_path(
+        thumbnail_root, file_hash(path), os.path.splitext(path)[1]
+    )
+    if os.path.exists(target_path):
+        return target_path
+
+    target_folder = os.path.dirname(target_path)
+    if not os.path.exists(target_folder):
+        try:
+            os.makedirs(target_folder)
+        except OSError:
+            # created by someone else in the meantime
+            if not os.path.isdir(target_folder):
+                raise
+
+    # write to a temporary file first and rename, so no one ever sees a half written thumbnail
+    temp_path = "{}.{}.tmp{}".format(
+        target_path, uuid.uuid4().hex, os.path.splitext(target_path)[1]
+    )
+    try:
+        resize_image(path, temp_path, max_size)
+        _move_to_target(temp_path, target_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return target_path
+
+
+def _move_to_target(temp_path, target_path):
+    # type: (str, str) -> None
+    try:
+        if hasattr(os, "replace"):
+            os.replace(temp_path, target_path)
+        else:
+            os.rename(temp_path, target_path)
+    except OSError:
+        # on Windows this fails if the same image was stored at the same time, the thumbnail is there anyway
+        if not os.path.exists(target_path):
+            raise
+        os.remove(temp_path)
+
+
+def resize_image(source_path, target_path, max_size):
+    # type: (str, str, int) -> None
+    """
+    Writes a copy of source image fitting into max_size x max_size to target path. Smaller images are copied unchanged
+    """
+    if Image is not None:
+        # closed right away, an open image keeps the source file locked on Windows
+        with Image.open(source_path) as image:
+            if max(image.size) > max_size:
+                image.thumbnail((max_size, max_size))
+                image.save(target_path, format=image.format)
+                return
+    elif QtGui is not None:
+        image = QtGui.QImage(source_path)
+        if not image.isNull() and max(image.width(), image.height()) > max_size:
+            image = image.scaled(
+                max_size,
+                max_size,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation,
+            )
+            if not image.save(target_path):
+                raise IOError("Can not write thumbnail {}".format(target_path))
+            return
+
+    shutil.copy(source_path, target_path)
+
+
+def get_executor():
+    # type: () -> ThreadPoolExecutor
+    """
+    Returns the thread pool used for background thumbnail uploads, shared by all Ktrack instances
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4)
+        return _executor
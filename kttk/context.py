@@ -1,13 +1,124 @@
 import json
 
 import six
-from frozendict import frozendict
+from typing import Optional, Tuple
 
 import ktrack_api
 from kttk import template_manager, utils
 
+# version of the compact context encoding used by serialize and as_compact_dict
+COMPACT_FORMAT_VERSION = 1
+_FORMAT_VERSION_KEY = "v"
+# short keys for the elements of id_tuple
+_COMPACT_KEYS = ("p", "et", "e", "s", "t", "w", "u")
+
+# populated contexts by id tuple, so selecting the same context again in the UI needs no database query
+_populated_context_cache = utils.LRUCache(256)
+
+# tokens by id tuple, contexts are immutable, so tokens only change when the entities are changed in the database
+_tokens_cache = utils.LRUCache(256)
+
+
+def clear_populated_context_cache():
+    # type: () -> None
+    """
+    Removes all populated contexts from cache, next populate_context(use_cache=True) will query the database again
+    """
+    _populated_context_cache.clear()
+
+
+def clear_tokens_cache():
+    # type: () -> None
+    """
+    Removes all cached tokens, next get_avaible_tokens will query the database again
+    """
+    _tokens_cache.clear()
+
+
+def _tokens_from_entities(project, entity, step, task, workfile, user):
+    # type: (dict, dict, str, dict, dict, dict) -> dict
+    tokens = {}
+
+    if project:
+        tokens["project_name"] = project["name"]
+        tokens["project_year"] = project["created_at"].year
+
+    if entity:
+        tokens["code"] = entity["code"]
+
+        if entity["type"] == "asset":
+            tokens["asset_type"] = entity["asset_type"]
+
+    if step:
+        tokens["step"] = step
+
+    if task:
+        tokens["task_name"] = task["name"]
+
+    if workfile:
+        tokens["work_file_name"] = workfile["name"]
+        tokens["work_file_path"] = workfile["path"]
+        tokens["work_file_comment"] = workfile["comment"]
+        tokens["version"] = "v{}".format(
+            "{}".format(workfile["version_number"]).zfill(3)
+        )
+
+    if user:
+        tokens["user_name"] = user["name"]
+
+    return tokens
+
+
+def _typed_link(entity_type, entity_dict):
+    # type: (str, dict) -> Optional[dict]
+    return {"type": entity_type, "id": entity_dict["id"]} if entity_dict else None
+
+
+def _context_links(project, entity, task, workfile, user):
+    # type: (dict, dict, dict, dict, dict) -> list
+    # only entity can be of different types, so the other links are always queried with their fixed type
+    return [
+        _typed_link("project", project),
+        entity,
+        _typed_link("task", task),
+        _typed_link("workfile", workfile),
+        _typed_link("user", user),
+    ]
+
+
+def _link_id(entity_dict):
+    # type: (dict) -> Optional[str]
+    return entity_dict["id"] if entity_dict else None
+
+
+def _plain_dict(entity_dict):
+    # type: (dict) -> Optional[dict]
+    return dict(entity_dict) if entity_dict is not None else None
+
+
+def _link(entity_type, entity_id):
+    # type: (str, str) -> Optional[utils.EntityLink]
+    return utils.EntityLink(entity_type, entity_id) if entity_id is not None else None
+
+
+def _link_key(entity_dict):
+    # type: (dict) -> Optional[Tuple]
+    return (entity_dict["type"], entity_dict["id"]) if entity_dict else None
+
 
 class Context(object):
+    # no instance dict, contexts are created for every registered path, so they should be as small as possible
+    __slots__ = (
+        "_project",
+        "_entity",
+        "_step",
+        "_task",
+        "_workfile",
+        "_user",
+        "_key",
+        "_hash",
+        "_tokens",
+    )
 
     # todo make sure project, entity whatever can only be populated with correct entity types
     def __init__(
@@ -39,14 +150,30 @@ class Context(object):
         self._validate_entity_dict(user)
         self._user = utils.frozen_entity_id_dict(user)
 
+        self._init_key()
+
+    def _init_key(self):
+        # type: () -> None
+        # contexts are immutable, so key and hash for equality and hashing are computed only once
+        self._key = (
+            _link_key(self._project),
+            _link_key(self._entity),
+            self._step,
+            _link_key(self._task),
+            _link_key(self._workfile),
+            _link_key(self._user),
+        )
+        self._hash = hash(self._key)
+        self._tokens = None  # cached result of _query_tokens
+
     @property
     def project(self):
-        # type: () -> frozendict
+        # type: () -> utils.EntityLink
         return self._project
 
     @property
     def entity(self):
-        # type: () -> frozendict
+        # type: () -> utils.EntityLink
         return self._entity
 
     @property
@@ -56,17 +183,17 @@ class Context(object):
 
     @property
     def task(self):
-        # type: () -> frozendict
+        # type: () -> utils.EntityLink
         return self._task
 
     @property
     def workfile(self):
-        # type: () -> frozendict
+        # type: () -> utils.EntityLink
         return self._workfile
 
     @property
     def user(self):
-        # type: () -> frozendict
+        # type: () -> utils.EntityLink
         return self._user
 
     @staticmethod
@@ -113,45 +240,33 @@ class Context(object):
 
         return "<kttk Context: \n%s>" % ("\n".join(msg))
 
-    def _entity_dicts_equal(self, left, right):
-        # type: (dict, dict) -> bool
-        if left == right == None:
-            return True
-        if left == None or right == None:
-            return False
-        return left["type"] == right["type"] and left["id"] == right["id"]
-
     def __eq__(self, other):
         # type: (Context) -> bool
-
+        if self is other:
+            return True
         if not isinstance(other, Context):
             return NotImplemented
-
-        # test project
-        if not self._entity_dicts_equal(self.project, other.project):
-            return False
-
-        # test entity
-        if not self._entity_dicts_equal(self.entity, other.entity):
-            return False
-
-        # test step
-        if not self.step == other.step:
-            return False
-
-        # test task
-        if not self._entity_dicts_equal(self.task, other.task):
-            return False
-
-        # test workfile
-        if not self._entity_dicts_equal(self.workfile, other.workfile):
-            return False
-
-        # test user
-        if not self._entity_dicts_equal(self.user, other.user):
-            return False
-
-        return True
+        return self._hash == other._hash and self._key == other._key
+
+    def __hash__(self):
+        # type: () -> int
+        return self._hash
+
+    def id_tuple(self):
+        # type: () -> Tuple
+        """
+        Returns a tuple identifying this context: project id, entity type, entity id, step, task id, workfile id and user id.
+        Useful as key for caches
+        """
+        return (
+            _link_id(self.project),
+            self.entity["type"] if self.entity else None,
+            _link_id(self.entity),
+            self.step,
+            _link_id(self.task),
+            _link_id(self.workfile),
+            _link_id(self.user),
+        )
 
     def __ne__(self, other):
         # type: (Context) -> bool
@@ -162,13 +277,14 @@ class Context(object):
 
     def as_dict(self):
         # type: () -> dict
+        # plain dicts, so the result can be stored in the database or dumped to json
         context_dict = {}
-        context_dict["project"] = self.project
-        context_dict["entity"] = self.entity
+        context_dict["project"] = _plain_dict(self.project)
+        context_dict["entity"] = _plain_dict(self.entity)
         context_dict["step"] = self.step
-        context_dict["task"] = self.task
-        context_dict["workfile"] = self.workfile
-        context_dict["user"] = self.user
+        context_dict["task"] = _plain_dict(self.task)
+        context_dict["workfile"] = _plain_dict(self.workfile)
+        context_dict["user"] = _plain_dict(self.user)
 
         return context_dict
 
@@ -184,61 +300,146 @@ class Context(object):
             user=context_dict.get("user"),
         )
 
+    @classmethod
+    def from_id_tuple(cls, id_tuple):
+        # type: (Tuple) -> Context
+        """
+        Creates a context from a tuple returned by id_tuple
+        """
+        (
+            project_id,
+            entity_type,
+            entity_id,
+            step,
+            task_id,
+            workfile_id,
+            user_id,
+        ) = id_tuple
+        # links built from ids are always valid, so the validation in __init__ is skipped, contexts are decoded for
+        # every path entry and this is noticeably faster
+        context = Context.__new__(Context)
+        context._project = _link("project", project_id)
+        context._entity = _link(entity_type, entity_id)
+        context._step = step
+        context._task = _link("task", task_id)
+        context._workfile = _link("workfile", workfile_id)
+        context._user = _link("user", user_id)
+        context._init_key()
+        return context
+
+    def as_compact_dict(self):
+        # type: () -> dict
+        """
+        Returns a compact dict representation storing only ids with short keys, None values are omitted.
+        Used to store contexts in the database, for example in path entries
+        """
+        compact_dict = {_FORMAT_VERSION_KEY: COMPACT_FORMAT_VERSION}
+        for key, value in zip(_COMPACT_KEYS, self.id_tuple()):
+            if value is not None:
+                compact_dict[key] = value
+        return compact_dict
+
+    @classmethod
+    def from_compact_dict(cls, compact_dict):
+        # type: (dict) -> Context
+        """
+        Creates a context from a dict created by as_compact_dict or a legacy dict created by as_dict
+        """
+        if _FORMAT_VERSION_KEY not in compact_dict:
+            return cls.from_dict(compact_dict)
+        return cls.from_id_tuple([compact_dict.get(key) for key in _COMPACT_KEYS])
+
     def serialize(self):
         # type: () -> str
-        return json.dumps(self.as_dict())
+        """
+        Serializes this context to a compact json list: format version followed by the id_tuple
+        """
+        return json.dumps([COMPACT_FORMAT_VERSION] + list(self.id_tuple()))
 
     @classmethod
     def deserialize(cls, string):
         # type: (str) -> Context
-        return cls.from_dict(json.loads(string))
+        """
+        Restores a context serialized by serialize. Also reads the legacy format, which was the json of as_dict
+        """
+        data = json.loads(string)
+        if isinstance(data, dict):
+            return cls.from_dict(data)
+
+        version = data[0]
+        if version != COMPACT_FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported context format version {}, supported is {}".format(
+                    version, COMPACT_FORMAT_VERSION
+                )
+            )
+        return cls.from_id_tuple(data[1:])
 
     def get_avaible_tokens(self):
         # type: () -> dict
-        avaible_tokens = {}
-
-        kt = ktrack_api.get_ktrack()
+        """
+        Returns the tokens of this context used to format templates, for example project_name or version.
+        Tokens are queried from the database only once per context and cached, call refresh() after the entities changed.
+        :return: new dict of tokens, can be modified by the caller
+        """
+        if self._tokens is None:
+            key = self.id_tuple()
+            tokens = _tokens_cache.get(key)
+            if tokens is None:
+                tokens = self._query_tokens()
+                _tokens_cache.put(key, tokens)
+            self._tokens = tokens
+
+        avaible_tokens = dict(self._tokens)
+
+        # project root comes from config, not from the database, so it is never cached
+        avaible_tokens["project_root"] = template_manager.get_route_template(
+            "project_root"
+        )
 
-        if self.project:
-            project = kt.find_one("project", self.project["id"])
-            avaible_tokens["project_name"] = project["name"]
-            avaible_tokens["project_year"] = project["created_at"].year
+        return avaible_tokens
 
+    def _query_tokens(self):
+        # type: () -> dict
         # make sure to query all fields from ktrack, because we might only have id and type
+        links = _context_links(
+            self.project, self.entity, self.task, self.workfile, self.user
+        )
 
-        if self.entity:
-            entity = kt.find_one(self.entity["type"], self.entity["id"])
-            avaible_tokens["code"] = entity["code"]
-
-            if entity["type"] == "asset":
-                avaible_tokens["asset_type"] = entity["asset_type"]
-
-        if self.step:
-            avaible_tokens["step"] = self.step
-
-        if self.task:
-            task = kt.find_one("task", self.task["id"])
-            avaible_tokens["task_name"] = task["name"]
-
-        if self.workfile:
-            workfile = kt.find_one("workfile", self.workfile["id"])
-
-            avaible_tokens["work_file_name"] = workfile["name"]
-            avaible_tokens["work_file_path"] = workfile["path"]
-            avaible_tokens["work_file_comment"] = workfile["comment"]
-            avaible_tokens["version"] = "v{}".format(
-                "{}".format(workfile["version_number"]).zfill(3)
-            )
+        if any(links):
+            kt = ktrack_api.get_ktrack()
+            project, entity, task, workfile, user = kt.find_links(links)
+        else:
+            project = entity = task = workfile = user = None
 
-        if self.user:
-            user = kt.find_one("user", self.user["id"])
-            avaible_tokens["user_name"] = user["name"]
+        return _tokens_from_entities(project, entity, self.step, task, workfile, user)
 
-        avaible_tokens["project_root"] = template_manager.get_route_template(
-            "project_root"
-        )
+    def refresh(self):
+        # type: () -> None
+        """
+        Drops the cached tokens of this context, next call of get_avaible_tokens will query the database again
+        """
+        self._tokens = None
+        _tokens_cache.pop(self.id_tuple())
 
-        return avaible_tokens
+    def token_snapshot(self):
+        # type: () -> str
+        """
+        Serializes the tokens of this context, so they can be stored for example in a scene file and restored later
+        without any database access
+        :return: json string of the tokens
+        """
+        tokens = self.get_avaible_tokens()
+        del tokens["project_root"]
+        return json.dumps(tokens)
+
+    def restore_token_snapshot(self, snapshot):
+        # type: (str) -> None
+        """
+        Uses the tokens of given snapshot for this context instead of querying the database
+        :param snapshot: json string created by token_snapshot
+        """
+        self._tokens = json.loads(snapshot)
 
     def copy_context(self, project=0, entity=0, step=0, task=0, workfile=0, user=0):
         # type: (dict, dict, str, dict, dict, dict) -> Context
@@ -268,8 +469,21 @@ class Context(object):
 
         return Context(_project, _entity, _step, _task, _workfile, _user)
 
-    def populate_context(self):
-        return PopulatedContext(
+    def populate_context(self, use_cache=False):
+        # type: (bool) -> PopulatedContext
+        """
+        Returns a PopulatedContext for this context, containing full entities instead of type and id only
+        :param use_cache: if True, an already populated context with the same id tuple is returned from cache, no query is needed
+        :return: populated context
+        """
+        key = self.id_tuple()
+
+        if use_cache:
+            populated_context = _populated_context_cache.get(key)
+            if populated_context:
+                return populated_context
+
+        populated_context = PopulatedContext(
             project=self.project,
             entity=self.entity,
             step=self.step,
@@ -277,48 +491,47 @@ class Context(object):
             workfile=self.workfile,
             user=self.user,
         )
+        _populated_context_cache.put(key, populated_context)
+        return populated_context
 
 
 class PopulatedContext(Context):
+    __slots__ = ()
+
     def __init__(
         self, project=None, entity=None, step=None, task=None, workfile=None, user=None
     ):
-        kt = ktrack_api.get_ktrack()
-        # project
         self._validate_entity_dict(project)
-        if project:
-            self._project = kt.find_one("project", project["id"])
-        else:
-            self._project = None
-
-        # entity
         self._validate_entity_dict(entity)
-        if entity:
-            self._entity = kt.find_one(entity["type"], entity["id"])
-        else:
-            self._entity = None
-
-        # step
         self._validate_step(step)
+        self._validate_entity_dict(task)
+        self._validate_entity_dict(workfile)
+        self._validate_entity_dict(user)
+
         self._step = step
 
-        # task
-        self._validate_entity_dict(task)
-        if task:
-            self._task = kt.find_one("task", task["id"])
+        links = _context_links(project, entity, task, workfile, user)
+
+        # resolve all links with a single batched call
+        if any(links):
+            kt = ktrack_api.get_ktrack()
+            (
+                self._project,
+                self._entity,
+                self._task,
+                self._workfile,
+                self._user,
+            ) = kt.find_links(links)
         else:
-            self._task = None
+            self._project = (
+                self._entity
+            ) = self._task = self._workfile = self._user = None
 
-        # workfile
-        self._validate_entity_dict(workfile)
-        if workfile:
-            self._workfile = kt.find_one("workfile", workfile["id"])
-        else:
-            self._workfile = None
+        self._init_key()
 
-        # user
-        self._validate_entity_dict(user)
-        if user:
-            self._user = kt.find_one("user", user["id"])
-        else:
-            self._user = None
+    def _query_tokens(self):
+        # type: () -> dict
+        # all entities are already queried
+        return _tokens_from_entities(
+            self.project, self.entity, self.step, self.task, self.workfile, self.user
+        )
@@ -4,41 +4,44 @@ import attr
 
 KtrackId = str
 
+# All entities are slotted, so they have no __dict__ and need a lot less memory when many of them are loaded. Value
+# objects are frozen too, entities are not because they get their id when saved.
 
-@attr.s
+
+@attr.s(slots=True)
 class BasicEntity(object):
     id = attr.ib(type=KtrackId, default=None)
     created_at = attr.ib(type=datetime.datetime, default=None, eq=False)
     updated_at = attr.ib(type=datetime.datetime, default=None, eq=False)
 
 
-@attr.s
+@attr.s(slots=True)
 class Thumbnail(BasicEntity):
     path = attr.ib(type=str, default=None)
 
 
-@attr.s
+@attr.s(slots=True)
 class NonProjectEntity(BasicEntity):
     thumbnail = attr.ib(type=Thumbnail, default=None, eq=False)
 
 
-@attr.s
+@attr.s(slots=True)
 class Project(NonProjectEntity):
     name = attr.ib(type=str, default=None)
 
 
-@attr.s
+@attr.s(slots=True)
 class ProjectEntity(NonProjectEntity):
     project = attr.ib(type=KtrackId, default=None)
 
 
-@attr.s
+@attr.s(slots=True)
 class Asset(ProjectEntity):
     name = attr.ib(type=str, default=None)
     asset_type = attr.ib(type=str, default=None)
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class CutInformation(object):
     cut_in = attr.ib(type=int)
     cut_out = attr.ib(type=int)
@@ -54,23 +57,24 @@ class CutInformation(object):
         return (self.cut_out - self.cut_in) + 1
 
 
-@attr.s
+@attr.s(slots=True)
 class Shot(ProjectEntity):
     code = attr.ib(type=str, default=None)
     cut_information = attr.ib(type=CutInformation, default=None)
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class EntityLink(object):
     type = attr.ib(type=str, converter=lambda x: x.lower())
     id = attr.ib(type=KtrackId)
 
 
-@attr.s
+@attr.s(slots=True)
 class Task(ProjectEntity):
     name = attr.ib(type=str, default=None)
     step = attr.ib(type=str, default=None)
     entity = attr.ib(type=EntityLink, default=None)
+    assigned = attr.ib(type=EntityLink, default=None)
 
 
 def _parse_version_number(version_identifier):
@@ -86,7 +90,7 @@ def _parse_version_number(version_identifier):
     return int(version_identifier)
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class VersionNumber(object):
     number = attr.ib(type=int, converter=_parse_version_number)
 
@@ -106,7 +110,7 @@ class VersionNumber(object):
         return "v" + "{}".format(self.number).zfill(3)
 
 
-@attr.s
+@attr.s(slots=True)
 class Workfile(ProjectEntity):
     name = attr.ib(type=str, default=None)
     entity = attr.ib(type=EntityLink, default=None)
@@ -116,7 +120,8 @@ class Workfile(ProjectEntity):
     created_from = attr.ib(type=KtrackId, default=None)
 
 
+@attr.s(slots=True)
 class User(NonProjectEntity):
-    name = attr.ib(type=str)
-    first_name = attr.ib(type=str)
-    second_name = attr.ib(type=str)
+    name = attr.ib(type=str, default=None)
+    first_name = attr.ib(type=str, default=None)
+    second_name = attr.ib(type=str, default=None)
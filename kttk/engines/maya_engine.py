@@ -6,6 +6,7 @@ import pymel.core as pm
 import maya.cmds as cmds
 
 KTTK_CONTEXT = "kttk_context"
+KTTK_CONTEXT_TOKENS = "kttk_context_tokens"
 
 
 class MayaEngine(AbstractEngine):
@@ -129,9 +130,14 @@ class MayaEngine(AbstractEngine):
 
     def serialize_context_to_file(self):
         pm.fileInfo[KTTK_CONTEXT] = self.context.serialize()
+        # store tokens too, so reopening the file needs no database access to format paths
+        pm.fileInfo[KTTK_CONTEXT_TOKENS] = self.context.token_snapshot()
 
     def deserialize_context_from_file(self):
-        return Context.deserialize(pm.fileInfo[KTTK_CONTEXT])
+        context = Context.deserialize(pm.fileInfo[KTTK_CONTEXT])
+        if KTTK_CONTEXT_TOKENS in pm.fileInfo:
+            context.restore_token_snapshot(pm.fileInfo[KTTK_CONTEXT_TOKENS])
+        return context
 
     @staticmethod
     def __get_vray_settings():
@@ -1,7 +1,9 @@
 import os
 
 import ktrack_api
-from kttk import template_manager
+from kttk import template_manager, utils
+from kttk.context import Context
+from kttk.file_manager import version_index
 
 
 class FileCreationHelper(object):
@@ -51,7 +53,9 @@ class FileCreationHelper(object):
         """
         kt = ktrack_api.get_ktrack()
         # get all workfiles for task
-        workfiles = kt.find("workfile", [["entity", "is", context.task]])
+        workfiles = kt.find(
+            "workfile", [["entity", "is", utils.entity_id_dict(context.task)]]
+        )
 
         # no tasks exist, so return None
         if len(workfiles) == 0:
@@ -74,24 +78,9 @@ class FileCreationHelper(object):
         :param context:
         :return: the new workfile
         """
-        # initial version number is 1
-        version_number = (
-            workfile["version_number"] + 1 if workfile["version_number"] else 1
-        )
-
-        # get template for file name
-        workfile_file_name_template = template_manager.get_route_template(
-            "workfile_file_name"
-        )
         tokens = context.get_avaible_tokens()
         tokens["dcc_extension"] = self._engine.file_extension
         tokens["dcc_name"] = self._engine.name
-        tokens["version"] = version_number
-
-        # format template for file name
-        workfile_file_name = template_manager.format_template(
-            workfile_file_name_template, tokens
-        )
 
         # get and format template for workfile folder
         workfile_location_template = template_manager.get_route_template(
@@ -103,12 +92,20 @@ class FileCreationHelper(object):
             workfile_location_template, tokens
         )
 
+        version_number = self._get_next_version_number(
+            context, workfile, workfile_location, tokens
+        )
+
+        # format template for file name
+        tokens["version"] = version_number
+        workfile_file_name = self._format_workfile_file_name(tokens)
+
         # combine location and name to workfile path
         path = os.path.join(workfile_location, workfile_file_name)
 
         workfile_data = {}
-        workfile_data["project"] = context.project
-        workfile_data["entity"] = context.task
+        workfile_data["project"] = utils.entity_id_dict(context.project)
+        workfile_data["entity"] = utils.entity_id_dict(context.task)
         workfile_data["version_number"] = version_number
         workfile_data["comment"] = comment
 
@@ -127,6 +124,42 @@ class FileCreationHelper(object):
         # return newly created workfile
         return new_workfile
 
+    def _get_next_version_number(self, context, workfile, workfile_location, tokens):
+        # type: (Context, dict, str, dict) -> int
+        """
+        Allocates the version number for a new workfile based on given workfile. The version number is also higher than
+        the highest version on disk, so files on disk without database entry, for example after a crash, are never
+        overwritten. The version is allocated atomically in database, so concurrent saves for the same task never get
+        the same version
+        :param context: context of the new workfile
+        :param workfile: workfile to create the new workfile from, usually the one with the highest version in database
+        :param workfile_location: folder the new workfile will be saved in
+        :param tokens: tokens to format the workfile file name with
+        :return: the new version number
+        """
+        # initial version number is 1
+        version_number = (
+            workfile["version_number"] + 1 if workfile["version_number"] else 1
+        )
+
+        tokens = dict(tokens)
+        tokens["version"] = version_number
+        highest_version_on_disk = version_index.get_disk_version_index().highest_version(
+            workfile_location, self._format_workfile_file_name(tokens)
+        )
+
+        kt = ktrack_api.get_ktrack()
+        return kt.allocate_version(
+            context.task, max(version_number, highest_version_on_disk + 1)
+        )
+
+    def _format_workfile_file_name(self, tokens):
+        # type: (dict) -> str
+        workfile_file_name_template = template_manager.get_route_template(
+            "workfile_file_name"
+        )
+        return template_manager.format_template(workfile_file_name_template, tokens)
+
     def _get_template_file_path(self):
         """
         Returns formatted template file based on context
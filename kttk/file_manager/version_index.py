@@ -0,0 +1,109 @@
+"""
+Index of the workfile versions existing on disk.
+Scene files can exist on disk without a workfile in the database, for example after a crash or when files are copied
+by hand. To not overwrite them, new version numbers also take the versions on disk into account.
+A folder is listed once with os.scandir, every file name is parsed with the workfile_file_name route and the highest
+version is stored per file name without version and extension. The result is cached together with the modification
+time of the folder, so the folder is only listed again when files were added, removed or renamed.
+"""
+import os
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+from typing import Dict, Optional, Tuple
+
+from kttk import template_manager, utils
+from kttk.naming_system import route_compiler
+from kttk.naming_system.route_compiler import CompiledRoute
+
+WORKFILE_FILE_NAME_ROUTE = "workfile_file_name"
+
+
+class DiskVersionIndex(object):
+    def __init__(self, max_folders=256):
+        # type: (int) -> None
+        """
+        :param max_folders: number of folders to keep in cache
+        """
+        self._folders = utils.LRUCache(max_folders)
+        self._route = None  # type: Optional[CompiledRoute]
+
+    def highest_version(self, folder, file_name):
+        # type: (str, str) -> int
+        """
+        Returns the highest version on disk of the workfile with given file name
+        :param folder: folder containing the workfiles, for example the dcc_scenes_location of an entity
+        :param file_name: file name of any version of the workfile, for example shot010_anim_anim_v001.mb
+        :return: highest version number of the workfile in folder, 0 if there is none or folder does not exist
+        """
+        parsed = self._parse(file_name)
+        if parsed is None:
+            return 0
+        return self._versions_in_folder(folder).get(parsed[0], 0)
+
+    def invalidate(self, folder):
+        # type: (str) -> None
+        """
+        Removes a folder from cache, so it is listed again on next access
+        """
+        self._folders.pop(folder)
+
+    def _parse(self, file_name):
+        # type: (str) -> Optional[Tuple[str, int]]
+        """
+        Parses a workfile file name into the file name without version and extension and the version number
+        :return: (name without version and extension, version number) or None if file name is no workfile file name
+        """
+        match = self._get_route().compiled_regex.match(file_name)
+        if not match:
+            return None
+        key = (
+            file_name[: match.start("version")]
+            + file_name[match.end("version") : match.start("dcc_extension")]
+        )
+        return key, int(match.group("version")[1:])
+
+    def _versions_in_folder(self, folder):
+        # type: (str) -> Dict[str, int]
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return {}
+
+        cached = self._folders.get(folder)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        versions = {}
+        try:
+            file_names = [entry.name for entry in scandir(folder) if entry.is_file()]
+        except OSError:
+            return {}
+
+        for file_name in file_names:
+            parsed = self._parse(file_name)
+            if parsed:
+                key, version = parsed
+                versions[key] = max(version, versions.get(key, 0))
+
+        self._folders.put(folder, (mtime, versions))
+        return versions
+
+    def _get_route(self):
+        # type: () -> CompiledRoute
+        if self._route is None:
+            self._route = route_compiler.compile_route(
+                WORKFILE_FILE_NAME_ROUTE, template_manager.get_all_route_templates()
+            )
+        return self._route
+
+
+_disk_version_index = DiskVersionIndex()
+
+
+def get_disk_version_index():
+    # type: () -> DiskVersionIndex
+    return _disk_version_index
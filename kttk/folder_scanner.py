@@ -0,0 +1,224 @@
+"""
+Rebuilds the path cache from disk.
+When path entries are lost or out of sync with the folders on disk, the scanner walks a folder tree, parses every
+folder with the folder templates of projects, assets and shots and registers the folders which are not registered yet.
+Directories are listed in parallel with os.scandir, entities are resolved with one query per entity type and all new
+paths are registered with a single bulk insert.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+import attr
+from typing import Dict, List, Optional, Tuple
+
+import ktrack_api
+from kttk import logger, path_cache_manager, template_manager
+from kttk.context import Context
+from kttk.naming_system.route_compiler import RouteParser
+
+ENTITY_TYPES = ["project", "asset", "shot"]
+
+
+@attr.s
+class ScanResult(object):
+    directories = attr.ib(default=0)  # type: int
+    seconds = attr.ib(default=0.0)  # type: float
+    registered = attr.ib(default=attr.Factory(list))  # type: List[str]
+    already_registered = attr.ib(default=attr.Factory(list))  # type: List[str]
+    # (path, reason) for folders matching a folder template, but without matching entity in database
+    mismatches = attr.ib(default=attr.Factory(list))  # type: List[Tuple[str, str]]
+    # folders not matching any folder template
+    unmatched = attr.ib(default=attr.Factory(list))  # type: List[str]
+
+    @property
+    def directories_per_second(self):
+        # type: () -> float
+        return self.directories / self.seconds if self.seconds else 0.0
+
+
+def walk_directories(root, max_workers=8):
+    # type: (str, int) -> List[str]
+    """
+    Returns root and all directories below root. Directories of the same depth are listed in parallel, on network
+    shares most time is spent waiting for the file server, so this is a lot faster than os.walk
+    :param root: directory to start at
+    :param max_workers: number of directories listed at the same time
+    :return: all directories, root first
+    """
+    directories = []
+    with ThreadPoolExecutor(max_workers) as executor:
+        level = [root]
+        while level:
+            directories.extend(level)
+            next_level = []
+            for sub_directories in executor.map(_list_sub_directories, level):
+                next_level.extend(sub_directories)
+            level = next_level
+    return directories
+
+
+def _list_sub_directories(directory):
+    # type: (str) -> List[str]
+    try:
+        return [
+            entry.path
+            for entry in scandir(directory)
+            if entry.is_dir(follow_symlinks=False)
+        ]
+    except OSError as e:
+        logger.warning("Can not list directory {}: {}".format(directory, e))
+        return []
+
+
+def _folder_route_parser():
+    # type: () -> Tuple[RouteParser, Dict[str, str]]
+    """
+    Creates a parser for all folder templates of the entity types and their entity folder routes
+    :return: the parser and the entity type by route name
+    """
+    routes = template_manager.get_all_route_templates()
+    entity_type_by_route = {}
+
+    for entity_type in ENTITY_TYPES:
+        templates = template_manager.get_folder_templates(entity_type)
+        templates.append(
+            template_manager.get_route_template("{}_folder".format(entity_type))
+        )
+
+        # folder templates can appear more than once, for example for folders containing files
+        for template in sorted(set(templates)):
+            route_name = "{}_folder_template_{}".format(
+                entity_type, len(entity_type_by_route)
+            )
+            routes[route_name] = template
+            entity_type_by_route[route_name] = entity_type
+
+    return (
+        RouteParser(routes, route_names=list(entity_type_by_route.keys())),
+        entity_type_by_route,
+    )
+
+
+class _EntityResolver(object):
+    """
+    Resolves the parsed fields of many folders to projects and entities with one query per entity type
+    """
+
+    def __init__(self, parsed_folders):
+        # type: (List[Tuple[str, str, Dict[str, str]]]) -> None
+        kt = ktrack_api.get_ktrack()
+
+        project_names = {fields["project_name"] for _, _, fields in parsed_folders}
+        self._projects_by_name = {}
+        for project in kt.find("project", [["name", "in", list(project_names)]]):
+            self._projects_by_name.setdefault(project["name"], []).append(project)
+
+        self._entities_by_key = {}
+        for entity_type in ENTITY_TYPES[1:]:
+            codes = {
+                fields["code"]
+                for _, folder_entity_type, fields in parsed_folders
+                if folder_entity_type == entity_type
+            }
+            if not codes:
+                continue
+            for entity in kt.find(entity_type, [["code", "in", list(codes)]]):
+                key = (entity_type, entity["project"]["id"], entity["code"])
+                self._entities_by_key[key] = entity
+
+    def context(self, entity_type, fields):
+        # type: (str, Dict[str, str]) -> Tuple[Optional[Context], str]
+        """
+        :return: (context, "") if project and entity exist, (None, reason) otherwise
+        """
+        project = self._project(fields)
+        if not project:
+            return None, "project {} not found".format(fields["project_name"])
+
+        if entity_type == "project":
+            return Context(project=project), ""
+
+        entity = self._entities_by_key.get((entity_type, project["id"], fields["code"]))
+        if not entity:
+            return (
+                None,
+                "{} {} not found in project {}".format(
+                    entity_type, fields["code"], project["name"]
+                ),
+            )
+
+        asset_type = fields.get("asset_type")
+        if asset_type and entity.get("asset_type") != asset_type:
+            return (
+                None,
+                "asset {} has asset type {}, not {}".format(
+                    entity["code"], entity.get("asset_type"), asset_type
+                ),
+            )
+
+        return Context(project=project, entity=entity), ""
+
+    def _project(self, fields):
+        # type: (Dict[str, str]) -> Optional[dict]
+        for project in self._projects_by_name.get(fields["project_name"], []):
+            year = fields.get("project_year")
+            if year is None or str(project["created_at"].year) == year:
+                return project
+
+
+def scan(root, max_workers=8, dry_run=False):
+    # type: (str, int, bool) -> ScanResult
+    """
+    Scans all folders below root and registers the folders matching a folder template, which are not registered yet
+    :param root: folder to scan, for example a project folder
+    :param max_workers: number of directories listed at the same time
+    :param dry_run: if True, nothing is registered, the result only reports what would be registered
+    :return: result of the scan
+    """
+    start = time.time()
+    result = ScanResult()
+
+    directories = walk_directories(root, max_workers)
+    result.directories = len(directories)
+
+    # parse folders
+    parser, entity_type_by_route = _folder_route_parser()
+    parsed_folders = []
+    for directory in directories:
+        path = path_cache_manager.normalize_path(directory)
+        parsed = parser.parse_path(path)
+        if parsed:
+            route_name, fields = parsed
+            parsed_folders.append((path, entity_type_by_route[route_name], fields))
+        else:
+            result.unmatched.append(path)
+
+    # resolve entities
+    resolver = _EntityResolver(parsed_folders)
+    registered_paths = path_cache_manager.registered_paths(
+        [path for path, _, _ in parsed_folders]
+    )
+    paths_to_register = []
+    for path, entity_type, fields in parsed_folders:
+        context, reason = resolver.context(entity_type, fields)
+        if not context:
+            result.mismatches.append((path, reason))
+            continue
+
+        if path in registered_paths:
+            result.already_registered.append(path)
+        else:
+            paths_to_register.append((path, context))
+
+    # register all new paths at once
+    if paths_to_register and not dry_run:
+        path_cache_manager.register_paths(paths_to_register)
+    result.registered = [path for path, _ in paths_to_register]
+
+    result.seconds = time.time() - start
+    return result
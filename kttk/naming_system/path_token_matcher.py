@@ -3,8 +3,11 @@ import re
 import attr
 from typing import List, Optional, Dict
 
+from kttk import utils
 from kttk.naming_system.templates import PathToken
 
+_FOLDER_SPLIT_REGEX = re.compile("(/)")
+
 
 @attr.s
 class MatcherToken(object):
@@ -29,47 +32,84 @@ class MatcherToken(object):
         if self.value and string.startswith(self.value):
             return self.value
 
-        match = re.match(self.token.regex, string)
+        match = self.token.compiled_regex.match(string)
         if match:
             return match.group()
 
 
 class PathTokenSequenceMatcher(object):
+    """
+    Matches paths against a sequence of tokens. A matcher can be reused for many paths, either construct it with a path
+    and call matches() or construct it without a path and call match(path) for every path. Results of match are cached,
+    so matching the same path again is cheap. A matcher is not thread safe.
+    """
+
     _token_values_by_name = None  # type: Dict[str, str]
     _tokens = None  # type: List[MatcherToken]
     _strings = None  # type: List[str]
     _current_element = None  # type: str
 
-    def __init__(self, tokens, string):
-        # type: (List[PathToken], str) -> None
-        self._tokens = list(map(lambda x: MatcherToken(token=x), tokens))
-        self._strings = re.split("(/)", string)
-        self._current_element = ""
-        self._token_values_by_name = {}
+    def __init__(self, tokens, string=None, cache_size=1024):
+        # type: (List[PathToken], Optional[str], int) -> None
+        self._tokens = [MatcherToken(token=token) for token in tokens]
+        self._exact_match_required_by_index = [
+            self._exact_match_required(index) for index in range(len(self._tokens))
+        ]
+        self._string = string
+        self._cache = utils.LRUCache(cache_size)
 
     def matches(self):
         # type: () -> Optional[Dict[str, str]]
-        for index, token in enumerate(self._tokens):
+        """
+        Matches the path given in constructor
+        :return: token values by token name if path matches, None otherwise
+        """
+        return self.match(self._string)
+
+    def match(self, string):
+        # type: (str) -> Optional[Dict[str, str]]
+        """
+        Matches given path
+        :return: token values by token name if path matches, None otherwise
+        """
+        token_values = self._cache.get(string)
+        if token_values is None:
+            token_values = self._do_match(string)
+            # cache misses too, False marks a path which does not match
+            self._cache.put(string, token_values if token_values is not None else False)
+        return dict(token_values) if token_values else None
+
+    def _do_match(self, string):
+        # type: (str) -> Optional[Dict[str, str]]
+        # reversed, so the next element can be popped from the end
+        self._strings = _FOLDER_SPLIT_REGEX.split(string)[::-1]
+        self._current_element = ""
+        self._token_values_by_name = {}
+
+        for token, exact_match_required in zip(
+            self._tokens, self._exact_match_required_by_index
+        ):
             self._fetch_next_element()
             if not self._current_element:
                 return None
 
             self._get_token_value_if_known(token)
 
-            if token.matches(self._current_element):
-                if self._exact_match_required(index) and not token.matches_exactly(
-                    self._current_element
-                ):
-                    return None
-                self._current_element = token.save_value_and_trim(self._current_element)
-                self._token_values_by_name[token.token.name] = token.value
-            else:
+            # match only once, instead of using matches, matches_exactly and save_value_and_trim
+            value = token._do_match(self._current_element)
+            if value is None:
                 return None
+            if exact_match_required and value != self._current_element:
+                return None
+
+            token.value = value
+            self._current_element = self._current_element[len(value) :]
+            self._token_values_by_name[token.token.name] = value
         return self._token_values_by_name
 
     def _fetch_next_element(self):
         if not self._current_element and self._strings:
-            self._current_element = self._strings.pop(0)
+            self._current_element = self._strings.pop()
 
     def _exact_match_required(self, index):
         is_last_element = index == len(self._tokens) - 1
@@ -0,0 +1,282 @@
+"""
+Compiles route templates from routes.yml into regular expressions, so paths can be parsed back into the values of
+their tokens, for example "M:/Projekte/2018/Finding_Dory/Shots/shot010" is parsed into the route shot_folder with
+project_year 2018, project_name Finding_Dory and code shot010. This way the context of a path can be derived without
+a database query.
+
+Nested routes like {project_root} are expanded before compiling. Every token becomes a named group, a token used
+more than once becomes a backreference to its first occurrence, so "{code}/{code}_Maya" only matches if both codes
+are the same. Tokens match a single folder or file name part, known tokens like project_year or version use their own
+regex.
+All routes are combined into one alternation, so a path is tested against all routes with a single regex match.
+Too many routes for one regex are looked up with a RouteTrie instead, which only tests the routes matching the folder
+segments of the path.
+When several routes match a path, the route with the most literal characters wins, for equally specific routes the
+one defined first in routes.yml.
+"""
+import re
+
+import attr
+from typing import Dict, List, Optional, Tuple
+
+from kttk import template_manager
+from kttk.naming_system.templates import PathTemplate, PathToken
+
+TOKEN_REGEX = re.compile(r"\{([^{}]+)\}")
+
+# Python 2 only supports 100 groups per regex, so routes are combined into chunks staying below that
+_MAX_GROUPS_PER_REGEX = 99
+
+DEFAULT_TOKEN_REGEX = r"[^/]+?"
+
+KNOWN_TOKENS = {
+    token.name: token
+    for token in [
+        PathToken("project_year", "STRING", r"\d{4}"),
+        PathToken("version", "STRING", r"v\d{3}"),
+        PathToken("dcc_extension", "STRING", r"\.\w+"),
+    ]
+}
+
+
+def get_token(token_name):
+    # type: (str) -> PathToken
+    """
+    Returns the PathToken for a token name used in routes, unknown tokens match a part of a single folder or file name
+    """
+    token = KNOWN_TOKENS.get(token_name)
+    if token is None:
+        token = PathToken(token_name, "STRING", DEFAULT_TOKEN_REGEX)
+    return token
+
+
+def expand_route(route_name, routes):
+    # type: (str, Dict[str, str]) -> str
+    """
+    Replaces all tokens referencing other routes with the expanded template of these routes
+    :param route_name: name of the route to expand
+    :param routes: all route templates by name, usually from routes.yml
+    :return: template containing only tokens which are no routes
+    """
+
+    def expand(name, visited):
+        if name in visited:
+            raise ValueError(
+                "Route {} references itself: {}".format(
+                    route_name, " -> ".join(visited + [name])
+                )
+            )
+
+        def replace(match):
+            token_name = match.group(1)
+            if token_name in routes:
+                return expand(token_name, visited + [name])
+            return match.group(0)
+
+        return TOKEN_REGEX.sub(replace, routes[name])
+
+    return expand(route_name, [])
+
+
+def normalize_path(path):
+    # type: (str) -> str
+    return path.replace("\\", "/")
+
+
+@attr.s(frozen=True)
+class CompiledRoute(object):
+    template = attr.ib()  # type: PathTemplate
+    regex = attr.ib(repr=False)  # type: str
+    token_names = attr.ib()  # type: List[str]
+    literal_length = attr.ib()  # type: int
+    compiled_regex = attr.ib(
+        init=False,
+        eq=False,
+        repr=False,
+        default=attr.Factory(
+            lambda self: re.compile(self.regex + r"\Z"), takes_self=True
+        ),
+    )
+
+    @property
+    def name(self):
+        # type: () -> str
+        return self.template.name
+
+    def parse(self, path):
+        # type: (str) -> Optional[Dict[str, str]]
+        """
+        Parses given path
+        :return: values of all tokens by token name if path matches this route, None otherwise
+        """
+        match = self.compiled_regex.match(normalize_path(path))
+        if match:
+            return match.groupdict()
+
+
+def compile_route(route_name, routes, group_prefix=""):
+    # type: (str, Dict[str, str], str) -> CompiledRoute
+    """
+    Compiles a route into a regex with a named group for every token.
+    :param route_name: name of the route to compile
+    :param routes: all route templates by name, needed to expand nested routes
+    :param group_prefix: prefix for all group names, used to combine several routes into one regex
+    :return: compiled route
+    """
+    expanded_template = expand_route(route_name, routes)
+
+    regex_parts = []
+    token_names = []
+    literal_length = 0
+    position = 0
+    for match in TOKEN_REGEX.finditer(expanded_template):
+        literal = expanded_template[position : match.start()]
+        regex_parts.append(re.escape(literal))
+        literal_length += len(literal)
+
+        token_name = match.group(1)
+        group_name = group_prefix + token_name
+        if token_name in token_names:
+            regex_parts.append("(?P={})".format(group_name))
+        else:
+            token_names.append(token_name)
+            regex_parts.append(
+                "(?P<{}>{})".format(group_name, get_token(token_name).regex)
+            )
+        position = match.end()
+
+    literal = expanded_template[position:]
+    regex_parts.append(re.escape(literal))
+    literal_length += len(literal)
+
+    return CompiledRoute(
+        template=PathTemplate(route_name, routes[route_name], expanded_template),
+        regex="".join(regex_parts),
+        token_names=token_names,
+        literal_length=literal_length,
+    )
+
+
+class RouteParser(object):
+    """
+    Parses paths using all given routes at once
+    """
+
+    def __init__(self, routes, route_names=None):
+        # type: (Dict[str, str], Optional[List[str]]) -> None
+        """
+        :param routes: route templates by name, usually from routes.yml. Empty routes are ignored
+        :param route_names: if given, only these routes are parsed, all routes are still used to expand nested routes
+        """
+        if route_names is None:
+            route_names = list(routes.keys())
+
+        compiled_routes = [
+            compile_route(name, routes) for name in route_names if routes[name]
+        ]
+
+        # most specific routes first, because the first matching alternative wins
+        self.routes = sorted(
+            compiled_routes, key=lambda route: -route.literal_length
+        )  # type: List[CompiledRoute]
+        self._combined_regexes = self._combine(
+            routes, [route.name for route in self.routes]
+        )
+
+        # one combined regex is the fastest lookup, testing several of them one after the other is slower than the trie
+        self._trie = None
+        if len(self._combined_regexes) > 1:
+            # imported here, route_trie imports route_compiler
+            from kttk.naming_system.route_trie import RouteTrie
+
+            self._trie = RouteTrie(routes, route_names)
+
+    @staticmethod
+    def _combine(routes, route_names):
+        # type: (Dict[str, str], List[str]) -> List[Tuple[re.Pattern, Dict[str, Tuple[str, Dict[str, str]]]]]
+        """
+        Combines the routes into alternations of the form (?P<r0>...)|(?P<r1>...), group names of the tokens are
+        mangled with the group name of the route, so every group name is unique
+        """
+        combined_regexes = []
+        alternatives = []
+        group_count = 0
+        routes_by_group = {}
+
+        def flush():
+            if alternatives:
+                combined_regexes.append(
+                    (
+                        re.compile("(?:{})\\Z".format("|".join(alternatives))),
+                        dict(routes_by_group),
+                    )
+                )
+                del alternatives[:]
+                routes_by_group.clear()
+
+        for index, route_name in enumerate(route_names):
+            route_group = "r{}".format(index)
+            route = compile_route(route_name, routes, group_prefix=route_group + "__")
+
+            if group_count + len(route.token_names) + 1 > _MAX_GROUPS_PER_REGEX:
+                flush()
+                group_count = 0
+
+            alternatives.append("(?P<{}>{})".format(route_group, route.regex))
+            group_count += len(route.token_names) + 1
+            routes_by_group[route_group] = (
+                route_name,
+                {name: route_group + "__" + name for name in route.token_names},
+            )
+        flush()
+
+        return combined_regexes
+
+    def parse_path(self, path):
+        # type: (str) -> Optional[Tuple[str, Dict[str, str]]]
+        """
+        Finds the route matching given path and parses the values of its tokens
+        :param path: path to parse
+        :return: (route_name, token values by token name) or None if no route matches
+        """
+        if self._trie is not None:
+            return self._trie.parse_path(path)
+
+        path = normalize_path(path)
+        for combined_regex, routes_by_group in self._combined_regexes:
+            match = combined_regex.match(path)
+            if match:
+                # the group of the route is closed last, so it is the last group matched
+                route_name, group_names = routes_by_group[match.lastgroup]
+                return (
+                    route_name,
+                    {
+                        token_name: match.group(group_name)
+                        for token_name, group_name in group_names.items()
+                    },
+                )
+        return None
+
+
+_route_parser = None  # type: Optional[RouteParser]
+
+
+def get_route_parser():
+    # type: () -> RouteParser
+    """
+    Returns a RouteParser for all routes in routes.yml, the parser is only compiled once
+    """
+    global _route_parser
+    if _route_parser is None:
+        _route_parser = RouteParser(template_manager.get_all_route_templates())
+    return _route_parser
+
+
+def parse_path(path):
+    # type: (str) -> Optional[Tuple[str, Dict[str, str]]]
+    """
+    Parses given path using all routes from routes.yml
+    :param path: path to parse, for example "M:/Projekte/2018/Finding_Dory/Shots/shot010"
+    :return: (route_name, token values by token name) or None if path does not match any route
+    """
+    return get_route_parser().parse_path(path)
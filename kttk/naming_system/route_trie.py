@@ -0,0 +1,112 @@
+"""
+Segment trie over compiled routes, finds the routes a path can belong to without testing every route.
+Every route template is split into its folder segments. Segments without tokens are literal edges of the trie,
+segments with tokens are wildcard edges, which match any path segment matching the regex of their tokens.
+Looking up a path only follows the edges matching its segments, so the cost depends on the depth of the path and not
+on the number of routes. The candidates are verified with the full regex of the route afterwards, because
+backreferences of repeated tokens can not be checked segment by segment.
+RouteParser uses a RouteTrie when there are too many routes to combine them into one regex.
+"""
+import re
+
+from typing import Dict, List, Optional, Tuple
+
+from kttk.naming_system import route_compiler
+from kttk.naming_system.route_compiler import CompiledRoute
+
+
+def _segment_regex(segment):
+    # type: (str) -> re.Pattern
+    regex_parts = []
+    position = 0
+    for match in route_compiler.TOKEN_REGEX.finditer(segment):
+        regex_parts.append(re.escape(segment[position : match.start()]))
+        regex_parts.append(
+            "(?:{})".format(route_compiler.get_token(match.group(1)).regex)
+        )
+        position = match.end()
+    regex_parts.append(re.escape(segment[position:]))
+    return re.compile("".join(regex_parts) + r"\Z")
+
+
+class _TrieNode(object):
+    __slots__ = ("literal_children", "wildcard_children", "routes")
+
+    def __init__(self):
+        self.literal_children = {}  # type: Dict[str, _TrieNode]
+        self.wildcard_children = []  # type: List[Tuple[str, re.Pattern, _TrieNode]]
+        self.routes = []  # type: List[Tuple[int, CompiledRoute]]
+
+    def child(self, segment):
+        # type: (str) -> _TrieNode
+        if not route_compiler.TOKEN_REGEX.search(segment):
+            return self.literal_children.setdefault(segment, _TrieNode())
+
+        # same wildcard segments share their node
+        for wildcard_segment, _, node in self.wildcard_children:
+            if wildcard_segment == segment:
+                return node
+
+        node = _TrieNode()
+        self.wildcard_children.append((segment, _segment_regex(segment), node))
+        return node
+
+
+class RouteTrie(object):
+    def __init__(self, routes, route_names=None):
+        # type: (Dict[str, str], Optional[List[str]]) -> None
+        """
+        :param routes: route templates by name, usually from routes.yml. Empty routes are ignored
+        :param route_names: if given, only these routes are parsed, all routes are still used to expand nested routes
+        """
+        if route_names is None:
+            route_names = list(routes.keys())
+
+        compiled_routes = [
+            route_compiler.compile_route(name, routes)
+            for name in route_names
+            if routes[name]
+        ]
+        # same priority as RouteParser: most specific routes first
+        compiled_routes.sort(key=lambda route: -route.literal_length)
+
+        self._root = _TrieNode()
+        for priority, route in enumerate(compiled_routes):
+            node = self._root
+            for segment in route.template.expanded_template.split("/"):
+                node = node.child(segment)
+            node.routes.append((priority, route))
+
+    def candidates(self, path):
+        # type: (str) -> List[CompiledRoute]
+        """
+        Returns all routes the segments of given path match, most specific route first
+        """
+        nodes = [self._root]
+        for segment in route_compiler.normalize_path(path).split("/"):
+            next_nodes = []
+            for node in nodes:
+                literal_child = node.literal_children.get(segment)
+                if literal_child is not None:
+                    next_nodes.append(literal_child)
+                for _, regex, child in node.wildcard_children:
+                    if regex.match(segment):
+                        next_nodes.append(child)
+            if not next_nodes:
+                return []
+            nodes = next_nodes
+
+        routes = [route for node in nodes for route in node.routes]
+        return [route for _, route in sorted(routes, key=lambda item: item[0])]
+
+    def parse_path(self, path):
+        # type: (str) -> Optional[Tuple[str, Dict[str, str]]]
+        """
+        Finds the route matching given path and parses the values of its tokens
+        :return: (route_name, token values by token name) or None if no route matches
+        """
+        for route in self.candidates(path):
+            fields = route.parse(path)
+            if fields is not None:
+                return route.name, fields
+        return None
@@ -1,3 +1,5 @@
+import re
+
 import attr
 
 
@@ -6,6 +8,13 @@ class PathToken(object):
     name = attr.ib()  # type: str
     type = attr.ib()  # type: str
     regex = attr.ib()  # type: str
+    # compiled once per token, matching is done for every element of every path
+    compiled_regex = attr.ib(
+        init=False,
+        eq=False,
+        repr=False,
+        default=attr.Factory(lambda self: re.compile(self.regex), takes_self=True),
+    )  # type: re.Pattern
 
 
 @attr.s(frozen=True)
@@ -2,11 +2,22 @@
 Module providing path <-> Context functionality.
 Sometimes we need to get the context from a path, for example the project from the current working directory.
 For this, every folder created and deleted needs to be registered/unregistered in the database.
-We store the path in the database together with the given context and can get the original context back with context_from_path
+We store the path in the database together with the given context and can get the original context back with context_from_path.
+The ids of project, entity and task and the step are stored as indexed fields of the path entry. Depending on
+path_entry_storage in general.yml, the compact context of Context.as_compact_dict is stored in addition.
+Entries in older formats are still read, migrate_path_entries adds the id fields to them once after upgrading.
 """
+from typing import List, Set, Tuple
+
 import ktrack_api
+from ktrack_api.ktrack import KtrackIdType
+from kttk.config import config_manager
 from kttk.context import Context
 
+PATH_ENTRY_STORAGE = "path_entry_storage"
+STORAGE_NORMALIZED = "normalized"
+STORAGE_EMBEDDED = "embedded"
+
 
 def register_path(path, context):
     # type: (str, Context) -> dict
@@ -16,6 +27,31 @@ def register_path(path, context):
     :param context: context to register
     :return: newly created path entry from database
     """
+    path_entry_data = _path_entry_data(path, context)
+
+    kt = ktrack_api.get_ktrack()
+
+    return kt.create("path_entry", path_entry_data)
+
+
+def register_paths(paths_and_contexts):
+    # type: (List[Tuple[str, Context]]) -> List[dict]
+    """
+    Registers many paths with a single bulk insert, see register_path
+    :param paths_and_contexts: (path, context) pairs to register
+    :return: newly created path entries from database
+    """
+    path_entries_data = [
+        _path_entry_data(path, context) for path, context in paths_and_contexts
+    ]
+
+    kt = ktrack_api.get_ktrack()
+
+    return kt.create_many("path_entry", path_entries_data)
+
+
+def _path_entry_data(path, context):
+    # type: (str, Context) -> dict
     # check if path is valid
     if not is_valid_path(path):
         raise ValueError(path)
@@ -23,13 +59,14 @@ def register_path(path, context):
     # make path beautifull
     path = __good_path(path)
 
-    kt = ktrack_api.get_ktrack()
-
     path_entry_data = {}
     path_entry_data["path"] = path
-    path_entry_data["context"] = context.as_dict()  # todo remove user information
+    path_entry_data.update(_indexed_fields(context))
 
-    return kt.create("path_entry", path_entry_data)
+    if get_storage_mode() == STORAGE_EMBEDDED:
+        path_entry_data["context"] = context.as_compact_dict()
+
+    return path_entry_data
 
 
 def unregister_path(path):
@@ -72,12 +109,148 @@ def context_from_path(path):
     context_found = len(context_dicts) > 0
 
     if context_found:
-        context = Context.from_dict(context_dicts[0]["context"])
-        return context
+        return _context_from_path_entry(context_dicts[0])
     else:
         return None
 
 
+def get_storage_mode():
+    # type: () -> str
+    """
+    Returns how path entries store their context, configured as path_entry_storage in general.yml. Configs without
+    path_entry_storage use STORAGE_NORMALIZED
+    :return: STORAGE_NORMALIZED or STORAGE_EMBEDDED
+    """
+    try:
+        storage_mode = config_manager.get_value(PATH_ENTRY_STORAGE)
+    except KeyError:
+        return STORAGE_NORMALIZED
+    if storage_mode not in (STORAGE_NORMALIZED, STORAGE_EMBEDDED):
+        raise config_manager.InvalidConfigException(
+            "general.yml",
+            "{} has to be {} or {}, got {}".format(
+                PATH_ENTRY_STORAGE, STORAGE_NORMALIZED, STORAGE_EMBEDDED, storage_mode
+            ),
+        )
+    return storage_mode
+
+
+def _indexed_fields(context):
+    # type: (Context) -> dict
+    project_id, entity_type, entity_id, step, task_id, _, _ = context.id_tuple()
+    return {
+        "project_id": project_id,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "task_id": task_id,
+        "step": step,
+    }
+
+
+def _context_from_path_entry(path_entry):
+    # type: (dict) -> Context
+    # embedded context in compact or legacy format
+    if path_entry.get("context"):
+        return Context.from_compact_dict(path_entry["context"])
+
+    return Context.from_id_tuple(
+        (
+            path_entry.get("project_id"),
+            path_entry.get("entity_type"),
+            path_entry.get("entity_id"),
+            path_entry.get("step"),
+            path_entry.get("task_id"),
+            None,
+            None,
+        )
+    )
+
+
+def path_entries_for_entity(entity_link):
+    # type: (dict) -> List[dict]
+    """
+    Returns all path entries registered for given entity, using the indexed id fields of the path entries.
+    For a project these are all path entries of the project, for other entities all path entries registered with the
+    entity as entity or task of the context. Path entries registered before path entries had id fields are only found
+    after running migrate_path_entries
+    :param entity_link: link to the entity, needs type and id
+    :return: registered path entries
+    """
+    entity_type = entity_link["type"]
+    entity_id = str(entity_link["id"])
+
+    if entity_type == "project":
+        filters = [["project_id", "is", entity_id]]
+    elif entity_type == "task":
+        filters = [["task_id", "is", entity_id]]
+    else:
+        filters = [["entity_type", "is", entity_type], ["entity_id", "is", entity_id]]
+
+    kt = ktrack_api.get_ktrack()
+    return kt.find("path_entry", filters)
+
+
+def migrate_path_entries():
+    # type: () -> int
+    """
+    Stores the indexed id fields of path entries registered before path entries had id fields, so they can be found
+    by path_entries_for_entity. Only has to run once for an existing database
+    :return: number of migrated path entries
+    """
+    kt = ktrack_api.get_ktrack()
+
+    # all entries with a project have a project_id, older entries only have the context
+    legacy_path_entries = [
+        path_entry
+        for path_entry in kt.find("path_entry", [["project_id", "is", None]])
+        if path_entry.get("context")
+    ]
+    for path_entry in legacy_path_entries:
+        kt.update(
+            "path_entry",
+            path_entry["id"],
+            _indexed_fields(_context_from_path_entry(path_entry)),
+        )
+    return len(legacy_path_entries)
+
+
+def paths_for_entity(entity_link):
+    # type: (dict) -> List[str]
+    """
+    Returns all paths registered for given entity, see path_entries_for_entity
+    :param entity_link: link to the entity, needs type and id
+    :return: registered paths
+    """
+    return [path_entry["path"] for path_entry in path_entries_for_entity(entity_link)]
+
+
+def paths_for_project(project_id):
+    # type: (KtrackIdType) -> List[str]
+    """
+    Returns all paths registered for the project with given id
+    """
+    return paths_for_entity({"type": "project", "id": project_id})
+
+
+def registered_paths(paths):
+    # type: (List[str]) -> Set[str]
+    """
+    Returns which of the given paths are registered, using a single query
+    :param paths: paths to check
+    :return: the normalized paths which are registered
+    """
+    kt = ktrack_api.get_ktrack()
+
+    normalized_paths = list({__good_path(path) for path in paths})
+    if not normalized_paths:
+        return set()
+
+    return {
+        path_entry["path"]
+        for path_entry in kt.find("path_entry", [["path", "in", normalized_paths]])
+    }
+
+
 def is_valid_path(path):
     """
     Checks if the path can be registered in the database.
@@ -94,6 +267,14 @@ def is_valid_path(path):
     return valid
 
 
+def normalize_path(path):
+    # type: (str) -> str
+    """
+    Returns given path the way it is stored in the database
+    """
+    return __good_path(path)
+
+
 def __good_path(path):
     # type: (str) -> str
     """
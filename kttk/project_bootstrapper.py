@@ -1,4 +1,3 @@
-import os
 import shutil
 
 from typing import Tuple, Dict
@@ -173,7 +172,6 @@ def remove_bootstrapped_project(project_id):
     )
     entities.extend(workfiles)
 
-    # walk project folder and unregister each path
     project_folder_template = template_manager.get_route_template("project_folder")
     project_root_template = template_manager.get_route_template("project_root")
     project_folder = template_manager.format_template(
@@ -185,13 +183,14 @@ def remove_bootstrapped_project(project_id):
         },
     )
 
+    # unregister all paths of the project, found by the index instead of walking the project folder
     logger.info("Unregister paths...")
 
-    for root, dirs, files in os.walk(project_folder):
-        path = root
-
-        if kttk.path_cache_manager.unregister_path(path):
-            logger.info("Unregistered path {}".format(path))
+    for path_entry in kttk.path_cache_manager.path_entries_for_entity(
+        {"type": "project", "id": project_id}
+    ):
+        kt.delete("path_entry", path_entry["id"])
+        logger.info("Unregistered path {}".format(path_entry["path"]))
 
     # delete all entities
     logger.info("Deleting entities...")
@@ -1,5 +1,13 @@
-import frozendict
-from typing import Optional, Dict
+import threading
+import weakref
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from typing import Optional, Dict, Hashable, Any
 
 
 def entity_id_dict(entity):
@@ -10,19 +18,136 @@ def entity_id_dict(entity):
 
 
 def frozen_entity_id_dict(entity):
-    # type: (dict) -> frozendict
+    # type: (dict) -> Optional[EntityLink]
+    if isinstance(entity, EntityLink):
+        return entity
     if entity != None:
-        return FrozenDict({"type": entity["type"], "id": entity["id"]})
+        return EntityLink(entity["type"], entity["id"])
     return None
 
 
-# todo WTF is this?
-class FrozenDict(dict):
-    def __init__(self, data):
-        # type: (dict) -> None
-        super(FrozenDict, self).__init__()
-        for key, value in data.items():
-            super(FrozenDict, self).__setitem__(key, value)
+class EntityLink(Mapping):
+    """
+    Immutable and hashable link to an entity, behaves like the dict {"type": entity_type, "id": entity_id}.
+    Links are interned, creating a link for the same type and id again returns the existing instance as long as
+    it is alive, so millions of contexts pointing to the same entities do not store millions of link objects.
+    Use dict(link) or entity_id_dict(link) where a real dict is needed, for example when writing to the database
+    """
+
+    __slots__ = ("_type", "_id", "_hash", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+    _intern_lock = threading.Lock()
+
+    def __new__(cls, entity_type, entity_id):
+        # type: (str, Any) -> EntityLink
+        key = (entity_type, entity_id)
+        link = cls._interned.get(key)
+        if link is None:
+            with cls._intern_lock:
+                link = cls._interned.get(key)
+                if link is None:
+                    link = super(EntityLink, cls).__new__(cls)
+                    link._type = entity_type
+                    link._id = entity_id
+                    link._hash = hash(key)
+                    cls._interned[key] = link
+        return link
+
+    def __getitem__(self, key):
+        if key == "type":
+            return self._type
+        if key == "id":
+            return self._id
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == "type":
+            return self._type
+        if key == "id":
+            return self._id
+        return default
+
+    def __iter__(self):
+        yield "type"
+        yield "id"
+
+    def __len__(self):
+        return 2
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, EntityLink):
+            return self._type == other._type and self._id == other._id
+        if isinstance(other, Mapping):
+            return (
+                len(other) == 2
+                and other.get("type") == self._type
+                and other.get("id") == self._id
+            )
+        return NotImplemented
+
+    def __ne__(self, other):
+        is_equal = self.__eq__(other)
+        if is_equal is NotImplemented:
+            return NotImplemented
+        return not is_equal
+
+    def __reduce__(self):
+        return EntityLink, (self._type, self._id)
+
+    def __repr__(self):
+        return repr({"type": self._type, "id": self._id})
+
+
+class LRUCache(object):
+    """
+    Thread safe dict-like cache holding at most max_size entries. When full, the least recently used entry is evicted
+    """
+
+    def __init__(self, max_size):
+        # type: (int) -> None
+        self._max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            # re-insert, so key is the most recently used one
+            self._data[key] = value
+            return value
+
+    def put(self, key, value):
+        # type: (Hashable, Any) -> None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
 
-    def __setitem__(self, item):
-        raise TypeError("This dict is frozen")
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,108 @@
+"""
+Runs blocking calls, for example database queries, on a QThreadPool and delivers the results back to the Qt main thread
+using signals.
+Every load is identified by a key. When a new load is started for a key, all older loads for the same key are stale:
+they are skipped if they did not start yet and their results are dropped if they are already running. This way fast
+selection changes in the UI do not pile up outdated results.
+"""
+import threading
+
+from Qt import QtCore
+
+from kttk import logger
+
+
+class _LoadSignals(QtCore.QObject):
+    finished = QtCore.Signal(str, int, object)
+    failed = QtCore.Signal(str, int, object)
+
+
+class _LoadRunnable(QtCore.QRunnable):
+    def __init__(self, loader, key, generation, func, args):
+        super(_LoadRunnable, self).__init__()
+        self._loader = loader
+        self._key = key
+        self._generation = generation
+        self._func = func
+        self._args = args
+        self._signals = loader._signals
+
+    def run(self):
+        # skip the work if a newer load for our key was started in the meantime
+        if not self._loader.is_current(self._key, self._generation):
+            return
+
+        try:
+            result = self._func(*self._args)
+        except Exception as e:
+            self._signals.failed.emit(self._key, self._generation, e)
+        else:
+            self._signals.finished.emit(self._key, self._generation, result)
+
+
+class BackgroundLoader(QtCore.QObject):
+    loaded = QtCore.Signal(str, object)
+    load_failed = QtCore.Signal(str, object)
+
+    def __init__(self, parent=None, max_thread_count=4):
+        super(BackgroundLoader, self).__init__(parent)
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max_thread_count)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        # signals are emitted from the worker threads and delivered queued in the thread of this object
+        self._signals = _LoadSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    def load(self, key, func, *args):
+        # type: (str, callable, ...) -> int
+        """
+        Calls func with args on a worker thread. The result is emitted with the loaded signal as (key, result)
+        if no newer load for key was started until then. If func raises, load_failed is emitted as (key, exception)
+        :param key: identifies the kind of data loaded, for example "workfiles"
+        :param func: callable to run on the worker thread, should not touch any widgets
+        :return: the generation of this load
+        """
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+
+        self._thread_pool.start(_LoadRunnable(self, key, generation, func, args))
+        return generation
+
+    def cancel(self, key):
+        # type: (str) -> None
+        """
+        Cancels all pending loads for given key, results of already running loads will be dropped
+        """
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def cancel_all(self):
+        # type: () -> None
+        with self._lock:
+            for key in self._generations.keys():
+                self._generations[key] += 1
+
+    def is_current(self, key, generation):
+        # type: (str, int) -> bool
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def wait_for_done(self, msecs=-1):
+        # type: (int) -> bool
+        """
+        Blocks until all running loads are done. Results are delivered once the event loop runs again
+        """
+        return self._thread_pool.waitForDone(msecs)
+
+    def _on_finished(self, key, generation, result):
+        if self.is_current(key, generation):
+            self.loaded.emit(key, result)
+
+    def _on_failed(self, key, generation, exception):
+        if self.is_current(key, generation):
+            logger.error("Loading {} failed: {}".format(key, exception))
+            self.load_failed.emit(key, exception)
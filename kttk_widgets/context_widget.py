@@ -1,6 +1,6 @@
 from Qt import QtCore, QtGui, QtWidgets
 
-from kttk.context import Context
+from kttk.context import Context, PopulatedContext
 
 NONE_TEXT = "<i>None</i>"
 
@@ -22,7 +22,10 @@ class ContextWidget(QtWidgets.QWidget):
     def context(self, context):
         old_context = self._context
         if context:
-            if isinstance(context, Context):
+            if isinstance(context, PopulatedContext):
+                # already populated, for example in the background, no need to query again
+                self._context = context
+            elif isinstance(context, Context):
                 self._context = context.populate_context()
             else:
                 raise TypeError()
@@ -1,16 +1,59 @@
 from Qt import QtCore, QtGui, QtWidgets
+from typing import Optional
+
+from kttk_widgets.entity_search_index import EntitySearchIndex
+from kttk_widgets.thumbnail_cache import ThumbnailCache
+
+
+def _entity_key(entity):
+    """
+    Key identifying an entity between two calls of set_entities. Entities are identified by type and id, everything
+    else, for example plain strings, by value
+    """
+    if isinstance(entity, dict):
+        return entity.get("type"), entity.get("id")
+    return entity
+
+
+def _contiguous_ranges(rows):
+    # type: (list) -> list
+    """
+    Groups sorted rows into (first, last) ranges, [1, 2, 3, 7] -> [(1, 3), (7, 7)]
+    """
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
 
 
 class EntityListModel(QtCore.QAbstractListModel):
-    def __init__(self):
+    def __init__(self, page_size=None, thumbnail_cache=None):
+        # type: (Optional[int], Optional[ThumbnailCache]) -> None
+        """
+        :param page_size: if given, rows are made available lazily in pages of this size using fetchMore,
+        so views only create the rows they actually show
+        :param thumbnail_cache: if given, thumbnails of the entities are shown as decoration
+        """
         super(EntityListModel, self).__init__()
 
         self._entities = []
+        self._keys = []
+        self._page_size = page_size
+        self._thumbnail_cache = thumbnail_cache
+        self._row_count = 0  # number of rows available to views, can be less than len(self._entities) when paging
+        self._search_index = (
+            None  # built lazily on first search, kept up to date by set_entities
+        )
 
-    def rowCount(self, parent):
-        return len(self._entities)
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
 
-    def data(self, index, role):
+    def data(self, index, role=QtCore.Qt.DisplayRole):
         if role == QtCore.Qt.DisplayRole:
             entity = self._entities[index.row()]
 
@@ -25,21 +68,152 @@ class EntityListModel(QtCore.QAbstractListModel):
                 return "<no name>"
             return entity
 
+        if role == QtCore.Qt.DecorationRole and self._thumbnail_cache:
+            entity = self._entities[index.row()]
+            if isinstance(entity, dict) and entity.get("thumbnail"):
+                path = entity["thumbnail"].get("path")
+                if path:
+                    return self._thumbnail_cache.pixmap(path)
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+        return self._row_count < len(self._entities)
+
+    def fetchMore(self, parent):
+        if parent.isValid() or not self._page_size:
+            return
+        count = min(self._page_size, len(self._entities) - self._row_count)
+        if count <= 0:
+            return
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(), self._row_count, self._row_count + count - 1
+        )
+        self._row_count += count
+        self.endInsertRows()
+
     def set_entities(self, entities):
-        # first remove all rows
-        self.beginRemoveRows(QtCore.QModelIndex(), 0, len(self._entities) - 1)
-        self._entities = []
-        self.endRemoveRows()
+        """
+        Updates the model to contain the given entities. Instead of resetting the whole model, only rows of removed and
+        added entities are removed and inserted and changed entities emit dataChanged, so proxy models and views only
+        need to update these rows. If the order of existing entities changed, the model is reset.
+        :param entities: new entities to show
+        """
+        entities = list(entities)
+        new_keys = [_entity_key(entity) for entity in entities]
+        new_key_set = set(new_keys)
+        old_key_set = set(self._keys)
+
+        # keys have to be unique to be able to diff
+        if len(new_key_set) != len(new_keys) or len(old_key_set) != len(self._keys):
+            self._reset(entities, new_keys)
+            return
+
+        # remove old entities, from bottom to top so rows are still valid
+        removed_rows = [
+            row for row, key in enumerate(self._keys) if key not in new_key_set
+        ]
+        for first, last in reversed(_contiguous_ranges(removed_rows)):
+            self._remove_rows(first, last)
+
+        # remaining entities need to be in the same order, otherwise a reset is cheaper than moving rows around
+        if [key for key in new_keys if key in old_key_set] != self._keys:
+            self._reset(entities, new_keys)
+            return
 
-        # now set new rows
-        self.beginInsertRows(QtCore.QModelIndex(), 0, len(entities) - 1)
+        old_entities_by_key = dict(zip(self._keys, self._entities))
+
+        # insert new entities, from top to bottom so rows match the rows in the new list
+        inserted_rows = [
+            row for row, key in enumerate(new_keys) if key not in old_key_set
+        ]
+        for first, last in _contiguous_ranges(inserted_rows):
+            self._insert_rows(
+                first, entities[first : last + 1], new_keys[first : last + 1]
+            )
+
+        # now update the entities, which have changed
+        changed_rows = [
+            row
+            for row, key in enumerate(new_keys)
+            if key in old_key_set and old_entities_by_key[key] != entities[row]
+        ]
+        if self._search_index is not None:
+            for row in changed_rows:
+                self._search_index.remove(new_keys[row], self._entities[row])
+                self._search_index.add(new_keys[row], entities[row])
         self._entities = entities
-        self.endInsertRows()
+        for first, last in _contiguous_ranges(changed_rows):
+            if first < self._row_count:
+                last = min(last, self._row_count - 1)
+                self.dataChanged.emit(self.index(first), self.index(last))
+
         # todo also store entity in userData Role, so i think its possible to access it through a proxyModel
 
     def get_entity(self, row):
         return self._entities[row]
 
+    def entity_key(self, row):
+        """
+        Returns the key of the entity in given row, used to look up search results from search_index
+        """
+        return self._keys[row]
+
+    @property
+    def search_index(self):
+        # type: () -> EntitySearchIndex
+        """
+        Search index over name, code and step of all entities. The index is built on first access and updated with
+        the removed, inserted and changed entities afterwards, only a reset builds a new index
+        """
+        if self._search_index is None:
+            self._search_index = EntitySearchIndex(zip(self._keys, self._entities))
+        return self._search_index
+
+    def _reset(self, entities, keys):
+        self.beginResetModel()
+        self._search_index = None
+        self._entities = entities
+        self._keys = keys
+        if self._page_size:
+            self._row_count = min(self._page_size, len(entities))
+        else:
+            self._row_count = len(entities)
+        self.endResetModel()
+
+    def _remove_rows(self, first, last):
+        visible = first < self._row_count
+        if visible:
+            visible_last = min(last, self._row_count - 1)
+            self.beginRemoveRows(QtCore.QModelIndex(), first, visible_last)
+
+        if self._search_index is not None:
+            for row in range(first, last + 1):
+                self._search_index.remove(self._keys[row], self._entities[row])
+        del self._entities[first : last + 1]
+        del self._keys[first : last + 1]
+
+        if visible:
+            self._row_count -= visible_last - first + 1
+            self.endRemoveRows()
+
+    def _insert_rows(self, first, entities, keys):
+        # without paging all rows are visible, with paging rows after the last fetched row are fetched later
+        visible = not self._page_size or first < self._row_count
+        if visible:
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(entities) - 1)
+
+        if self._search_index is not None:
+            for key, entity in zip(keys, entities):
+                self._search_index.add(key, entity)
+        self._entities[first:first] = entities
+        self._keys[first:first] = keys
+
+        if visible:
+            self._row_count += len(entities)
+            self.endInsertRows()
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication([])
@@ -0,0 +1,127 @@
+"""
+Prefix index for searching entities by name, code and step.
+All searchable texts are lowercased and split into tokens, for example "shot010_anim_v001.mb" results in the tokens
+shot010, anim, v001 and mb. The tokens are stored in a sorted list, so all tokens starting with a
+prefix can be found by binary search instead of scanning every entity.
+A search text matches an entity, if every word of the search text is a prefix of one of the entity tokens.
+Entities can be added and removed, so the index does not need to be rebuilt when a few entities change.
+"""
+import bisect
+import re
+
+import six
+
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+SEARCHABLE_FIELDS = ["name", "code", "step"]
+
+_TOKEN_SEPERATORS = re.compile(r"[\s_./\\-]+")
+
+
+def searchable_texts(entity):
+    # type: (Any) -> List[str]
+    """
+    Returns the texts of an entity which can be searched. For entity dicts these are name, code and step, everything
+    else is searched by its string representation
+    """
+    if isinstance(entity, dict):
+        return [entity[field] for field in SEARCHABLE_FIELDS if entity.get(field)]
+    return [str(entity)]
+
+
+def tokenize(text):
+    # type: (str) -> List[str]
+    """
+    Splits a text into lowercase tokens
+    """
+    return [token for token in _TOKEN_SEPERATORS.split(text.lower()) if token]
+
+
+def entity_tokens(entity):
+    # type: (Any) -> Set[str]
+    """
+    Returns all tokens of the searchable texts of an entity
+    """
+    return {token for text in searchable_texts(entity) for token in tokenize(text)}
+
+
+class EntitySearchIndex(object):
+    def __init__(self, keyed_entities):
+        # type: (Iterable[Tuple[Any, Any]]) -> None
+        """
+        :param keyed_entities: (key, entity) pairs, searches return the keys of matching entities
+        """
+        entries = [
+            (token, key)
+            for key, entity in keyed_entities
+            for token in entity_tokens(entity)
+        ]
+
+        # keys can be of different types, which can not be compared, so we only sort by token
+        entries.sort(key=lambda entry: entry[0])
+        self._tokens = [entry[0] for entry in entries]
+        self._keys = [entry[1] for entry in entries]
+
+        # incremented on every change, so cached search results can be invalidated
+        self.revision = 0
+
+    def add(self, key, entity):
+        # type: (Any, Any) -> None
+        """
+        Adds an entity to the index
+        :param key: key returned by searches matching the entity
+        :param entity: entity to add
+        """
+        for token in entity_tokens(entity):
+            position = bisect.bisect_right(self._tokens, token)
+            self._tokens.insert(position, token)
+            self._keys.insert(position, key)
+        self.revision += 1
+
+    def remove(self, key, entity):
+        # type: (Any, Any) -> None
+        """
+        Removes an entity added with given key from the index
+        :param key: key the entity was added with
+        :param entity: entity in the state it was added, used to find its tokens
+        """
+        for token in entity_tokens(entity):
+            start = bisect.bisect_left(self._tokens, token)
+            end = bisect.bisect_right(self._tokens, token, start)
+            for position in range(start, end):
+                if self._keys[position] == key:
+                    del self._tokens[position]
+                    del self._keys[position]
+                    break
+        self.revision += 1
+
+    def keys_with_prefix(self, prefix):
+        # type: (str) -> Set
+        """
+        Returns the keys of all entities having a token starting with given lowercase prefix
+        """
+        start = bisect.bisect_left(self._tokens, prefix)
+        # all tokens starting with prefix are sorted before the prefix with its last char incremented
+        end = bisect.bisect_left(
+            self._tokens, prefix[:-1] + six.unichr(ord(prefix[-1]) + 1), start
+        )
+        return set(self._keys[start:end])
+
+    def search(self, search_text):
+        # type: (str) -> Optional[Set]
+        """
+        Returns the keys of all entities matching given search text.
+        :return: set of matching keys or None, if search text is empty and everything matches
+        """
+        words = tokenize(search_text)
+        if not words:
+            return None
+
+        # start with the longest word, its usually the most selective one
+        words = sorted(set(words), key=len, reverse=True)
+        matching_keys = self.keys_with_prefix(words[0])
+        for word in words[1:]:
+            if not matching_keys:
+                break
+            matching_keys &= self.keys_with_prefix(word)
+        return matching_keys
@@ -4,6 +4,7 @@ import ktrack_api
 import kttk
 from kttk.context import Context
 from kttk.file_manager.file_manager import FileManager
+from kttk_widgets.background_loader import BackgroundLoader
 from kttk_widgets.context_widget import ContextWidget
 from kttk_widgets.entity_list import EntityListModel
 from kttk_widgets.searchable_list_widget import SearchableListWidget
@@ -47,6 +48,30 @@ class DataRetriver(object):
             str(workfile["entity"]["type"]), workfile["entity"]["id"]
         )
 
+    def context_from_task(self, task):
+        context = Context(
+            project=self.project_from_project_entity(task),
+            entity=self.entity_from_task(task),
+            task=task,
+            step=task["step"],
+            user=self.get_user(),
+        )
+        return context
+
+    def task_data(self, task):
+        """
+        Loads everything needed when a task is selected
+        :param task: the selected task
+        :return: tuple of workfiles of the task and populated context of the task
+        """
+        return self.get_workfiles(task), self.context_from_task(task).populate_context()
+
+
+TASKS = "tasks"
+TASK_DATA = "task_data"
+WORKFILES = "workfiles"
+CONTEXT = "context"
+
 
 class FileManagerWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
@@ -54,6 +79,13 @@ class FileManagerWidget(QtWidgets.QWidget):
         self._data_retriver = DataRetriver()
         self._view_callback_mixin = ViewCallbackQtImplementation()
         self._file_manager = FileManager(self._view_callback_mixin)
+        self._loader = BackgroundLoader(self)
+        self._loader.loaded.connect(self._data_loaded)
+
+        # selected task and its populated context, the context is None until TASK_DATA for the task is loaded
+        self._task = None
+        self._task_context = None
+
         self._setup_ui()
         self._init()
 
@@ -117,60 +149,81 @@ class FileManagerWidget(QtWidgets.QWidget):
         self.setLayout(self._layout)
 
     def _init(self):
-        tasks = self._data_retriver.get_my_tasks()
-        self.task_model.set_entities(tasks)
+        self._loader.load(TASKS, self._data_retriver.get_my_tasks)
+
+    def _data_loaded(self, key, data):
+        # called in the main thread, data was loaded in the background
+        if key == TASKS:
+            self.task_model.set_entities(data)
+        elif key == TASK_DATA:
+            workfiles, context = data
+            self._task_context = context
+            self.workfile_model.set_entities(workfiles)
+            self._context_view.context = context
+            self._btn_create_new.setEnabled(True)
+
+            # a workfile could have been selected while the context was loading
+            selected_indexes = self._workfile_list_view.selected_indexes()
+            if selected_indexes:
+                self.workfile_selection_changed(selected_indexes)
+        elif key == WORKFILES:
+            self.workfile_model.set_entities(data)
+        elif key == CONTEXT:
+            # contexts of workfiles of a previously selected task are outdated
+            if self._is_selected_task(data.task):
+                self._context_view.context = data
 
     def _update_w(self, selected_indexes):
         print(self.workfile_model.get_entity(selected_indexes[0].row())["name"])
 
     def task_selection_changed(self, selected_indexes):
-        if len(selected_indexes) > 0:
-            task = self.task_model.get_entity(selected_indexes[0].row())
+        # a new task selection makes all pending loads for the old one useless
+        self._loader.cancel(WORKFILES)
+        self._loader.cancel(CONTEXT)
+        self._task_context = None
 
-            workfiles = self._data_retriver.get_workfiles(task)
-
-            self.workfile_model.set_entities(workfiles)
+        # create new needs the context of the task, so its enabled once the context is loaded
+        self._btn_create_new.setEnabled(False)
 
-            # enable button
-            self._btn_create_new.setEnabled(True)
+        if len(selected_indexes) > 0:
+            self._task = self.task_model.get_entity(selected_indexes[0].row())
 
-            context = self._context_from_task(task)
-            self._context_view.context = context
+            self._loader.load(TASK_DATA, self._data_retriver.task_data, self._task)
 
         else:
+            self._task = None
+            self._loader.cancel(TASK_DATA)
             self.workfile_model.set_entities([])
-            self._btn_create_new.setEnabled(False)
 
     def workfile_selection_changed(self, selected_indexes):
+        # enable open button only if a workfile is selected
+        self._btn_open.setEnabled(len(selected_indexes) > 0)
+
+        if not self._task_context:
+            # context of the task is still loading, called again once its loaded
+            return
+
         if len(selected_indexes) > 0:
-            # enable open button
-            self._btn_open.setEnabled(True)
             workfile = self.workfile_model.get_entity(selected_indexes[0].row())
 
             context = self._context_from_workfile(workfile)
         else:
-            # disable open button
-            self._btn_open.setEnabled(False)
-
             # remove workfile from context
-            context = self._context_view.context.copy_context(workfile=None)
+            context = self._task_context.copy_context(workfile=None)
 
-        self._context_view.context = context
+        # switching between workfiles of the same task will hit the cache
+        self._loader.load(CONTEXT, context.populate_context, True)
 
     def _create(self):
-        indexes = self._task_list_view.selected_indexes()
+        if not self._task_context:
+            return
 
-        if len(indexes) > 0:
-            # get selected task
-            task = self.task_model.get_entity(indexes[0].row())
+        # create a new workfile in the already loaded context of the task
+        task = self._task
+        self._file_manager.create(self._task_context)
 
-            # create a context from task, so we can create a new workfile there
-            context = self._context_from_task(task)
-            self._file_manager.create(context)
-
-            # update published files
-            workfiles = self._data_retriver.get_workfiles(task)
-            self.workfile_model.set_entities(workfiles)
+        # update published files
+        self._loader.load(WORKFILES, self._data_retriver.get_workfiles, task)
 
     def _open(self):
         workfile_index = self._workfile_list_view.selected_indexes()[0]
@@ -185,24 +238,20 @@ class FileManagerWidget(QtWidgets.QWidget):
         task = self.task_model.get_entity(
             self._task_list_view.selected_indexes()[0].row()
         )
-        workfiles = self._data_retriver.get_workfiles(task)
-        self.workfile_model.set_entities(workfiles)
-
-    def _context_from_task(self, task):  # todo add tests
-        context = Context(
-            project=self._data_retriver.project_from_project_entity(task),
-            entity=self._data_retriver.entity_from_task(task),
-            task=task,
-            step=task["step"],
-            user=self._data_retriver.get_user(),
-        )
+        self._loader.load(WORKFILES, self._data_retriver.get_workfiles, task)
 
-        return context
+    def _is_selected_task(self, task):
+        # type: (dict) -> bool
+        return bool(self._task and task and task["id"] == self._task["id"])
 
     def _context_from_workfile(self, workfile):
-        context = self._context_view.context.copy_context(workfile=workfile)
+        context = self._task_context.copy_context(workfile=workfile)
         return context
 
+    def closeEvent(self, event):
+        self._loader.cancel_all()
+        super(FileManagerWidget, self).closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication([])
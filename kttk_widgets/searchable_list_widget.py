@@ -2,13 +2,80 @@ from Qt import QtCore, QtGui, QtWidgets
 
 from kttk_widgets.entity_list import EntityListModel
 
+FILTER_DELAY_MS = 150
+
+
+class EntitySearchFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Filters rows using the search_index of an EntityListModel. The matching entities are looked up once per search text,
+    so filtering a row is a simple set lookup instead of matching a regex against the row.
+    Other source models are filtered with a regex as usual.
+    """
+
+    def __init__(self, parent=None):
+        super(EntitySearchFilterProxyModel, self).__init__(parent)
+        self._entity_model = None  # type: EntityListModel
+        self._search_text = ""
+        self._matching_keys = None
+        self._matching_index = None
+        self._matching_revision = None
+
+    def setSourceModel(self, source_model):
+        # filterAcceptsRow is called for every row, so we decide only once if we can use the search index
+        self._entity_model = (
+            source_model if isinstance(source_model, EntityListModel) else None
+        )
+        self._matching_index = None
+        super(EntitySearchFilterProxyModel, self).setSourceModel(source_model)
+
+    def set_search_text(self, text):
+        # type: (str) -> None
+        self._search_text = text
+        if self._entity_model:
+            self._matching_index = None
+            self.invalidateFilter()
+        else:
+            self.setFilterRegExp(text)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        entity_model = self._entity_model
+        if not entity_model:
+            return super(EntitySearchFilterProxyModel, self).filterAcceptsRow(
+                source_row, source_parent
+            )
+
+        # everything matches, no need to build the search index
+        if not self._search_text:
+            return True
+
+        # source entities have changed, so we need to search again
+        search_index = entity_model.search_index
+        if (
+            search_index is not self._matching_index
+            or search_index.revision != self._matching_revision
+        ):
+            self._matching_keys = search_index.search(self._search_text)
+            self._matching_index = search_index
+            self._matching_revision = search_index.revision
+
+        matching_keys = self._matching_keys
+        return (
+            matching_keys is None
+            or entity_model.entity_key(source_row) in matching_keys
+        )
+
 
 class SearchableListWidget(QtWidgets.QWidget):
     selection_changed = QtCore.Signal(list)
 
-    def __init__(self, source_model, parent=None):
+    def __init__(self, source_model, parent=None, filter_delay=FILTER_DELAY_MS):
+        """
+        :param source_model: model to show
+        :param filter_delay: filter is applied after the user stopped typing for this many milliseconds
+        """
         super(SearchableListWidget, self).__init__(parent)
         self._source_model = source_model
+        self._filter_delay = filter_delay
         self._setup_ui()
 
     def _setup_ui(self):
@@ -20,7 +87,7 @@ class SearchableListWidget(QtWidgets.QWidget):
 
         self._view = QtWidgets.QListView()
 
-        self._proxy_model = QtCore.QSortFilterProxyModel(self)
+        self._proxy_model = EntitySearchFilterProxyModel(self)
         self._proxy_model.setSortRole(QtCore.Qt.DisplayRole)
         self._proxy_model.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
         self._proxy_model.setSourceModel(self._source_model)
@@ -36,10 +103,12 @@ class SearchableListWidget(QtWidgets.QWidget):
         self.setLayout(self._layout)
         self.setFocus()
 
-        # connect signal
-        self._search_line.textChanged.connect(
-            lambda text: self._proxy_model.setFilterRegExp(text)
-        )
+        # connect signal, filter is debounced so we dont filter on every keystroke
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self._filter_delay)
+        self._filter_timer.timeout.connect(self.apply_filter)
+        self._search_line.textChanged.connect(lambda text: self._filter_timer.start())
 
         selection_model = (
             self._view.selectionModel()
@@ -50,6 +119,13 @@ class SearchableListWidget(QtWidgets.QWidget):
             )
         )
 
+    def apply_filter(self):
+        """
+        Filters the list with the current search text immediately
+        """
+        self._filter_timer.stop()
+        self._proxy_model.set_search_text(self._search_line.text())
+
     def selected_indexes(self):
         selection_model = (
             self._view.selectionModel()
@@ -0,0 +1,71 @@
+"""
+Cache of decoded thumbnails for widgets.
+Decoding an image from a file share is slow, so every thumbnail is decoded only once and kept as QPixmap. Thumbnails
+are stored content-addressed and never change, so the path is a safe cache key and entries never get outdated.
+"""
+from Qt import QtCore, QtGui
+from typing import Optional
+
+from kttk import utils
+
+# cached for paths which could not be decoded, so they are not decoded again on every repaint
+_NOT_DECODABLE = object()
+
+
+class ThumbnailCache(object):
+    def __init__(self, max_count=512, size=64):
+        # type: (int, int) -> None
+        """
+        :param max_count: maximum number of thumbnails kept in memory
+        :param size: thumbnails are scaled to fit into size x size pixels
+        """
+        self._pixmaps = utils.LRUCache(max_count)
+        self._size = size
+
+    def pixmap(self, path):
+        # type: (str) -> Optional[QtGui.QPixmap]
+        """
+        Returns the thumbnail at given path as pixmap. Has to be called from the Qt main thread
+        :param path: path to the thumbnail
+        :return: the pixmap or None if path could not be decoded
+        """
+        pixmap = self._pixmaps.get(path)
+        if pixmap is None:
+            image = self.load_image(path)
+            if image is None:
+                self._pixmaps.put(path, _NOT_DECODABLE)
+                return None
+            pixmap = QtGui.QPixmap.fromImage(image)
+            self._pixmaps.put(path, pixmap)
+        if pixmap is _NOT_DECODABLE:
+            return None
+        return pixmap
+
+    def load_image(self, path):
+        # type: (str) -> Optional[QtGui.QImage]
+        """
+        Decodes and scales the thumbnail at given path. Does not touch the cache, so it can run on a worker thread,
+        for example using BackgroundLoader, the image can be added with put_image afterwards
+        """
+        image = QtGui.QImage(path)
+        if image.isNull():
+            return None
+        if max(image.width(), image.height()) > self._size:
+            image = image.scaled(
+                self._size,
+                self._size,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation,
+            )
+        return image
+
+    def put_image(self, path, image):
+        # type: (str, QtGui.QImage) -> None
+        """
+        Adds an image decoded by load_image to the cache, has to be called from the Qt main thread
+        """
+        self._pixmaps.put(path, QtGui.QPixmap.fromImage(image))
+
+    def __contains__(self, path):
+        # type: (str) -> bool
+        return path in self._pixmaps
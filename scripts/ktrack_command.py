@@ -7,8 +7,9 @@ from tabulate import tabulate
 
 import ktrack_api
 import kttk
-from ktrack_api.exceptions import EntityMissing
-from kttk import logger
+from ktrack_api.exceptions import EntityMissing, EntityNotFoundException
+from ktrack_api.sqlite_impl import snapshot
+from kttk import folder_scanner, logger, path_cache_manager, utils
 
 
 def print_result(result):
@@ -121,7 +122,7 @@ def create(entity_type, entity_name, project_id=None, asset_type=None, task_step
 
         entity_data = {}
         entity_data["code"] = entity_name
-        entity_data["project"] = context.project
+        entity_data["project"] = utils.entity_id_dict(context.project)
 
         if is_asset:
             entity_data["asset_type"] = asset_type
@@ -133,7 +134,7 @@ def create(entity_type, entity_name, project_id=None, asset_type=None, task_step
                 print_result("No entity provided for task")
                 return
 
-            entity_data["entity"] = context.entity
+            entity_data["entity"] = utils.entity_id_dict(context.entity)
 
             entity_data["assigned"] = {
                 "type": "user",
@@ -301,8 +302,8 @@ def task_preset():
         task = kt.create(
             "task",
             {
-                "project": context.project,
-                "entity": context.entity,
+                "project": utils.entity_id_dict(context.project),
+                "entity": utils.entity_id_dict(context.entity),
                 "name": preset["name"],
                 "step": preset["step"],
             },
@@ -310,6 +311,68 @@ def task_preset():
         kttk.init_entity(task["type"], task["id"])
 
 
+def scan(path=os.getcwd(), workers=8, dry_run=False):
+    """
+    Scans all folders below given path and registers folders of projects, assets and shots which are not registered yet
+    :param path: folder to scan, default is current directory
+    :param workers: number of directories listed at the same time
+    :param dry_run: only report what would be registered
+    :return: None
+    """
+    result = folder_scanner.scan(path, max_workers=workers, dry_run=dry_run)
+
+    print_result(
+        "Scanned {} directories in {:.2f}s ({:.0f} dirs/sec)".format(
+            result.directories, result.seconds, result.directories_per_second
+        )
+    )
+    print_result(
+        "{} {} paths, {} already registered, {} not matching any folder template".format(
+            "Would register" if dry_run else "Registered",
+            len(result.registered),
+            len(result.already_registered),
+            len(result.unmatched),
+        )
+    )
+    if result.mismatches:
+        print_result(
+            tabulate(result.mismatches, headers=["Path", "Reason"], tablefmt="plain")
+        )
+
+
+def migrate_path_entries():
+    """
+    Stores the indexed id fields of path entries registered by older versions, run once after upgrading
+    :return: None
+    """
+    migrated_count = path_cache_manager.migrate_path_entries()
+
+    print_result("Migrated {} path entries".format(migrated_count))
+
+
+def export_snapshot(project_id, path):
+    """
+    Exports a read-only snapshot of a project for render farm nodes, open it with the connection url snapshot:///path
+    :param project_id: id of the project to export
+    :param path: path of the snapshot file, an existing snapshot is replaced
+    :return: None
+    """
+    kt = ktrack_api.get_ktrack()
+
+    try:
+        counts = snapshot.export_project(kt, project_id, path)
+    except EntityNotFoundException:
+        print_result('Project with id "{}" not found..'.format(project_id))
+        return
+
+    print_result(
+        tabulate(
+            sorted(counts.items()), headers=["Entity type", "Count"], tablefmt="plain"
+        )
+    )
+    print_result("Snapshot written to {}".format(path))
+
+
 def main():
     # restore user, will create a new one if there is nothing to restore. This way we ensure thing like create have a valid user
     user = kttk.restore_user()
@@ -320,7 +383,10 @@ def main():
             "find_one": find_one,
             "show": show,
             "context": print_context,
-            "task_preset": task_preset
+            "task_preset": task_preset,
+            "scan": scan,
+            "export_snapshot": export_snapshot,
+            "migrate_path_entries": migrate_path_entries,
             # TODO add update
         }
     )
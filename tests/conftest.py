@@ -26,6 +26,12 @@ def pytest_addoption(parser):
         default=False,
         help="run integration tests",
     )
+    parser.addoption(
+        "--slow-tests",
+        action="store_true",
+        default=False,
+        help="run slow tests, for example benchmarks",
+    )
 
 
 def pytest_configure(config):
@@ -33,6 +39,14 @@ def pytest_configure(config):
 
 
 def pytest_collection_modifyitems(config, items):
+    if not config.getoption("--slow-tests"):
+        skip_slow_tests_not_activated = pytest.mark.skip(
+            reason="needs --slow-tests option to run"
+        )
+        for item in items:
+            if "slow" in item.keywords:
+                item.add_marker(skip_slow_tests_not_activated)
+
     if config.getoption("--integration-tests"):
         return
     skip_integration_tests_not_activated = pytest.mark.skip(
@@ -15,6 +15,7 @@ def ktrack_instance():
     yield impl
     for entity_name, entity_cls in entities.entities.items():
         entity_cls.objects().all().delete()
+    entities.VersionCounter.objects().delete()
 
 
 @pytest.fixture
@@ -25,6 +26,7 @@ def ktrack_instance_patched():
         yield impl
     for entity_name, entity_cls in entities.entities.items():
         entity_cls.objects().all().delete()
+    entities.VersionCounter.objects().delete()
 
 
 @pytest.fixture
@@ -1,12 +1,39 @@
+import time
+import types
+
+import mock
 import pytest
+from bson import ObjectId
 from mongoengine import connect, ValidationError
 
-from ktrack_api.mongo_impl.entities import Project as MongoProject, Asset as MongoAsset
+from ktrack_api.mongo_impl.entities import (
+    Project as MongoProject,
+    Asset as MongoAsset,
+    Shot as MongoShot,
+    Task as MongoTask,
+    WorkFile as MongoWorkfile,
+    User as MongoUser,
+)
 from ktrack_api.mongo_impl.mongo_repositories import (
     MongoProjectRepository,
     MongoAssetRepository,
+    MongoShotRepository,
+    MongoTaskRepository,
+    MongoWorkfileRepository,
+    MongoUserRepository,
+)
+from kttk.domain.entities import (
+    Project,
+    Thumbnail,
+    Asset,
+    Shot,
+    CutInformation,
+    Task,
+    EntityLink,
+    Workfile,
+    VersionNumber,
+    User,
 )
-from kttk.domain.entities import Project, Thumbnail, Asset
 
 
 @pytest.fixture
@@ -23,6 +50,39 @@ def mongo_asset_repository():
     return MongoAssetRepository()
 
 
+@pytest.fixture
+def saved_project(mongo_project_repository):
+    return mongo_project_repository.save(Project(name="test_project"))
+
+
+@pytest.fixture
+def mongo_shot_repository():
+    connect("mongoeengine_test", host="mongomock://localhost")
+    MongoShot.objects().all().delete()
+    return MongoShotRepository()
+
+
+@pytest.fixture
+def mongo_task_repository():
+    connect("mongoeengine_test", host="mongomock://localhost")
+    MongoTask.objects().all().delete()
+    return MongoTaskRepository()
+
+
+@pytest.fixture
+def mongo_workfile_repository():
+    connect("mongoeengine_test", host="mongomock://localhost")
+    MongoWorkfile.objects().all().delete()
+    return MongoWorkfileRepository()
+
+
+@pytest.fixture
+def mongo_user_repository():
+    connect("mongoeengine_test", host="mongomock://localhost")
+    MongoUser.objects().all().delete()
+    return MongoUserRepository()
+
+
 class TestProjectRepository(object):
     @pytest.mark.parametrize(
         "project",
@@ -60,6 +120,40 @@ class TestProjectRepository(object):
 
         assert mongo_project_repository.find_all() == projects
 
+    def test_save_all_single_bulk_write(self, mongo_project_repository):
+        existing_project = mongo_project_repository.save(Project(name="existing"))
+        existing_project.name = "renamed"
+
+        with mock.patch.object(MongoProject, "save") as mock_save:
+            projects = mongo_project_repository.save_all(
+                [existing_project, Project(name="new")]
+            )
+
+        assert not mock_save.called
+        assert projects[0].id == existing_project.id
+        assert sorted(
+            project.name for project in mongo_project_repository.find_all()
+        ) == ["new", "renamed",]
+
+    def test_iter_all(self, mongo_project_repository):
+        projects = mongo_project_repository.save_all(
+            [Project(name="project_{}".format(i)) for i in range(5)]
+        )
+
+        iterator = mongo_project_repository.iter_all(batch_size=2)
+
+        assert isinstance(iterator, types.GeneratorType)
+        assert list(iterator) == projects
+
+    def test_find_by_ids(self, mongo_project_repository):
+        projects = mongo_project_repository.save_all(
+            [Project(name="first"), Project(name="second")]
+        )
+
+        assert mongo_project_repository.find_by_ids(
+            [projects[1].id, "507f1f77bcf86cd799439011", "invalid", projects[0].id]
+        ) == [projects[1], None, None, projects[0]]
+
 
 class TestAssetRepository(object):
     @pytest.mark.parametrize(
@@ -82,6 +176,8 @@ class TestAssetRepository(object):
         asset = mongo_asset_repository.save(asset)
         assert asset.id
         old_asset.id = asset.id
+        # links are stored with string ids
+        old_asset.project = str(old_asset.project)
         assert old_asset == asset
 
         assert mongo_asset_repository.find_one(asset.id) == asset
@@ -125,6 +221,85 @@ class TestAssetRepository(object):
         with pytest.raises(ValidationError):
             mongo_asset_repository.save(asset)
 
+    def test_save_all_without_project(self, mongo_asset_repository):
+        with pytest.raises(ValidationError):
+            mongo_asset_repository.save_all([Asset(name="test_asset")])
+
+        assert mongo_asset_repository.find_all() == []
+
+    def test_iter_all_and_find_by_ids(
+        self, mongo_asset_repository, mongo_project_repository
+    ):
+        project = mongo_project_repository.save(Project(name="test_project"))
+        assets = mongo_asset_repository.save_all(
+            [
+                Asset(name="asset_{}".format(i), asset_type="prop", project=project.id)
+                for i in range(3)
+            ]
+        )
+
+        assert list(mongo_asset_repository.iter_all(batch_size=2)) == assets
+        assert mongo_asset_repository.find_by_ids([assets[2].id, assets[0].id]) == [
+            assets[2],
+            assets[0],
+        ]
+
+    @pytest.mark.slow
+    def test_benchmark_domain_mapping(
+        self, mongo_asset_repository, mongo_project_repository
+    ):
+        count = 100000
+        project = mongo_project_repository.save(Project(name="test_project"))
+        mongo_assets = [
+            MongoAsset(
+                id=ObjectId(),
+                code="asset_{}".format(i),
+                asset_type="prop",
+                project={"type": "project", "id": project.id},
+                thumbnail={"path": "thumbnail.png"},
+            )
+            for i in range(count)
+        ]
+
+        start = time.time()
+        assets = [
+            MongoAssetRepository.to_domain_entity(mongo_asset)
+            for mongo_asset in mongo_assets
+        ]
+        mapping_seconds = time.time() - start
+
+        # new assets
+        for asset in assets:
+            asset.id = None
+
+        start = time.time()
+        for asset in assets[:2000]:
+            mongo_asset_repository.save(asset)
+        single_save_seconds = time.time() - start
+        MongoAsset.objects().all().delete()
+
+        start = time.time()
+        mongo_asset_repository.save_all(assets[:2000])
+        bulk_save_seconds = time.time() - start
+
+        start = time.time()
+        iterated = sum(1 for _ in mongo_asset_repository.iter_all())
+        iter_seconds = time.time() - start
+        assert iterated == 2000
+
+        print(
+            "\nto_domain_entity: {} assets in {:.2f}s ({:.1f}us per asset)\n"
+            "2000 new assets: save {:.2f}s, save_all {:.2f}s\n"
+            "iter_all: 2000 assets in {:.2f}s".format(
+                count,
+                mapping_seconds,
+                mapping_seconds / count * 1000000,
+                single_save_seconds,
+                bulk_save_seconds,
+                iter_seconds,
+            )
+        )
+
     def test_find_by_project(self, mongo_project_repository, mongo_asset_repository):
         project1 = mongo_project_repository.save(Project(name="test_project"))
         project2 = mongo_project_repository.save(Project(name="test_project"))
@@ -138,3 +313,282 @@ class TestAssetRepository(object):
 
         assert mongo_asset_repository.find_by_project(project1.id)[0] == assets[0]
         assert mongo_asset_repository.find_by_project(project2.id)[0] == assets[1]
+
+
+class TestShotRepository(object):
+    @pytest.mark.parametrize(
+        "shot",
+        [
+            Shot(code="shot010"),
+            Shot(code="shot010", cut_information=CutInformation(1001, 1050)),
+        ],
+    )
+    def test_save(self, shot, saved_project, mongo_shot_repository):
+        shot.project = saved_project.id
+
+        saved_shot = mongo_shot_repository.save(shot)
+        assert saved_shot.id
+        shot.id = saved_shot.id
+        # links are stored with string ids
+        shot.project = str(shot.project)
+        assert shot == saved_shot
+
+        assert mongo_shot_repository.find_one(shot.id) == shot
+
+    def test_cut_duration_is_stored(self, saved_project, mongo_shot_repository):
+        shot = mongo_shot_repository.save(
+            Shot(
+                code="shot010",
+                cut_information=CutInformation(1001, 1050),
+                project=saved_project.id,
+            )
+        )
+
+        assert MongoShot.objects(id=shot.id).first().cut_duration == 49
+
+    def test_find_by_project(
+        self, mongo_project_repository, saved_project, mongo_shot_repository
+    ):
+        other_project = mongo_project_repository.save(Project(name="other"))
+        shots = mongo_shot_repository.save_all(
+            [
+                Shot(code="shot010", project=saved_project.id),
+                Shot(code="shot020", project=other_project.id),
+            ]
+        )
+
+        assert mongo_shot_repository.find_by_project(saved_project.id) == [shots[0]]
+
+
+class TestTaskRepository(object):
+    def test_save(self, saved_project, mongo_task_repository):
+        task = Task(
+            name="anim",
+            step="anim",
+            entity=EntityLink("Shot", "507f1f77bcf86cd799439011"),
+            assigned=EntityLink("user", "507f1f77bcf86cd799439012"),
+            project=saved_project.id,
+        )
+
+        saved_task = mongo_task_repository.save(task)
+        task.id = saved_task.id
+        task.project = str(task.project)
+
+        assert saved_task == task
+        assert mongo_task_repository.find_one(task.id) == task
+
+    def test_find_by_entity(self, saved_project, mongo_task_repository):
+        shot = EntityLink("shot", "507f1f77bcf86cd799439011")
+        other_shot = EntityLink("shot", "507f1f77bcf86cd799439012")
+        tasks = mongo_task_repository.save_all(
+            [
+                Task(name="anim", entity=shot, project=saved_project.id),
+                Task(name="comp", entity=shot, project=saved_project.id),
+                Task(name="anim", entity=other_shot, project=saved_project.id),
+            ]
+        )
+
+        assert mongo_task_repository.find_by_entity(shot) == tasks[:2]
+        assert mongo_task_repository.find_by_entities([shot, other_shot]) == tasks
+        assert mongo_task_repository.find_by_entities([]) == []
+
+    def test_find_assigned_to(self, saved_project, mongo_task_repository):
+        user = EntityLink("user", "507f1f77bcf86cd799439011")
+        shot = EntityLink("shot", "507f1f77bcf86cd799439012")
+        tasks = mongo_task_repository.save_all(
+            [
+                Task(name="anim", entity=shot, assigned=user, project=saved_project.id),
+                Task(name="comp", entity=shot, project=saved_project.id),
+            ]
+        )
+
+        assert mongo_task_repository.find_assigned_to(user.id) == [tasks[0]]
+
+    def test_finds_tasks_created_using_ktrack(self, ktrack_instance):
+        project = ktrack_instance.create("project", {"name": "test_project"})
+        shot = ktrack_instance.create("shot", {"code": "shot010", "project": project})
+        user = ktrack_instance.create("user", {"name": "Jane Doe"})
+        task = ktrack_instance.create(
+            "task",
+            {"name": "anim", "entity": shot, "project": project, "assigned": user},
+        )
+
+        repository = MongoTaskRepository()
+
+        assert [
+            found.id
+            for found in repository.find_by_entity(EntityLink("shot", shot["id"]))
+        ] == [ObjectId(task["id"])]
+        assert [found.id for found in repository.find_assigned_to(user["id"])] == [
+            ObjectId(task["id"])
+        ]
+
+    def test_queries_use_index(self):
+        index_keys = [
+            index["key"]
+            for index in MongoTask._get_collection().index_information().values()
+        ]
+        assert [("entity.id", 1)] in index_keys
+        assert [("assigned.id", 1)] in index_keys
+
+
+class TestWorkfileRepository(object):
+    def test_save(self, saved_project, mongo_workfile_repository):
+        workfile = Workfile(
+            name="shot010_anim_v001",
+            entity=EntityLink("task", "507f1f77bcf86cd799439011"),
+            path="/some/path/shot010_anim_v001.mb",
+            comment="first version",
+            version_number=VersionNumber(1),
+            created_from="507f1f77bcf86cd799439012",
+            project=saved_project.id,
+        )
+
+        saved_workfile = mongo_workfile_repository.save(workfile)
+        workfile.id = saved_workfile.id
+        workfile.project = str(workfile.project)
+
+        assert saved_workfile == workfile
+        assert mongo_workfile_repository.find_one(workfile.id) == workfile
+
+    def test_find_by_entity_and_highest_version(
+        self, saved_project, mongo_workfile_repository
+    ):
+        task = EntityLink("task", "507f1f77bcf86cd799439011")
+        other_task = EntityLink("task", "507f1f77bcf86cd799439012")
+        workfiles = mongo_workfile_repository.save_all(
+            [
+                Workfile(
+                    entity=entity,
+                    path="/path/v{}.mb".format(version),
+                    version_number=VersionNumber(version),
+                    project=saved_project.id,
+                )
+                for entity, version in [
+                    (task, 1),
+                    (task, 3),
+                    (task, 2),
+                    (other_task, 5),
+                ]
+            ]
+        )
+
+        assert mongo_workfile_repository.find_by_entity(task) == workfiles[:3]
+        assert mongo_workfile_repository.find_highest_version(task) == workfiles[1]
+        assert (
+            mongo_workfile_repository.find_highest_version(other_task) == workfiles[3]
+        )
+        assert (
+            mongo_workfile_repository.find_highest_version(
+                EntityLink("task", "507f1f77bcf86cd799439013")
+            )
+            is None
+        )
+
+
+class TestUserRepository(object):
+    def test_save_and_find_by_name(self, mongo_user_repository):
+        users = mongo_user_repository.save_all(
+            [
+                User(name="jane", first_name="Jane", second_name="Doe"),
+                User(name="john", first_name="John", second_name="Doe"),
+            ]
+        )
+
+        assert mongo_user_repository.find_by_name("john") == users[1]
+        assert mongo_user_repository.find_by_name("nobody") is None
+        assert mongo_user_repository.find_by_ids([users[0].id]) == [users[0]]
+
+
+@pytest.mark.parametrize(
+    "repository_fixture,entity",
+    [
+        ("mongo_asset_repository", Asset(name="asset", asset_type="prop")),
+        (
+            "mongo_shot_repository",
+            Shot(code="shot010", cut_information=CutInformation(1001, 1050)),
+        ),
+        ("mongo_shot_repository", Shot(code="shot010")),
+        (
+            "mongo_task_repository",
+            Task(
+                name="anim",
+                entity=EntityLink("shot", "507f1f77bcf86cd799439011"),
+                assigned=EntityLink("user", "507f1f77bcf86cd799439012"),
+            ),
+        ),
+        (
+            "mongo_workfile_repository",
+            Workfile(
+                entity=EntityLink("task", "507f1f77bcf86cd799439011"),
+                path="/some/path.mb",
+                version_number=VersionNumber(3),
+                created_from="507f1f77bcf86cd799439012",
+                thumbnail=Thumbnail(path="thumbnail.png"),
+            ),
+        ),
+    ],
+)
+def test_raw_conversion_equals_document_conversion(
+    request, repository_fixture, entity, saved_project
+):
+    repository = request.getfixturevalue(repository_fixture)
+    entity.project = saved_project.id
+    saved = repository.save(entity)
+
+    mongo_cls = type(repository.to_mongo_entity(saved))
+    raw = mongo_cls.objects(id=saved.id).as_pymongo().first()
+    document = mongo_cls.objects(id=saved.id).first()
+
+    assert repository.raw_to_domain_entity(raw) == repository.to_domain_entity(document)
+
+
+def test_raw_conversion_project_and_user(
+    mongo_project_repository, mongo_user_repository
+):
+    project = mongo_project_repository.save(
+        Project(name="project", thumbnail=Thumbnail(path="thumbnail.png"))
+    )
+    user = mongo_user_repository.save(User(name="jane", first_name="Jane"))
+
+    assert MongoProjectRepository.raw_to_project(
+        MongoProject.objects(id=project.id).as_pymongo().first()
+    ) == MongoProjectRepository.to_project(MongoProject.objects(id=project.id).first())
+    assert MongoUserRepository.raw_to_domain_entity(
+        MongoUser.objects(id=user.id).as_pymongo().first()
+    ) == MongoUserRepository.to_domain_entity(MongoUser.objects(id=user.id).first())
+
+
+@pytest.mark.slow
+def test_benchmark_raw_conversion(saved_project, mongo_workfile_repository):
+    count = 20000
+    task = EntityLink("task", "507f1f77bcf86cd799439011")
+    mongo_workfile_repository.save_all(
+        [
+            Workfile(
+                entity=task,
+                path="/some/path/v{}.mb".format(i % 999 + 1),
+                version_number=VersionNumber(i % 999 + 1),
+                project=saved_project.id,
+            )
+            for i in range(count)
+        ]
+    )
+
+    start = time.time()
+    documents = [
+        MongoWorkfileRepository.to_domain_entity(document)
+        for document in MongoWorkfile.objects.all()
+    ]
+    document_seconds = time.time() - start
+
+    start = time.time()
+    raw = mongo_workfile_repository.find_by_entity(task)
+    raw_seconds = time.time() - start
+
+    assert raw == documents
+    print(
+        "\n{} workfiles: mongoengine documents {:.2f}s, raw documents {:.2f}s".format(
+            count, document_seconds, raw_seconds
+        )
+    )
@@ -1,6 +1,16 @@
+import sys
+import time
+
+import attr
 import pytest
 
-from kttk.domain.entities import CutInformation, VersionNumber
+from kttk.domain.entities import (
+    CutInformation,
+    VersionNumber,
+    Workfile,
+    EntityLink,
+    User,
+)
 
 
 class TestCutInformation(object):
@@ -42,3 +52,65 @@ class TestVersionNumber(object):
             assert VersionNumber(-1)
         with pytest.raises(ValueError):
             assert VersionNumber(1000)
+
+
+class TestSlots(object):
+    def test_entities_have_no_dict(self):
+        workfile = Workfile(name="shot010_anim_v001", version_number=VersionNumber(1))
+
+        assert not hasattr(workfile, "__dict__")
+        with pytest.raises(AttributeError):
+            workfile.not_a_field = 1
+
+    def test_entities_are_mutable(self):
+        workfile = Workfile(name="shot010_anim_v001")
+        workfile.id = "some_id"
+
+        assert workfile.id == "some_id"
+
+    @pytest.mark.parametrize(
+        "value_object",
+        [CutInformation(1001, 1050), VersionNumber(1), EntityLink("task", "some_id")],
+    )
+    def test_value_objects_are_frozen_and_hashable(self, value_object):
+        with pytest.raises(attr.exceptions.FrozenInstanceError):
+            setattr(value_object, attr.fields(type(value_object))[0].name, 2)
+        assert hash(value_object) == hash(attr.evolve(value_object))
+
+    def test_user_is_attrs_class(self):
+        assert User(name="jane") == User(name="jane")
+        assert User(name="jane") != User(name="john")
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="tracemalloc needs Python 3.4")
+def test_benchmark_workfile_memory():
+    import tracemalloc
+
+    count = 1000000
+    task = EntityLink("task", "507f1f77bcf86cd799439011")
+    version_number = VersionNumber(1)
+
+    tracemalloc.start()
+    start = time.time()
+    workfiles = [
+        Workfile(
+            id="507f1f77bcf86cd7994{:05d}".format(i),
+            name="shot010_anim_v001",
+            entity=task,
+            path="/some/path/shot010_anim_v001.mb",
+            version_number=version_number,
+            project="507f1f77bcf86cd799439012",
+        )
+        for i in range(count)
+    ]
+    seconds = time.time() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(workfiles) == count
+    print(
+        "\n{} workfiles: {:.1f} MB ({:.0f} bytes per workfile incl. id string) in {:.2f}s".format(
+            count, allocated / 1024.0 / 1024.0, allocated / float(count), seconds
+        )
+    )
@@ -0,0 +1,122 @@
+import pytest
+
+from kttk.naming_system import route_compiler
+from kttk.naming_system.route_compiler import RouteParser
+
+ROUTES = {
+    "project_root": "M:/Projekte/{project_year}",
+    "project_folder": "{project_root}/{project_name}",
+    "shot_folder": "{project_folder}/Shots/{code}",
+    "shot_maya": "{shot_folder}/{code}_Maya",
+    "workfile_file_name": "{code}_{task_name}_{version}{dcc_extension}",
+    "task_folder": "",
+}
+
+
+def test_expand_route():
+    assert (
+        route_compiler.expand_route("shot_maya", ROUTES)
+        == "M:/Projekte/{project_year}/{project_name}/Shots/{code}/{code}_Maya"
+    )
+
+
+def test_expand_route_cycle():
+    with pytest.raises(ValueError):
+        route_compiler.expand_route("a", {"a": "{b}/a", "b": "{a}/b"})
+
+
+def test_compile_route():
+    route = route_compiler.compile_route("shot_maya", ROUTES)
+
+    assert route.name == "shot_maya"
+    assert route.token_names == ["project_year", "project_name", "code"]
+    assert route.parse("M:/Projekte/2018/Dory/Shots/shot010/shot010_Maya") == {
+        "project_year": "2018",
+        "project_name": "Dory",
+        "code": "shot010",
+    }
+
+    # repeated tokens need the same value
+    assert route.parse("M:/Projekte/2018/Dory/Shots/shot010/shot020_Maya") is None
+
+    # tokens match single folders only
+    assert route.parse("M:/Projekte/2018/Dory/Shots/seq/shot010/shot010_Maya") is None
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("M:/Projekte/2018", ("project_root", {"project_year": "2018"})),
+        (
+            "M:/Projekte/2018/Dory",
+            ("project_folder", {"project_year": "2018", "project_name": "Dory"}),
+        ),
+        (
+            "M:/Projekte/2018/Dory/Shots/shot010",
+            (
+                "shot_folder",
+                {"project_year": "2018", "project_name": "Dory", "code": "shot010"},
+            ),
+        ),
+        (
+            r"M:\Projekte\2018\Dory\Shots\shot010\shot010_Maya",
+            (
+                "shot_maya",
+                {"project_year": "2018", "project_name": "Dory", "code": "shot010"},
+            ),
+        ),
+        (
+            "shot010_anim_v001.mb",
+            (
+                "workfile_file_name",
+                {
+                    "code": "shot010",
+                    "task_name": "anim",
+                    "version": "v001",
+                    "dcc_extension": ".mb",
+                },
+            ),
+        ),
+        ("M:/Projekte/18", None),
+        ("M:/Projekte/2018/Dory/Assets/Hank", None),
+        ("", None),
+    ],
+)
+def test_parse_path(path, expected):
+    assert RouteParser(ROUTES).parse_path(path) == expected
+
+
+def test_most_specific_route_wins():
+    parser = RouteParser({"any_folder": "M:/{folder}", "shots": "M:/Shots"})
+
+    assert parser.parse_path("M:/Shots") == ("shots", {})
+    assert parser.parse_path("M:/Assets") == ("any_folder", {"folder": "Assets"})
+
+
+def test_many_routes():
+    # more groups than a single regex supports in Python 2
+    routes = {
+        "route_{}".format(i): "M:/route_{}/{{first}}/{{second}}".format(i)
+        for i in range(100)
+    }
+    parser = RouteParser(routes)
+
+    assert len(parser._combined_regexes) > 1
+    assert parser.parse_path("M:/route_99/a/b") == (
+        "route_99",
+        {"first": "a", "second": "b"},
+    )
+
+
+def test_parse_path_routes_yml():
+    route_name, fields = route_compiler.parse_path(
+        "M:/Projekte/2018/Finding_Dory/Assets/Prop/Hank/Hank_Alembic"
+    )
+
+    assert route_name == "asset_alembic"
+    assert fields == {
+        "project_year": "2018",
+        "project_name": "Finding_Dory",
+        "asset_type": "Prop",
+        "code": "Hank",
+    }
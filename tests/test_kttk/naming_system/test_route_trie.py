@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+from kttk.naming_system.route_compiler import RouteParser
+from kttk.naming_system.route_trie import RouteTrie
+from tests.test_kttk.naming_system.test_route_compiler import ROUTES
+
+
+def _names(routes):
+    return [route.name for route in routes]
+
+
+def test_candidates():
+    trie = RouteTrie(ROUTES)
+
+    assert _names(trie.candidates("M:/Projekte/2018/Dory/Shots/shot010")) == [
+        "shot_folder"
+    ]
+    # segments match, the backreference is checked when parsing
+    assert _names(
+        trie.candidates("M:/Projekte/2018/Dory/Shots/shot010/shot020_Maya")
+    ) == ["shot_maya"]
+    assert trie.candidates("M:/Projekte/18/Dory") == []
+    assert trie.candidates("M:/Projekte/2018/Dory/Shots/shot010/more/segments") == []
+
+
+def test_candidates_most_specific_first():
+    trie = RouteTrie({"any_folder": "M:/{folder}", "shots": "M:/Shots"})
+
+    assert _names(trie.candidates("M:/Shots")) == ["shots", "any_folder"]
+    assert _names(trie.candidates("M:/Assets")) == ["any_folder"]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "M:/Projekte/2018",
+        "M:/Projekte/2018/Dory",
+        "M:/Projekte/2018/Dory/Shots/shot010",
+        r"M:\Projekte\2018\Dory\Shots\shot010\shot010_Maya",
+        "M:/Projekte/2018/Dory/Shots/shot010/shot020_Maya",
+        "shot010_anim_v001.mb",
+        "M:/Projekte/2018/Dory/Assets/Hank",
+        "",
+    ],
+)
+def test_parse_path_same_as_route_parser(path):
+    assert RouteTrie(ROUTES).parse_path(path) == RouteParser(ROUTES).parse_path(path)
+
+
+def _parse_linear(compiled_routes, path):
+    # try each route in turn, most specific first
+    for route in compiled_routes:
+        fields = route.parse(path)
+        if fields is not None:
+            return route.name, fields
+    return None
+
+
+def test_route_parser_uses_trie_for_many_routes():
+    routes = dict(ROUTES)
+    for department in range(40):
+        routes[
+            "department_{}".format(department)
+        ] = "{{project_folder}}/Department{}/{{code}}/{{code}}_Sub".format(department)
+    routes["any_department"] = "{project_folder}/{department}/{code}/{code}_Sub"
+    parser = RouteParser(routes)
+
+    assert parser._trie is not None
+    assert RouteParser(ROUTES)._trie is None
+    for path in [
+        "M:/Projekte/2018/Dory/Department7/shot010/shot010_Sub",
+        "M:/Projekte/2018/Dory/Department7/shot010/shot020_Sub",
+        "M:/Projekte/2018/Dory/Lighting/shot010/shot010_Sub",
+        r"M:\Projekte\2018\Dory\Shots\shot010\shot010_Maya",
+        "M:/Projekte/2018/Dory/Assets/Hank",
+        "M:/Projekte/2018",
+        "",
+    ]:
+        assert parser.parse_path(path) == _parse_linear(parser.routes, path)
+    assert parser.parse_path(
+        "M:/Projekte/2018/Dory/Department7/shot010/shot010_Sub"
+    ) == (
+        "department_7",
+        {"project_year": "2018", "project_name": "Dory", "code": "shot010"},
+    )
+
+
+def test_route_parser_route_names_with_trie():
+    routes = {
+        "route_{}".format(i): "M:/route_{}/{{first}}/{{second}}".format(i)
+        for i in range(100)
+    }
+    parser = RouteParser(routes, route_names=["route_1", "route_2"])
+    all_routes_parser = RouteParser(routes)
+
+    assert all_routes_parser._trie is not None
+    assert parser.parse_path("M:/route_2/a/b") == (
+        "route_2",
+        {"first": "a", "second": "b"},
+    )
+    assert parser.parse_path("M:/route_3/a/b") is None
+    assert all_routes_parser.parse_path("M:/route_3/a/b") == _parse_linear(
+        all_routes_parser.routes, "M:/route_3/a/b"
+    )
+
+
+@pytest.mark.slow
+def test_benchmark_trie_against_brute_force():
+    routes = {"project_root": "M:/Projekte/{project_year}"}
+    for department in range(50):
+        for sub_folder in range(20):
+            routes[
+                "department_{}_{}".format(department, sub_folder)
+            ] = "{{project_root}}/Department{}/{{project_name}}/Shots/{{code}}/{{code}}_Sub{}".format(
+                department, sub_folder
+            )
+    paths = [
+        "M:/Projekte/2018/Department{}/Dory/Shots/shot{}/shot{}_Sub{}".format(
+            i % 50, i, i, i % 20
+        )
+        for i in range(10000)
+    ]
+
+    start = time.time()
+    trie = RouteTrie(routes)
+    build_time = time.time() - start
+
+    compiled_routes = RouteParser(routes).routes
+
+    start = time.time()
+    brute_force_results = [_parse_linear(compiled_routes, path) for path in paths]
+    brute_force_time = time.time() - start
+
+    start = time.time()
+    trie_results = [trie.parse_path(path) for path in paths]
+    trie_time = time.time() - start
+
+    print(
+        "\nmatch {} paths against {} routes: brute force {:.3f}s, trie {:.3f}s (+ {:.3f}s building the trie)".format(
+            len(paths), len(routes), brute_force_time, trie_time, build_time
+        )
+    )
+    assert trie_results == brute_force_results
+    assert all(trie_results)
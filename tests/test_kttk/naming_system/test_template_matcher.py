@@ -1,3 +1,5 @@
+import time
+
 import pytest
 
 from kttk.naming_system.path_token_matcher import PathTokenSequenceMatcher
@@ -133,6 +135,55 @@ class TestTemplateMatcher(object):
 
         assert matcher.matches() == values
 
+    def test_reuse_matcher(self):
+        matcher = PathTokenSequenceMatcher(self.COMBINED_PLACEHOLDERS)
+
+        assert matcher.match("M:/test/test_archive")["project_name"] == "test"
+        assert not matcher.match("M:/test/tesst_archive")
+        assert matcher.match("M:/other/other_archive")["project_name"] == "other"
+
+        # cached results can not be changed by the caller
+        matcher.match("M:/test/test_archive")["project_name"] = "changed"
+        assert matcher.match("M:/test/test_archive")["project_name"] == "test"
+
+    @pytest.mark.slow
+    def test_benchmark_match_100k_paths(self):
+        templates = [
+            self.PROJECT_LOCATION,
+            self.ASSET_TYPE_FOLDER,
+            self.COMBINED_PLACEHOLDERS,
+            self.PROJECT_NAME_WITH_UNDERSCORE,
+        ]
+        paths = []
+        for i in range(25000):
+            paths.append("M:/Projekte/{}".format(1000 + i % 9000))
+            paths.append("M:/Projekte/2018/project{}/Assets/Prop".format(i))
+            paths.append("M:/project{0}/project{0}_archive".format(i))
+            paths.append("project{0}/project{0}_Prop_v{1:03d}.mb".format(i, i % 1000))
+
+        start = time.time()
+        old_matches = sum(
+            1
+            for path in paths
+            for template in templates
+            if PathTokenSequenceMatcher(template, path).matches()
+        )
+        old_time = time.time() - start
+
+        matchers = [PathTokenSequenceMatcher(template) for template in templates]
+        start = time.time()
+        new_matches = sum(
+            1 for path in paths for matcher in matchers if matcher.match(path)
+        )
+        new_time = time.time() - start
+
+        print(
+            "\nmatch {} paths against {} templates: new matcher per path {:.3f}s, reused matchers {:.3f}s".format(
+                len(paths), len(templates), old_time, new_time
+            )
+        )
+        assert old_matches == new_matches >= len(paths)
+
     def _test_should_match_template_debug(self):
         matcher = PathTokenSequenceMatcher(
             self.PROJECT_NAME_WITH_UNDERSCORE, "test_ing/test_ing_Prop_v001.mb"
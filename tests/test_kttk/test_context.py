@@ -1,9 +1,14 @@
 import datetime
+import json
+import time
+
+import bson
 
 import pytest
 from mock import mock
 
-from kttk.context import Context
+from ktrack_api.ktrack import Ktrack
+from kttk.context import COMPACT_FORMAT_VERSION, Context, clear_tokens_cache
 
 
 def _is_entity_id_dict(entity_dict):
@@ -87,6 +92,88 @@ def test_serialize_deserialize(populated_context):
     assert context.user == populated_context.user
 
 
+def test_serialize_compact(populated_context):
+    # type: (Context) -> None
+    serialized = populated_context.serialize()
+
+    assert json.loads(serialized) == [COMPACT_FORMAT_VERSION] + list(
+        populated_context.id_tuple()
+    )
+    assert len(serialized) < len(json.dumps(populated_context.as_dict()))
+
+
+def test_deserialize_legacy_format(populated_context):
+    # type: (Context) -> None
+    legacy_serialized = json.dumps(populated_context.as_dict())
+
+    assert Context.deserialize(legacy_serialized) == populated_context
+
+
+def test_deserialize_unsupported_version(populated_context):
+    # type: (Context) -> None
+    with pytest.raises(ValueError):
+        Context.deserialize(json.dumps([99, "project_id"]))
+
+
+def test_compact_dict(populated_context):
+    # type: (Context) -> None
+    compact_dict = populated_context.as_compact_dict()
+
+    assert Context.from_compact_dict(compact_dict) == populated_context
+
+    # None values are not stored
+    compact_dict = Context(project=populated_context.project).as_compact_dict()
+    assert compact_dict == {
+        "v": COMPACT_FORMAT_VERSION,
+        "p": populated_context.project["id"],
+    }
+    assert Context.from_compact_dict(compact_dict) == Context(
+        project=populated_context.project
+    )
+
+    # legacy dicts are still supported
+    assert Context.from_compact_dict(populated_context.as_dict()) == populated_context
+
+
+@pytest.mark.slow
+def test_benchmark_serialization(populated_context):
+    # type: (Context) -> None
+    count = 100000
+
+    def measure(serialize, deserialize):
+        data = serialize(populated_context)
+        start = time.time()
+        for _ in range(count):
+            deserialize(data)
+        return len(data), time.time() - start
+
+    legacy_size, legacy_time = measure(
+        lambda context: json.dumps(context.as_dict()), Context.deserialize
+    )
+    compact_size, compact_time = measure(
+        lambda context: context.serialize(), Context.deserialize
+    )
+    legacy_bson_size = len(bson.BSON.encode({"context": populated_context.as_dict()}))
+    compact_bson_size = len(
+        bson.BSON.encode({"context": populated_context.as_compact_dict()})
+    )
+
+    print(
+        "\nparse {} contexts: legacy {} bytes {:.3f}s, compact {} bytes {:.3f}s. "
+        "path entry context: legacy {} bytes, compact {} bytes".format(
+            count,
+            legacy_size,
+            legacy_time,
+            compact_size,
+            compact_time,
+            legacy_bson_size,
+            compact_bson_size,
+        )
+    )
+    assert compact_size < legacy_size
+    assert compact_bson_size < legacy_bson_size
+
+
 def test_repesentation(populated_context):
     # type: (Context) -> None
 
@@ -107,6 +194,66 @@ def test_get_avaible_tokens(populated_context):
     assert tokens["version"] == "v001"
 
 
+def test_get_avaible_tokens_is_cached(populated_context):
+    # type: (Context) -> None
+    populated_context.get_avaible_tokens()
+
+    with mock.patch("ktrack_api.get_ktrack") as mock_get_ktrack:
+        tokens = populated_context.get_avaible_tokens()
+        # same context from a different instance uses the global cache
+        same_context = Context.from_dict(populated_context.as_dict())
+        same_tokens = same_context.get_avaible_tokens()
+
+        assert not mock_get_ktrack.called
+
+    assert tokens == same_tokens
+    assert tokens["project_name"] == "my_project"
+
+    # returned tokens can be changed without changing the cache
+    tokens["version"] = 2
+    assert populated_context.get_avaible_tokens()["version"] == "v001"
+
+
+def test_get_avaible_tokens_single_query(populated_context):
+    # type: (Context) -> None
+    with mock.patch(
+        "ktrack_api.ktrack.Ktrack.find_links",
+        autospec=True,
+        side_effect=Ktrack.find_links,
+    ) as mock_find_links:
+        populated_context.get_avaible_tokens()
+
+        assert mock_find_links.call_count == 1
+
+
+def test_refresh(populated_context, ktrack_instance):
+    # type: (Context, Ktrack) -> None
+    populated_context.get_avaible_tokens()
+
+    ktrack_instance.update(
+        "task", populated_context.task["id"], {"name": "renamed_task"}
+    )
+    assert populated_context.get_avaible_tokens()["task_name"] == "task"
+
+    populated_context.refresh()
+    assert populated_context.get_avaible_tokens()["task_name"] == "renamed_task"
+
+
+def test_token_snapshot(populated_context):
+    # type: (Context) -> None
+    snapshot = populated_context.token_snapshot()
+    clear_tokens_cache()
+
+    context = Context.deserialize(populated_context.serialize())
+    with mock.patch("ktrack_api.get_ktrack") as mock_get_ktrack:
+        context.restore_token_snapshot(snapshot)
+        tokens = context.get_avaible_tokens()
+
+        assert not mock_get_ktrack.called
+
+    assert tokens == populated_context.get_avaible_tokens()
+
+
 def test_validate_entity_dict():
     context = Context()
     # test None
@@ -191,6 +338,24 @@ def test_context_immutable():
         context.user = {"type": "project", "id": 123}
 
 
+def test_context_hashable(populated_context):
+    same_context = Context.deserialize(populated_context.serialize())
+    other_context = populated_context.copy_context(step="comp")
+
+    contexts = {populated_context: "context"}
+
+    assert contexts[same_context] == "context"
+    assert other_context not in contexts
+    assert hash(populated_context.populate_context()) == hash(populated_context)
+
+    # links are shared between contexts with the same entities
+    assert same_context.project is populated_context.project
+
+    # slots only, no instance dict per context
+    assert not hasattr(populated_context, "__dict__")
+    assert not hasattr(populated_context.populate_context(), "__dict__")
+
+
 def test_copy_context(populated_context):
     # test project
     new_context = populated_context.copy_context(project={"type": "project", "id": 123})
@@ -249,36 +414,6 @@ def test_copy_context(populated_context):
     assert new_context.user == {"type": "user", "id": 123}
 
 
-def test_entity_dicts_equal():
-    context = Context()
-    # both None, match
-    assert context._entity_dicts_equal(None, None)
-
-    # one None
-    assert not context._entity_dicts_equal(None, {})
-    assert not context._entity_dicts_equal({}, None)
-
-    # both are equal, id and type match
-    assert context._entity_dicts_equal(
-        {"type": "project", "id": "123"}, {"type": "project", "id": "123"}
-    )
-
-    # not equal because of id
-    assert not context._entity_dicts_equal(
-        {"type": "project", "id": "13"}, {"type": "project", "id": "123"}
-    )
-
-    # not equal because of type
-    assert not context._entity_dicts_equal(
-        {"type": "projeect", "id": "123"}, {"type": "project", "id": "123"}
-    )
-
-    # not equal because of id and type
-    assert not context._entity_dicts_equal(
-        {"type": "projeect", "id": "13"}, {"type": "project", "id": "123"}
-    )
-
-
 def test_context__equal__(populated_context):
     context_left = Context()
     context_right = Context()
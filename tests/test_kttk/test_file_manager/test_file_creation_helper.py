@@ -1,8 +1,10 @@
+import copy
 import os
 
 import pytest
 from mock import MagicMock, patch
 
+from kttk import template_manager
 from kttk.context import Context
 from kttk.file_manager.file_creation_helper import FileCreationHelper
 
@@ -126,6 +128,47 @@ def test_create_workfile_from_existing_with_comment(
         assert new_workfile["comment"] == "MY COMMENT"
 
 
+def test_create_workfile_from_existing_on_disk(
+    file_creation_helper, populated_context, ktrack_instance, tmpdir
+):
+    # scene file without workfile in database, for example after a crash
+    tmpdir.join("my_entity_task_anim_v005.mb").write("")
+
+    mock_routes = copy.deepcopy(template_manager._data_routes)
+    mock_routes["dcc_scenes_location_asset_maya"] = str(tmpdir)
+
+    with patch("ktrack_api.get_ktrack") as mock_get_ktrack, patch.object(
+        template_manager, "_data_routes", mock_routes
+    ):
+        mock_get_ktrack.return_value = ktrack_instance
+
+        new_workfile = file_creation_helper._create_workfile_from(
+            populated_context, {"version_number": 1, "id": "some_id"}
+        )
+
+    assert new_workfile["version_number"] == 6
+    assert new_workfile["name"] == "my_entity_task_anim_v006.mb"
+
+
+def test_create_workfile_from_same_workfile_twice(
+    file_creation_helper, populated_context, ktrack_instance
+):
+    # two artists advance the same workfile at the same time
+    with patch("ktrack_api.get_ktrack") as mock_get_ktrack:
+        mock_get_ktrack.return_value = ktrack_instance
+
+        previous_workfile = {"version_number": 1, "id": "some_id"}
+        first_workfile = file_creation_helper._create_workfile_from(
+            populated_context, previous_workfile
+        )
+        second_workfile = file_creation_helper._create_workfile_from(
+            populated_context, previous_workfile
+        )
+
+    assert first_workfile["version_number"] == 2
+    assert second_workfile["version_number"] == 3
+
+
 def test_get_highest_workfile_existing_workfiles(file_creation_helper, ktrack_instance):
     # mock database
     with patch("ktrack_api.get_ktrack") as mock_get_ktrack:
@@ -0,0 +1,76 @@
+import os
+
+import mock
+import pytest
+
+from kttk.file_manager import version_index
+from kttk.file_manager.version_index import DiskVersionIndex
+
+
+@pytest.fixture
+def workfile_folder(tmpdir):
+    for file_name in [
+        "shot010_anim_anim_v001.mb",
+        "shot010_anim_anim_v003.ma",
+        "shot010_layout_layout_v007.mb",
+        "shot010_anim_anim_v001.mb.bak",
+        "notes.txt",
+    ]:
+        tmpdir.join(file_name).write("")
+    tmpdir.mkdir("shot010_anim_anim_v009.mb")
+    return str(tmpdir)
+
+
+def test_highest_version(workfile_folder):
+    index = DiskVersionIndex()
+
+    assert index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb") == 3
+    assert index.highest_version(workfile_folder, "shot010_layout_layout_v001.mb") == 7
+    assert index.highest_version(workfile_folder, "shot020_anim_anim_v001.mb") == 0
+
+    # no workfile name
+    assert index.highest_version(workfile_folder, "notes.txt") == 0
+
+
+def test_highest_version_not_existing_folder(tmpdir):
+    index = DiskVersionIndex()
+
+    assert (
+        index.highest_version(
+            str(tmpdir.join("not_existing")), "shot010_anim_anim_v001.mb"
+        )
+        == 0
+    )
+
+
+def test_folder_is_cached_by_mtime(workfile_folder):
+    index = DiskVersionIndex()
+    index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb")
+
+    with mock.patch(
+        "kttk.file_manager.version_index.scandir", side_effect=version_index.scandir
+    ) as mock_scandir:
+        # folder did not change, no need to list it again
+        assert index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb") == 3
+        assert not mock_scandir.called
+
+        # new file changes mtime of folder
+        open(os.path.join(workfile_folder, "shot010_anim_anim_v004.mb"), "w").close()
+        mtime = os.stat(workfile_folder).st_mtime
+        os.utime(workfile_folder, (mtime + 10, mtime + 10))
+
+        assert index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb") == 4
+        assert mock_scandir.call_count == 1
+
+
+def test_invalidate(workfile_folder):
+    index = DiskVersionIndex()
+    index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb")
+
+    index.invalidate(workfile_folder)
+
+    with mock.patch(
+        "kttk.file_manager.version_index.scandir", side_effect=version_index.scandir
+    ) as mock_scandir:
+        index.highest_version(workfile_folder, "shot010_anim_anim_v001.mb")
+        assert mock_scandir.called
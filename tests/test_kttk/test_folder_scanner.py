@@ -0,0 +1,143 @@
+import copy
+import os
+
+import pytest
+from mock import patch
+
+from kttk import folder_manager, folder_scanner, path_cache_manager, template_manager
+
+
+@pytest.fixture
+def project_root(tmpdir):
+    """Routes with project root set to a temporary folder"""
+    mock_routes = copy.deepcopy(template_manager._data_routes)
+    mock_routes["project_root"] = str(tmpdir)
+
+    with patch.object(template_manager, "_data_routes", mock_routes):
+        yield str(tmpdir)
+
+
+@pytest.fixture
+def initialised_asset(ktrack_instance, project_root):
+    """Project and asset with all folders created on disk, the registered folders are returned"""
+    project = ktrack_instance.create("project", {"name": "My_Test_Project"})
+    asset = ktrack_instance.create(
+        "asset", {"project": project, "code": "Remote_Control", "asset_type": "Prop"}
+    )
+
+    folder_manager.init_entity("project", project["id"])
+    folder_manager.init_entity("asset", asset["id"])
+
+    # folders containing files are registered twice
+    registered_folders = {
+        path_entry["path"]
+        for path_entry in ktrack_instance.find("path_entry", [])
+        if os.path.isdir(path_entry["path"])
+    }
+    return project, asset, registered_folders
+
+
+def _delete_path_entries(ktrack_instance):
+    for path_entry in ktrack_instance.find("path_entry", []):
+        ktrack_instance.delete("path_entry", path_entry["id"])
+
+
+def test_walk_directories(tmpdir):
+    tmpdir.mkdir("a").mkdir("b")
+    tmpdir.mkdir("c")
+    tmpdir.join("file.txt").write("")
+
+    directories = folder_scanner.walk_directories(str(tmpdir), max_workers=2)
+
+    assert directories[0] == str(tmpdir)
+    assert sorted(directories[1:]) == [
+        str(tmpdir.join("a")),
+        str(tmpdir.join("a", "b")),
+        str(tmpdir.join("c")),
+    ]
+
+
+def test_walk_directories_not_existing(tmpdir):
+    not_existing = str(tmpdir.join("not_existing"))
+
+    assert folder_scanner.walk_directories(not_existing) == [not_existing]
+
+
+def test_scan(ktrack_instance, project_root, initialised_asset):
+    project, asset, registered_folders = initialised_asset
+    _delete_path_entries(ktrack_instance)
+
+    result = folder_scanner.scan(os.path.join(project_root, "My_Test_Project"))
+
+    assert sorted(result.registered) == sorted(registered_folders)
+    assert result.already_registered == []
+    assert result.mismatches == []
+    assert result.directories == len(registered_folders) + len(result.unmatched)
+
+    # contexts are restored
+    asset_folder = "{}/My_Test_Project/Assets/Prop/Remote_Control".format(
+        path_cache_manager.normalize_path(project_root)
+    )
+    context = path_cache_manager.context_from_path(asset_folder)
+    assert context.project["id"] == project["id"]
+    assert context.entity["id"] == asset["id"]
+
+    # nothing new to register
+    result = folder_scanner.scan(os.path.join(project_root, "My_Test_Project"))
+
+    assert result.registered == []
+    assert sorted(result.already_registered) == sorted(registered_folders)
+
+
+def test_scan_legacy_path_entries(ktrack_instance, project_root, initialised_asset):
+    project, asset, registered_folders = initialised_asset
+    # registered before path entries had id fields
+    for path_entry in ktrack_instance.find("path_entry", []):
+        context = path_cache_manager.context_from_path(path_entry["path"])
+        ktrack_instance.delete("path_entry", path_entry["id"])
+        ktrack_instance.create(
+            "path_entry", {"path": path_entry["path"], "context": context.as_dict()}
+        )
+
+    result = folder_scanner.scan(os.path.join(project_root, "My_Test_Project"))
+
+    assert result.registered == []
+    assert sorted(result.already_registered) == sorted(registered_folders)
+
+
+def test_scan_dry_run(ktrack_instance, project_root, initialised_asset):
+    project, asset, registered_folders = initialised_asset
+    _delete_path_entries(ktrack_instance)
+
+    result = folder_scanner.scan(project_root, dry_run=True)
+
+    assert sorted(result.registered) == sorted(registered_folders)
+    assert ktrack_instance.find("path_entry", []) == []
+
+
+def test_scan_mismatches(ktrack_instance, project_root, initialised_asset):
+    assets_folder = os.path.join(project_root, "My_Test_Project", "Assets")
+    os.makedirs(os.path.join(assets_folder, "Prop", "Unknown_Asset"))
+    os.makedirs(os.path.join(assets_folder, "Character", "Remote_Control"))
+    os.makedirs(os.path.join(project_root, "Unknown_Project", "Shots", "shot010"))
+    os.makedirs(os.path.join(assets_folder, "Prop", "Remote_Control", "misc"))
+
+    result = folder_scanner.scan(project_root)
+
+    normalized_root = path_cache_manager.normalize_path(project_root)
+    mismatches = dict(result.mismatches)
+    assert mismatches == {
+        normalized_root
+        + "/My_Test_Project/Assets/Prop/Unknown_Asset": "asset Unknown_Asset not found in project My_Test_Project",
+        normalized_root
+        + "/My_Test_Project/Assets/Character/Remote_Control": "asset Remote_Control has asset type Prop, not Character",
+        normalized_root + "/Unknown_Project": "project Unknown_Project not found",
+        normalized_root + "/Unknown_Project/Shots": "project Unknown_Project not found",
+        normalized_root
+        + "/Unknown_Project/Shots/shot010": "project Unknown_Project not found",
+    }
+    assert (
+        normalized_root + "/My_Test_Project/Assets/Prop/Remote_Control/misc"
+        in result.unmatched
+    )
+    assert result.registered == []
@@ -0,0 +1,96 @@
+import pytest
+import six
+from mock import MagicMock
+
+from ktrack_api.ktrack import Ktrack
+
+if six.PY3:
+    import asyncio
+
+    from ktrack_api.async_ktrack import AsyncKtrack
+
+py3_only = pytest.mark.skipif(not six.PY3, reason="asyncio requires Python 3")
+
+
+@pytest.fixture
+def async_ktrack(ktrack_instance):
+    async_kt = AsyncKtrack(Ktrack(ktrack_instance))
+    yield async_kt
+    async_kt.close()
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@py3_only
+def test_create_find_one(async_ktrack):
+    project = _run(async_ktrack.create("project", {"name": "my_project"}))
+
+    assert _run(async_ktrack.find_one("project", project["id"]))["name"] == "my_project"
+
+
+@py3_only
+def test_update_delete(async_ktrack):
+    project = _run(async_ktrack.create("project", {"name": "my_project"}))
+
+    _run(async_ktrack.update("project", project["id"], {"name": "other"}))
+    assert _run(async_ktrack.find_one("project", project["id"]))["name"] == "other"
+
+    _run(async_ktrack.delete("project", project["id"]))
+    assert _run(async_ktrack.find_one("project", project["id"])) is None
+
+
+@py3_only
+def test_find(async_ktrack):
+    project = _run(async_ktrack.create("project", {"name": "my_project"}))
+    _run(async_ktrack.create("shot", {"code": "shot010", "project": project}))
+
+    shots = _run(async_ktrack.find("shot", [["project", "is", project]]))
+
+    assert len(shots) == 1
+    assert shots[0]["code"] == "shot010"
+
+
+@py3_only
+def test_find_links(async_ktrack, populated_context):
+    project, entity, task, nothing = _run(
+        async_ktrack.find_links(
+            [
+                populated_context.project,
+                populated_context.entity,
+                populated_context.task,
+                None,
+            ]
+        )
+    )
+
+    assert project["name"] == "my_project"
+    assert entity["code"] == "my_entity"
+    assert task["name"] == "task"
+    assert nothing is None
+
+
+@py3_only
+def test_find_many(async_ktrack, populated_context):
+    tasks, workfiles = _run(
+        async_ktrack.find_many(
+            [
+                ("task", [["entity", "is", populated_context.entity]]),
+                ("workfile", [["entity", "is", populated_context.task]]),
+            ]
+        )
+    )
+
+    assert len(tasks) == 1
+    assert len(workfiles) == 1
+
+
+@py3_only
+def test_close_does_not_shutdown_foreign_executor():
+    executor = MagicMock()
+    async_kt = AsyncKtrack(MagicMock(), executor=executor)
+
+    async_kt.close()
+
+    assert not executor.shutdown.called
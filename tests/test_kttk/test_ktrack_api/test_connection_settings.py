@@ -0,0 +1,135 @@
+import os
+
+import mock
+import pytest
+from pymongo import ReadPreference
+
+from ktrack_api import connection_settings, ktrack
+from ktrack_api.connection_settings import ConnectionSettings
+from ktrack_api.mongo_impl.ktrack_mongo_impl import KtrackMongoImpl
+from kttk.config import config_manager
+
+
+@pytest.fixture
+def config_values():
+    """Patches general.yml values, keys not in the returned dict are missing"""
+    values = {}
+
+    def get_value(key):
+        return values[key]
+
+    with mock.patch.object(config_manager, "get_value", side_effect=get_value):
+        yield values
+
+
+@pytest.fixture
+def clean_environment():
+    environment = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(connection_settings.ENV_PREFIX + "DATABASE_")
+    }
+    with mock.patch.dict(os.environ, environment, clear=True):
+        yield
+
+
+def test_load_defaults(config_values, clean_environment):
+    assert connection_settings.load_connection_settings() == ConnectionSettings()
+
+
+def test_load_from_config(config_values, clean_environment):
+    config_values.update(
+        {
+            "database_uri": "mongodb://db1,db2/ktrack?replicaSet=rs0",
+            "database_name": "ktrack",
+            "database_max_pool_size": "50",
+            "database_server_selection_timeout_ms": "5000",
+            "database_connect_timeout_ms": "",
+            "database_read_preference": "secondaryPreferred",
+            "database_write_concern": "majority",
+        }
+    )
+
+    assert connection_settings.load_connection_settings() == ConnectionSettings(
+        uri="mongodb://db1,db2/ktrack?replicaSet=rs0",
+        database_name="ktrack",
+        max_pool_size=50,
+        server_selection_timeout_ms=5000,
+        read_preference="secondaryPreferred",
+        write_concern="majority",
+    )
+
+
+def test_environment_overrides_config(config_values, clean_environment):
+    config_values.update(
+        {"database_read_preference": "primary", "database_write_concern": "1"}
+    )
+    os.environ["KTRACK_DATABASE_READ_PREFERENCE"] = "nearest"
+    os.environ["KTRACK_DATABASE_URI"] = "sqlite:////data/ktrack.db"
+
+    settings = connection_settings.load_connection_settings()
+
+    assert settings.read_preference == "nearest"
+    assert settings.uri == "sqlite:////data/ktrack.db"
+    assert settings.write_concern == 1
+
+
+@pytest.mark.parametrize(
+    "key,value",
+    [
+        ("database_read_preference", "secondary_preferred"),
+        ("database_max_pool_size", "many"),
+    ],
+)
+def test_invalid_setting(config_values, clean_environment, key, value):
+    config_values[key] = value
+
+    with pytest.raises(config_manager.InvalidConfigException):
+        connection_settings.load_connection_settings()
+
+
+def test_mongo_connect_kwargs():
+    settings = ConnectionSettings(
+        max_pool_size=50, socket_timeout_ms=1000, read_preference="secondaryPreferred"
+    )
+
+    assert settings.mongo_connect_kwargs() == {
+        "read_preference": ReadPreference.SECONDARY_PREFERRED,
+        "maxPoolSize": 50,
+        "socketTimeoutMS": 1000,
+    }
+
+
+def test_mongo_impl_connects_with_settings():
+    settings = ConnectionSettings(
+        database_name="ktrack", max_pool_size=50, write_concern="majority"
+    )
+
+    with mock.patch("ktrack_api.mongo_impl.ktrack_mongo_impl.connect") as mock_connect:
+        KtrackMongoImpl("mongodb://db1/", settings)
+
+    mock_connect.assert_called_once_with(
+        "ktrack",
+        host="mongodb://db1/",
+        read_preference=ReadPreference.PRIMARY,
+        maxPoolSize=50,
+        w="majority",
+    )
+
+
+def test_get_ktrack_uses_configured_uri(config_values, clean_environment):
+    config_values["database_uri"] = "mongodb://db1/ktrack"
+
+    with mock.patch.object(ktrack, "_connection_url", None), mock.patch(
+        "ktrack_api.mongo_impl.ktrack_mongo_impl.connect"
+    ) as mock_connect:
+        ktrack.get_ktrack()
+
+    assert mock_connect.call_args[1]["host"] == "mongodb://db1/ktrack"
+
+
+def test_general_yml_is_valid(clean_environment):
+    settings = connection_settings.load_connection_settings()
+
+    assert settings.uri
+    assert settings.read_preference in connection_settings.READ_PREFERENCES
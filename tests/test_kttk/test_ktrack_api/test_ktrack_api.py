@@ -1,12 +1,27 @@
 import datetime
 import getpass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import mongomock
 import pytest
 from bson import ObjectId
 from mongoengine import Document, DateTimeField, StringField, DictField
 
 from ktrack_api.exceptions import EntityMissing, EntityNotFoundException
-from ktrack_api.mongo_impl.entities import Project, entities
-from ktrack_api.mongo_impl.ktrack_mongo_impl import KtrackMongoImpl, _convert_to_dict
+from ktrack_api.mongo_impl.entities import (
+    Project,
+    ProjectEntity,
+    entities,
+    get_index_specs,
+)
+from ktrack_api.mongo_impl.ktrack_mongo_impl import (
+    KtrackMongoImpl,
+    _convert_to_dict,
+    _convert_raw_to_dict,
+)
 
 SOME_OTHER_OBJECT_ID = "507f1f77bcf86cd799439011"
 
@@ -147,6 +162,41 @@ def test_delete(ktrack_instance):
     assert len(entity_in_db) == 0
 
 
+def test_update_many(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    project = ktrack_instance.create("project", {"name": "project"})
+    shot = ktrack_instance.create(
+        "shot", {"project": project, "code": "shot010", "cut_in": 1001}
+    )
+    # dates are stored with millisecond precision, so compare with the stored date and make sure time passes
+    project = ktrack_instance.find_one("project", project["id"])
+    time.sleep(0.002)
+
+    updated = ktrack_instance.update_many(
+        [
+            ("project", project["id"], {"thumbnail": {"path": "project.png"}}),
+            ("shot", shot["id"], {"thumbnail": {"path": "shot.png"}, "cut_in": 1}),
+            ("shot", SOME_OBJECT_ID, {"code": "not_existing"}),
+            ("shot", "invalid_id", {"code": "not_existing"}),
+        ]
+    )
+
+    assert updated == [True, True, False, False]
+
+    project_in_db = ktrack_instance.find_one("project", project["id"])
+    assert project_in_db["thumbnail"] == {"path": "project.png"}
+    assert project_in_db["name"] == "project"
+    assert project_in_db["updated_at"] > project["updated_at"]
+
+    shot_in_db = ktrack_instance.find_one("shot", shot["id"])
+    assert shot_in_db["thumbnail"] == {"path": "shot.png"}
+    assert shot_in_db["cut_in"] == 1
+    assert shot_in_db["code"] == "shot010"
+
+    with pytest.raises(EntityMissing):
+        ktrack_instance.update_many([("not_existing", SOME_OBJECT_ID, {})])
+
+
 def test_find(ktrack_instance):
     # type: (KtrackMongoImpl) -> None
 
@@ -177,6 +227,120 @@ def test_find_field_value(ktrack_instance):
     assert len(entities) == 1
 
 
+def test_find_in(ktrack_instance):
+    for code in ["shot010", "shot020", "shot030"]:
+        ktrack_instance.create(
+            "shot", {"project": {"type": "project", "id": SOME_OBJECT_ID}, "code": code}
+        )
+    ktrack_instance.create(
+        "shot", {"project": {"type": "project", "id": SOME_OTHER_OBJECT_ID}}
+    )
+
+    entities = ktrack_instance.find("shot", [["code", "in", ["shot010", "shot030"]]])
+    assert sorted(entity["code"] for entity in entities) == ["shot010", "shot030"]
+
+    # links are matched by id
+    entities = ktrack_instance.find(
+        "shot",
+        [
+            [
+                "project",
+                "in",
+                [
+                    {"type": "project", "id": SOME_OBJECT_ID},
+                    {"type": "project", "id": SOME_OTHER_OBJECT_ID},
+                ],
+            ]
+        ],
+    )
+    assert len(entities) == 4
+
+
+def test_create_many(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    with pytest.raises(EntityMissing):
+        ktrack_instance.create_many("projectaersrdtz", [{}])
+
+    assert ktrack_instance.create_many("project", []) == []
+
+    projects = ktrack_instance.create_many(
+        "project", [{"name": "project_a"}, {"name": "project_b"}]
+    )
+
+    assert [project["name"] for project in projects] == ["project_a", "project_b"]
+    for project in projects:
+        assert project["type"] == "project"
+        assert project["updated_at"]
+        assert (
+            ktrack_instance.find_one("project", project["id"])["name"]
+            == project["name"]
+        )
+
+
+def test_allocate_version(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    task = {"type": "task", "id": SOME_OBJECT_ID}
+    other_task = {"type": "task", "id": SOME_OTHER_OBJECT_ID}
+
+    assert ktrack_instance.allocate_version(task) == 1
+    assert ktrack_instance.allocate_version(task) == 2
+    assert ktrack_instance.allocate_version(other_task) == 1
+
+    # minimum version, for example from files on disk
+    assert ktrack_instance.allocate_version(task, minimum_version=10) == 10
+    assert ktrack_instance.allocate_version(task, minimum_version=5) == 11
+
+
+@pytest.fixture
+def atomic_mongomock():
+    """
+    mongomock does not lock documents like a Mongo server, so two threads updating the same document can interleave.
+    Make single document updates atomic like on a server, so concurrent tests test our code and not mongomock
+    """
+    lock = threading.RLock()
+
+    def atomic(method):
+        def wrapper(*args, **kwargs):
+            with lock:
+                return method(*args, **kwargs)
+
+        return wrapper
+
+    with mock.patch.multiple(
+        mongomock.collection.Collection,
+        update_one=atomic(mongomock.collection.Collection.update_one),
+        find_one_and_update=atomic(mongomock.collection.Collection.find_one_and_update),
+    ):
+        yield
+
+
+def test_allocate_version_concurrent(ktrack_instance, atomic_mongomock):
+    # type: (KtrackMongoImpl, None) -> None
+    task = {"type": "task", "id": SOME_OBJECT_ID}
+    threads_count = 16
+    versions_per_thread = 50
+
+    def allocate_versions(thread_index):
+        versions = []
+        for i in range(versions_per_thread):
+            # some threads found higher versions on disk
+            minimum_version = i * thread_index if thread_index % 4 == 0 else 1
+            version = ktrack_instance.allocate_version(task, minimum_version)
+            assert version >= minimum_version
+            versions.append(version)
+        return versions
+
+    with ThreadPoolExecutor(threads_count) as executor:
+        versions = [
+            version
+            for thread_versions in executor.map(allocate_versions, range(threads_count))
+            for version in thread_versions
+        ]
+
+    # no version was allocated twice
+    assert len(set(versions)) == threads_count * versions_per_thread
+
+
 def test_find_one(ktrack_instance):
     # type: (KtrackMongoImpl) -> None
 
@@ -196,6 +360,140 @@ def test_find_one(ktrack_instance):
     assert entity["id"] == _entity["id"]
 
 
+def test_find_links(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+
+    # test not existing entity type
+    with pytest.raises(EntityMissing):
+        ktrack_instance.find_links([{"type": "<agt<eydrzuyaerz", "id": SOME_OBJECT_ID}])
+
+    project = ktrack_instance.create("project", {"name": "my_project"})
+    shot = ktrack_instance.create("shot", {"code": "shot010", "project": project})
+
+    entities = ktrack_instance.find_links(
+        [
+            {"type": "shot", "id": shot["id"]},
+            None,
+            {"type": "project", "id": project["id"]},
+            {"type": "project", "id": SOME_OBJECT_ID},
+            {"type": "shot", "id": shot["id"]},
+        ]
+    )
+
+    assert entities[0]["code"] == "shot010"
+    assert entities[1] is None
+    assert entities[2]["name"] == "my_project"
+    assert entities[3] is None
+    assert entities[4]["id"] == shot["id"]
+
+
+@pytest.mark.parametrize(
+    "entity_type,data",
+    [
+        ("project", {}),
+        ("project", {"name": "my_project", "thumbnail": {"path": "project.png"}}),
+        ("shot", {"code": "shot010", "cut_in": 1001, "cut_out": 1050}),
+        ("task", {"name": "anim", "entity": {"type": "shot", "id": SOME_OBJECT_ID}}),
+        (
+            "workfile",
+            {
+                "path": "/some/path.mb",
+                "version_number": 1,
+                "entity": {"type": "task", "id": ObjectId(SOME_OBJECT_ID)},
+                "created_from": None,
+            },
+        ),
+        ("path_entry", {"path": "/some/path", "context": {"step": "anim"}}),
+        ("user", {"name": "jane"}),
+    ],
+)
+def test_convert_raw_to_dict_equals_convert_to_dict(ktrack_instance, entity_type, data):
+    # type: (KtrackMongoImpl, str, dict) -> None
+    entity_cls = entities[entity_type]
+    if issubclass(entity_cls, ProjectEntity):
+        data["project"] = {"type": "project", "id": SOME_OTHER_OBJECT_ID}
+    entity = ktrack_instance.create(entity_type, data)
+
+    raw = entity_cls.objects(id=entity["id"]).as_pymongo().first()
+    document = entity_cls.objects(id=entity["id"]).first()
+
+    entity_dict = _convert_raw_to_dict(entity_cls, raw)
+    assert entity_dict == _convert_to_dict(document)
+    assert isinstance(entity_dict["id"], str)
+
+
+def test_convert_raw_to_dict_missing_fields(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    # documents written by an older version or by hand may not contain all fields
+    raw = {"_id": ObjectId(SOME_OBJECT_ID), "name": "my_project"}
+
+    assert _convert_raw_to_dict(Project, raw) == _convert_to_dict(
+        Project._from_son(raw)
+    )
+
+
+def test_get_index_specs():
+    assert get_index_specs(entities["path_entry"]) == [
+        ("path",),
+        ("project_id",),
+        ("entity_type", "entity_id"),
+        ("task_id",),
+    ]
+    assert get_index_specs(entities["workfile"]) == [("entity.id", "version_number")]
+    assert get_index_specs(Project) == []
+
+
+def test_find_keeps_links(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    project = ktrack_instance.create("project", {"name": "my_project"})
+    task_link = {"type": "task", "id": ObjectId(SOME_OBJECT_ID)}
+    ktrack_instance.create(
+        "workfile", {"path": "/some/path.mb", "entity": task_link, "project": project}
+    )
+
+    workfile = ktrack_instance.find("workfile", [["entity", "is", task_link]])[0]
+
+    assert workfile["entity"] == task_link
+    assert workfile["project"]["id"] == project["id"]
+
+
+@pytest.mark.slow
+def test_benchmark_find(ktrack_instance):
+    # type: (KtrackMongoImpl) -> None
+    count = 5000
+    project = ktrack_instance.create("project", {"name": "my_project"})
+    ktrack_instance.create_many(
+        "shot",
+        [
+            {
+                "code": "shot{}".format(i),
+                "cut_in": 1001,
+                "cut_out": 1050,
+                "project": project,
+            }
+            for i in range(count)
+        ],
+    )
+    Shot = entities["shot"]
+
+    start = time.time()
+    document_dicts = [
+        _convert_to_dict(shot) for shot in Shot.objects(project__id=project["id"])
+    ]
+    document_seconds = time.time() - start
+
+    start = time.time()
+    raw_dicts = ktrack_instance.find("shot", [["project", "is", project]])
+    raw_seconds = time.time() - start
+
+    assert raw_dicts == document_dicts
+    print(
+        "\nfind {} shots: mongoengine documents {:.2f}s, raw documents {:.2f}s".format(
+            count, document_seconds, raw_seconds
+        )
+    )
+
+
 """
 def test_project_name_unique(ktrack_instance):
     # type: (KtrackMongoImpl) -> None
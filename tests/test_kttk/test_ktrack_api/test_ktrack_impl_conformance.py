@@ -0,0 +1,393 @@
+"""
+Tests every AbtractKtrackImpl implementation has to pass, run for the mongo and the sqlite implementation
+"""
+import getpass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import pytest
+
+from ktrack_api.exceptions import EntityMissing, EntityNotFoundException
+from ktrack_api.ktrack_impl import AbtractKtrackImpl
+from ktrack_api.sqlite_impl import ktrack_sqlite_impl
+from ktrack_api.sqlite_impl.ktrack_sqlite_impl import KtrackSqliteImpl
+
+SOME_OBJECT_ID = "507f1f77bcf86cd799439012"
+
+
+@pytest.fixture(params=["mongo", "sqlite"])
+def impl(request, tmpdir):
+    if request.param == "mongo":
+        return request.getfixturevalue("ktrack_instance")
+    return KtrackSqliteImpl("sqlite:///" + str(tmpdir.join("ktrack.db")))
+
+
+@pytest.fixture
+def project_and_shot(impl):
+    # type: (AbtractKtrackImpl) -> tuple
+    project = impl.create("project", {"name": "my_project"})
+    shot = impl.create("shot", {"project": project, "code": "shot010", "cut_in": 1001})
+    return project, shot
+
+
+@pytest.mark.parametrize(
+    "connection_uri,path",
+    [
+        ("sqlite://", ":memory:"),
+        ("sqlite:///:memory:", ":memory:"),
+        ("sqlite:///ktrack.db", "ktrack.db"),
+        ("sqlite:////data/ktrack.db", "/data/ktrack.db"),
+        ("sqlite:///C:/data/ktrack.db", "C:/data/ktrack.db"),
+    ],
+)
+def test_database_path(connection_uri, path):
+    assert ktrack_sqlite_impl.database_path(connection_uri) == path
+
+
+def test_create(impl):
+    # type: (AbtractKtrackImpl) -> None
+    with pytest.raises(EntityMissing):
+        impl.create("not_existing_type")
+
+    entity = impl.create("Project", {"name": "my_project", "not_a_field": 1})
+
+    assert type(entity) == dict
+    assert entity["type"] == "project"
+    assert isinstance(entity["id"], str)
+    assert entity["name"] == "my_project"
+    assert entity["thumbnail"] == {}
+    assert entity["created_at"]
+    assert entity["updated_at"]
+    assert entity["created_by"] == getpass.getuser()
+    assert "not_a_field" not in entity
+
+    # mongo stores dates with millisecond precision only
+    entity_in_db = impl.find_one("project", entity["id"])
+    assert {key: entity_in_db[key] for key in entity_in_db if key[-3:] != "_at"} == {
+        key: entity[key] for key in entity if key[-3:] != "_at"
+    }
+
+
+def test_create_defaults(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    assert shot["cut_out"] is None
+    assert shot["project"]["id"] == project["id"]
+
+
+def test_create_many(impl):
+    # type: (AbtractKtrackImpl) -> None
+    assert impl.create_many("project", []) == []
+
+    projects = impl.create_many(
+        "project", [{"name": "project_{}".format(i)} for i in range(3)]
+    )
+
+    assert [project["name"] for project in projects] == [
+        "project_0",
+        "project_1",
+        "project_2",
+    ]
+    assert len({project["id"] for project in projects}) == 3
+    assert sorted(project["id"] for project in impl.find("project", [])) == sorted(
+        project["id"] for project in projects
+    )
+
+
+def test_update(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    with pytest.raises(EntityNotFoundException):
+        impl.update("shot", SOME_OBJECT_ID, {"code": "shot020"})
+
+    impl.update("shot", shot["id"], {"code": "shot020", "cut_out": 1050})
+
+    shot_in_db = impl.find_one("shot", shot["id"])
+    assert shot_in_db["code"] == "shot020"
+    assert shot_in_db["cut_in"] == 1001
+    assert shot_in_db["cut_out"] == 1050
+    assert shot_in_db["project"]["id"] == project["id"]
+
+
+def test_update_many(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    updated = impl.update_many(
+        [
+            ("project", project["id"], {"thumbnail": {"path": "project.png"}}),
+            ("shot", shot["id"], {"code": "shot020"}),
+            ("shot", SOME_OBJECT_ID, {"code": "not_existing"}),
+        ]
+    )
+
+    assert updated == [True, True, False]
+    assert impl.find_one("project", project["id"])["thumbnail"] == {
+        "path": "project.png"
+    }
+    assert impl.find_one("shot", shot["id"])["code"] == "shot020"
+
+
+def test_find(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+    other_project = impl.create("project", {"name": "other_project"})
+    other_shot = impl.create("shot", {"project": other_project, "code": "shot010"})
+
+    with pytest.raises(EntityMissing):
+        impl.find("not_existing_type", [])
+
+    def ids(entities):
+        return sorted(entity["id"] for entity in entities)
+
+    assert ids(impl.find("shot", [])) == ids([shot, other_shot])
+    assert ids(impl.find("shot", [["code", "is", "shot010"]])) == ids(
+        [shot, other_shot]
+    )
+    assert ids(impl.find("shot", [["cut_in", "is", 1001]])) == ids([shot])
+    assert ids(impl.find("shot", [["cut_in", "is", None]])) == ids([other_shot])
+    assert ids(impl.find("shot", [["project", "is", project]])) == ids([shot])
+    assert ids(
+        impl.find(
+            "shot", [["project", "is", {"type": "project", "id": project["id"]}]],
+        )
+    ) == ids([shot])
+    assert ids(
+        impl.find("shot", [["project", "is", other_project], ["code", "is", "shot010"]])
+    ) == ids([other_shot])
+    assert impl.find("shot", [["code", "is", "not_existing"]]) == []
+
+
+def test_find_in(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+    other_project = impl.create("project", {"name": "other_project"})
+    other_shot = impl.create("shot", {"project": other_project, "code": "shot020"})
+    impl.create("project", {"name": "third_project"})
+
+    def codes(entities):
+        return sorted(entity["code"] for entity in entities)
+
+    assert codes(impl.find("shot", [["code", "in", ["shot010", "shot020"]]])) == [
+        "shot010",
+        "shot020",
+    ]
+    assert codes(impl.find("shot", [["project", "in", [project, other_project]]])) == [
+        "shot010",
+        "shot020",
+    ]
+    assert impl.find("shot", [["code", "in", []]]) == []
+    assert [
+        found["id"] for found in impl.find("shot", [["id", "in", [other_shot["id"]]]])
+    ] == [other_shot["id"]]
+
+
+def test_find_in_many_values(impl):
+    # type: (AbtractKtrackImpl) -> None
+    projects = impl.create_many(
+        "project", [{"name": "project_{}".format(i)} for i in range(3)]
+    )
+    shots = impl.create_many(
+        "shot",
+        [{"project": projects[i % 3], "code": "shot{}".format(i)} for i in range(1200)],
+    )
+
+    # more values than SQLite allows variables in one statement
+    found = impl.find(
+        "shot",
+        [
+            ["code", "in", ["shot{}".format(i) for i in range(1100)]],
+            ["id", "in", [shot["id"] for shot in shots[100:]]],
+            ["project", "in", projects[:2]],
+        ],
+    )
+
+    assert sorted(shot["code"] for shot in found) == sorted(
+        "shot{}".format(i) for i in range(100, 1100) if i % 3 != 2
+    )
+
+
+def test_find_one(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    with pytest.raises(EntityMissing):
+        impl.find_one("not_existing_type", SOME_OBJECT_ID)
+
+    assert impl.find_one("shot", SOME_OBJECT_ID) is None
+    assert impl.find_one("shot", shot["id"])["code"] == "shot010"
+
+
+def test_find_links(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    found = impl.find_links(
+        [
+            {"type": "shot", "id": shot["id"]},
+            None,
+            {"type": "project", "id": project["id"]},
+            {"type": "project", "id": SOME_OBJECT_ID},
+        ]
+    )
+
+    assert found[0]["code"] == "shot010"
+    assert found[1] is None
+    assert found[2]["name"] == "my_project"
+    assert found[3] is None
+
+
+def test_delete(impl, project_and_shot):
+    # type: (AbtractKtrackImpl, tuple) -> None
+    project, shot = project_and_shot
+
+    with pytest.raises(EntityNotFoundException):
+        impl.delete("shot", SOME_OBJECT_ID)
+
+    impl.delete("shot", shot["id"])
+
+    assert impl.find_one("shot", shot["id"]) is None
+    assert impl.find("shot", [["project", "is", project]]) == []
+
+
+def test_allocate_version(impl):
+    # type: (AbtractKtrackImpl) -> None
+    task = {"type": "task", "id": SOME_OBJECT_ID}
+
+    assert impl.allocate_version(task) == 1
+    assert impl.allocate_version(task) == 2
+    assert impl.allocate_version(task, 5) == 5
+    assert impl.allocate_version(task, 3) == 6
+    assert impl.allocate_version({"type": "task", "id": "other_task"}) == 1
+
+
+def test_allocate_version_concurrent(tmpdir):
+    impl = KtrackSqliteImpl("sqlite:///" + str(tmpdir.join("ktrack.db")))
+    task = {"type": "task", "id": SOME_OBJECT_ID}
+    threads_count = 8
+    versions_per_thread = 20
+    start = threading.Event()
+
+    def allocate():
+        start.wait()
+        return [impl.allocate_version(task) for _ in range(versions_per_thread)]
+
+    with ThreadPoolExecutor(max_workers=threads_count) as executor:
+        futures = [executor.submit(allocate) for _ in range(threads_count)]
+        start.set()
+        versions = [version for future in futures for version in future.result()]
+
+    assert sorted(versions) == list(range(1, threads_count * versions_per_thread + 1))
+
+
+def test_sqlite_data_is_persisted(tmpdir):
+    connection_uri = "sqlite:///" + str(tmpdir.join("ktrack.db"))
+    project = KtrackSqliteImpl(connection_uri).create("project", {"name": "project"})
+
+    assert (
+        KtrackSqliteImpl(connection_uri).find_one("project", project["id"]) == project
+    )
+
+
+def test_sqlite_schema_is_created_once(tmpdir):
+    connection_uri = "sqlite:///" + str(tmpdir.join("ktrack.db"))
+    KtrackSqliteImpl(connection_uri)
+
+    with mock.patch.object(KtrackSqliteImpl, "_create_tables") as mock_create_tables:
+        KtrackSqliteImpl(connection_uri)
+
+    mock_create_tables.assert_not_called()
+
+
+def test_sqlite_find_in_chunks(tmpdir):
+    impl = KtrackSqliteImpl("sqlite:///" + str(tmpdir.join("ktrack.db")))
+    impl.create_many("project", [{"name": "project_{}".format(i)} for i in range(3)])
+    names = ["project_{}".format(i) for i in range(1200)]
+    query = impl._query
+
+    with mock.patch.object(impl, "_query", side_effect=query) as mock_query:
+        found = impl.find("project", [["name", "in", names]])
+
+    assert len(found) == 3
+    assert mock_query.call_count == 3
+    assert all(
+        len(call[0][1]) <= ktrack_sqlite_impl._MAX_VARIABLES
+        for call in mock_query.call_args_list
+    )
+
+
+def test_sqlite_find_by_mapping_without_link(tmpdir):
+    impl = KtrackSqliteImpl("sqlite:///" + str(tmpdir.join("ktrack.db")))
+
+    with pytest.raises(ValueError):
+        impl.find("project", [["thumbnail", "is", {"path": "project.png"}]])
+    with pytest.raises(ValueError):
+        impl.find("shot", [["project", "in", [{"name": "my_project"}]]])
+
+
+def test_sqlite_uses_wal_and_indexes(tmpdir):
+    impl = KtrackSqliteImpl("sqlite:///" + str(tmpdir.join("ktrack.db")))
+
+    assert impl._query("PRAGMA journal_mode")[0][0] == "wal"
+
+    plan = " ".join(
+        str(row)
+        for row in impl._query(
+            "EXPLAIN QUERY PLAN SELECT id FROM path_entry WHERE json_extract(data, '$.path') = ?",
+            ("/some/path",),
+        )
+    )
+    assert "path_entry_path" in plan
+
+    plan = " ".join(
+        str(row)
+        for row in impl._query(
+            "EXPLAIN QUERY PLAN SELECT id FROM path_entry "
+            "WHERE json_extract(data, '$.entity_type') = ? AND json_extract(data, '$.entity_id') = ?",
+            ("shot", SOME_OBJECT_ID),
+        )
+    )
+    assert "path_entry_entity_type_entity_id" in plan
+
+
+@pytest.mark.slow
+def test_benchmark_implementations(impl):
+    # type: (AbtractKtrackImpl) -> None
+    count = 5000
+    project = impl.create("project", {"name": "my_project"})
+
+    start = time.time()
+    shots = impl.create_many(
+        "shot",
+        [{"code": "shot{}".format(i), "project": project} for i in range(count)],
+    )
+    create_seconds = time.time() - start
+
+    start = time.time()
+    for shot in shots[:500]:
+        impl.find_one("shot", shot["id"])
+    find_one_seconds = time.time() - start
+
+    start = time.time()
+    found = impl.find("shot", [["project", "is", project]])
+    find_seconds = time.time() - start
+    assert len(found) == count
+
+    start = time.time()
+    impl.find_links([{"type": "shot", "id": shot["id"]} for shot in shots])
+    find_links_seconds = time.time() - start
+
+    print(
+        "\n{}: create_many {} shots {:.2f}s, 500 x find_one {:.2f}s, find by project {:.2f}s, find_links {:.2f}s".format(
+            type(impl).__name__,
+            count,
+            create_seconds,
+            find_one_seconds,
+            find_seconds,
+            find_links_seconds,
+        )
+    )
@@ -5,8 +5,11 @@ import mock
 import pytest
 from mock import MagicMock
 
-from ktrack_api import ktrack
+from ktrack_api import ktrack, thumbnails
+from ktrack_api.exceptions import EntityNotFoundException
 from ktrack_api.ktrack import Ktrack
+from ktrack_api.sqlite_impl.ktrack_sqlite_impl import KtrackSqliteImpl
+from kttk.config import config_manager
 
 
 @pytest.fixture
@@ -28,6 +31,17 @@ def test_get_ktrack():
         assert ktrack_instance._impl is not None
 
 
+def test_get_ktrack_sqlite(tmpdir):
+    connection_uri = "sqlite:///" + str(tmpdir.join("ktrack.db"))
+    with mock.patch.object(ktrack, "_connection_url", connection_uri):
+        ktrack_instance = ktrack.get_ktrack()
+
+        # the database is opened only once
+        assert ktrack.get_ktrack()._impl is ktrack_instance._impl
+
+    assert isinstance(ktrack_instance._impl, KtrackSqliteImpl)
+
+
 def test_ktrack_interface_create(ktrack_mocked_impl):
     kt, impl_mock = ktrack_mocked_impl
 
@@ -35,6 +49,22 @@ def test_ktrack_interface_create(ktrack_mocked_impl):
     assert impl_mock.create.called
 
 
+def test_ktrack_interface_create_many(ktrack_mocked_impl):
+    kt, impl_mock = ktrack_mocked_impl
+
+    kt.create_many("", [{}])
+    assert impl_mock.create_many.called
+
+
+def test_ktrack_interface_allocate_version(ktrack_mocked_impl):
+    kt, impl_mock = ktrack_mocked_impl
+
+    kt.allocate_version({"type": "task", "id": "some_id"}, 3)
+    impl_mock.allocate_version.assert_called_once_with(
+        {"type": "task", "id": "some_id"}, 3
+    )
+
+
 def test_ktrack_interface_find(ktrack_mocked_impl):
     kt, impl_mock = ktrack_mocked_impl
 
@@ -49,6 +79,13 @@ def test_ktrack_interface_find_one(ktrack_mocked_impl):
     assert impl_mock.find_one.called
 
 
+def test_ktrack_interface_find_links(ktrack_mocked_impl):
+    kt, impl_mock = ktrack_mocked_impl
+
+    kt.find_links([])
+    assert impl_mock.find_links.called
+
+
 def test_ktrack_interface_update(ktrack_mocked_impl):
     kt, impl_mock = ktrack_mocked_impl
 
@@ -67,30 +104,112 @@ def test_upload_thumbnail(ktrack_mocked_impl, tmpdir):
     kt, impl_mock = ktrack_mocked_impl
     thumbnail_image = os.path.join(os.path.dirname(__file__), "maya_thumbnail_test.png")
 
-    # thumbnail_path = "M:/ktrack_thumbnails/thumbnail_project_108be19d-8833-4129-a8ee-462f352fae08_*.png"
-
     with mock.patch(
-        "ktrack_api.ktrack.Ktrack._get_thumbnail_path_template"
-    ) as mock_get_thumbnail_path:
-        mock_get_thumbnail_path.return_value = str(
-            tmpdir.join("thumbnail_{entity_type}_{entity_id}_{uuid}{ext}")
+        "ktrack_api.ktrack.Ktrack._get_thumbnail_root"
+    ) as mock_get_thumbnail_root:
+        mock_get_thumbnail_root.return_value = str(tmpdir)
+
+        thumbnail_path = kt.upload_thumbnail(
+            "project", "108be19d-8833-4129-a8ee-462f352fae08", thumbnail_image
         )
 
-        thumbnail_path_glob = str(
-            tmpdir.join("thumbnail_project_108be19d-8833-4129-a8ee-462f352fae08*.png")
+        # check update was called
+        impl_mock.update.assert_called_once_with(
+            "project",
+            "108be19d-8833-4129-a8ee-462f352fae08",
+            {"thumbnail": {"path": thumbnail_path}},
         )
 
-        files = glob.glob(thumbnail_path_glob)
-        old_len = len(files)
+        # check file was copied
+        assert os.path.exists(thumbnail_path)
+        assert thumbnail_path.startswith(str(tmpdir))
 
-        kt.upload_thumbnail(
-            "project", "108be19d-8833-4129-a8ee-462f352fae08", thumbnail_image
+        # same image is stored only once
+        assert (
+            kt.upload_thumbnail("project", "some_other_id", thumbnail_image)
+            == thumbnail_path
         )
+        assert len(glob.glob(str(tmpdir.join("*", "*.png")))) == 1
 
-        # check update was called
-        assert impl_mock.update.called
 
-        # check file was copied
+def test_thumbnail_config_missing(ktrack_mocked_impl, tmpdir):
+    kt, impl_mock = ktrack_mocked_impl
+    thumbnail_image = os.path.join(os.path.dirname(__file__), "maya_thumbnail_test.png")
+
+    # general.yml of a deployment created before the thumbnail settings existed
+    with mock.patch(
+        "kttk.config.config_manager._general_data", {"project_root": "some/root"}
+    ):
+        assert kt._get_thumbnail_max_size() == thumbnails.DEFAULT_MAX_SIZE
+        with pytest.raises(config_manager.InvalidConfigException) as exc_info:
+            kt.upload_thumbnail("project", "some_id", thumbnail_image)
+
+    assert ktrack.THUMBNAIL_ROOT in str(exc_info.value)
+    assert not impl_mock.update.called
+
+
+def test_invalid_thumbnail_max_size(ktrack_mocked_impl):
+    kt, impl_mock = ktrack_mocked_impl
+
+    with mock.patch(
+        "kttk.config.config_manager._general_data", {ktrack.THUMBNAIL_MAX_SIZE: "big"}
+    ):
+        with pytest.raises(config_manager.InvalidConfigException):
+            kt._get_thumbnail_max_size()
+
+
+def test_upload_thumbnails(ktrack_mocked_impl, tmpdir):
+    kt, impl_mock = ktrack_mocked_impl
+    impl_mock.update_many.return_value = [True, False]
+    thumbnail_image = os.path.join(os.path.dirname(__file__), "maya_thumbnail_test.png")
+    not_existing_image = str(tmpdir.join("not_existing.png"))
+
+    with mock.patch(
+        "ktrack_api.ktrack.Ktrack._get_thumbnail_root"
+    ) as mock_get_thumbnail_root:
+        mock_get_thumbnail_root.return_value = str(tmpdir.join("thumbnails"))
+
+        results = kt.upload_thumbnails(
+            [
+                ("shot", "shot_1", thumbnail_image),
+                ("shot", "shot_2", not_existing_image),
+                ("shot", "not_existing_shot", thumbnail_image),
+            ]
+        )
+
+    # all updates in one call, without the failed upload
+    thumbnail_path = results[0].thumbnail_path
+    impl_mock.update_many.assert_called_once_with(
+        [
+            ("shot", "shot_1", {"thumbnail": {"path": thumbnail_path}}),
+            ("shot", "not_existing_shot", {"thumbnail": {"path": thumbnail_path}}),
+        ]
+    )
+    assert not impl_mock.update.called
+
+    assert results[0].succeeded
+    assert os.path.exists(thumbnail_path)
+
+    assert not results[1].succeeded
+    assert isinstance(results[1].error, IOError)
+
+    assert not results[2].succeeded
+    assert isinstance(results[2].error, EntityNotFoundException)
+
+
+def test_upload_thumbnail_async(ktrack_mocked_impl, tmpdir):
+    kt, impl_mock = ktrack_mocked_impl
+    thumbnail_image = os.path.join(os.path.dirname(__file__), "maya_thumbnail_test.png")
+
+    with mock.patch(
+        "ktrack_api.ktrack.Ktrack._get_thumbnail_root"
+    ) as mock_get_thumbnail_root:
+        mock_get_thumbnail_root.return_value = str(tmpdir)
+
+        future = kt.upload_thumbnail_async("project", "some_id", thumbnail_image)
+        thumbnail_path = future.result(timeout=10)
 
-        files = glob.glob(thumbnail_path_glob)
-        assert len(files) == old_len + 1
+    assert os.path.exists(thumbnail_path)
+    impl_mock.update.assert_called_once_with(
+        "project", "some_id", {"thumbnail": {"path": thumbnail_path}}
+    )
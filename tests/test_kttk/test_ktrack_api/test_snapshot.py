@@ -0,0 +1,152 @@
+import mock
+import pytest
+
+from ktrack_api import ktrack
+from ktrack_api.exceptions import EntityNotFoundException, ReadOnlyException
+from ktrack_api.ktrack import Ktrack
+from ktrack_api.sqlite_impl import snapshot
+from ktrack_api.sqlite_impl.snapshot import KtrackSnapshotImpl
+from kttk import path_cache_manager
+from kttk.context import Context
+
+SOME_OBJECT_ID = "507f1f77bcf86cd799439012"
+
+
+@pytest.fixture
+def project_data(ktrack_instance_patched):
+    """Project with an asset, a task, a workfile and a registered path, plus another project"""
+    kt = ktrack_instance_patched
+    project = kt.create("project", {"name": "my_project"})
+    asset = kt.create(
+        "asset", {"project": project, "code": "Remote_Control", "asset_type": "Prop"}
+    )
+    task = kt.create(
+        "task", {"project": project, "entity": asset, "name": "model", "step": "model"}
+    )
+    workfile = kt.create(
+        "workfile", {"project": project, "entity": task, "path": "/some/path.mb"}
+    )
+    kt.create("user", {"name": "jane"})
+    path_cache_manager.register_path(
+        "M:/my_project/Assets/Prop/Remote_Control",
+        Context(
+            project={"type": "project", "id": project["id"]},
+            entity={"type": "asset", "id": asset["id"]},
+        ),
+    )
+
+    other_project = kt.create("project", {"name": "other_project"})
+    kt.create("shot", {"project": other_project, "code": "shot010"})
+    path_cache_manager.register_path(
+        "M:/other_project",
+        Context(project={"type": "project", "id": other_project["id"]}),
+    )
+
+    return project, asset, task, workfile
+
+
+@pytest.fixture
+def snapshot_path(ktrack_instance_patched, project_data, tmpdir):
+    path = str(tmpdir.join("my_project.db"))
+    snapshot.export_project(ktrack_instance_patched, project_data[0]["id"], path)
+    return path
+
+
+def test_export_project(ktrack_instance_patched, project_data, tmpdir):
+    path = str(tmpdir.join("my_project.db"))
+
+    counts = snapshot.export_project(
+        ktrack_instance_patched, project_data[0]["id"], path
+    )
+
+    assert counts == {
+        "project": 1,
+        "asset": 1,
+        "shot": 0,
+        "task": 1,
+        "workfile": 1,
+        "path_entry": 1,
+        "user": 1,
+    }
+    # no temporary, -wal or -shm files are left
+    assert tmpdir.listdir() == [tmpdir.join("my_project.db")]
+
+
+def test_export_not_existing_project(ktrack_instance_patched, tmpdir):
+    with pytest.raises(EntityNotFoundException):
+        snapshot.export_project(
+            ktrack_instance_patched, SOME_OBJECT_ID, str(tmpdir.join("snapshot.db"))
+        )
+
+    assert tmpdir.listdir() == []
+
+
+def test_export_replaces_snapshot(ktrack_instance_patched, project_data, snapshot_path):
+    project, asset, task, workfile = project_data
+    ktrack_instance_patched.update("asset", asset["id"], {"code": "Renamed"})
+
+    snapshot.export_project(ktrack_instance_patched, project["id"], snapshot_path)
+
+    impl = KtrackSnapshotImpl("snapshot:///" + snapshot_path)
+    assert impl.find_one("asset", asset["id"])["code"] == "Renamed"
+
+
+def test_snapshot_reads(ktrack_instance_patched, project_data, snapshot_path):
+    project, asset, task, workfile = project_data
+    impl = KtrackSnapshotImpl("snapshot:///" + snapshot_path)
+
+    assert impl.find_one("project", project["id"]) == ktrack_instance_patched.find_one(
+        "project", project["id"]
+    )
+    assert [found["id"] for found in impl.find("task", [["entity", "is", asset]])] == [
+        task["id"]
+    ]
+    assert (
+        impl.find_links(
+            [{"type": "workfile", "id": workfile["id"]}, {"type": "shot", "id": "x"}]
+        )[0]["path"]
+        == "/some/path.mb"
+    )
+    assert impl.find("shot", []) == []
+    assert [project["name"] for project in impl.find("project", [])] == ["my_project"]
+
+
+def test_snapshot_resolves_context(project_data, snapshot_path):
+    project, asset, task, workfile = project_data
+
+    with mock.patch("ktrack_api.get_ktrack") as mock_get_ktrack:
+        mock_get_ktrack.return_value = Ktrack(
+            KtrackSnapshotImpl("snapshot:///" + snapshot_path)
+        )
+        context = path_cache_manager.context_from_path(
+            "M:/my_project/Assets/Prop/Remote_Control"
+        )
+
+    assert context.project["id"] == project["id"]
+    assert context.entity["id"] == asset["id"]
+
+
+def test_snapshot_is_read_only(project_data, snapshot_path):
+    project, asset, task, workfile = project_data
+    impl = KtrackSnapshotImpl("snapshot:///" + snapshot_path)
+
+    with pytest.raises(ReadOnlyException):
+        impl.create("project", {"name": "new_project"})
+    with pytest.raises(ReadOnlyException):
+        impl.update("asset", asset["id"], {"code": "Renamed"})
+    with pytest.raises(ReadOnlyException):
+        impl.delete("asset", asset["id"])
+    with pytest.raises(ReadOnlyException):
+        impl.allocate_version(task)
+
+
+def test_snapshot_not_existing(tmpdir):
+    with pytest.raises(IOError):
+        KtrackSnapshotImpl("snapshot:///" + str(tmpdir.join("not_existing.db")))
+
+
+def test_get_ktrack_snapshot(snapshot_path):
+    with mock.patch.object(ktrack, "_connection_url", "snapshot:///" + snapshot_path):
+        ktrack_instance = ktrack.get_ktrack()
+
+    assert isinstance(ktrack_instance._impl, KtrackSnapshotImpl)
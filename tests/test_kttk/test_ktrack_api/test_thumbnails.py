@@ -0,0 +1,191 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import pytest
+
+from ktrack_api import thumbnails
+from ktrack_api.ktrack import Ktrack
+
+THUMBNAIL_IMAGE = os.path.join(os.path.dirname(__file__), "maya_thumbnail_test.png")
+
+
+def _image_size(path):
+    from Qt import QtGui
+
+    image = QtGui.QImage(path)
+    return image.width(), image.height()
+
+
+def test_file_hash(tmpdir):
+    first = tmpdir.join("first.txt")
+    first.write("content")
+    second = tmpdir.join("second.txt")
+    second.write("content")
+    other = tmpdir.join("other.txt")
+    other.write("other content")
+
+    assert thumbnails.file_hash(str(first)) == thumbnails.file_hash(str(second))
+    assert thumbnails.file_hash(str(first)) != thumbnails.file_hash(str(other))
+
+
+def test_thumbnail_path():
+    assert (
+        thumbnails.thumbnail_path("M:/thumbnails", "ab12cd", ".PNG")
+        == "M:/thumbnails/ab/ab12cd.png"
+    )
+
+
+def test_store_thumbnail(tmpdir):
+    thumbnail_path = thumbnails.store_thumbnail(
+        THUMBNAIL_IMAGE, str(tmpdir), max_size=128
+    )
+
+    assert thumbnail_path == thumbnails.thumbnail_path(
+        str(tmpdir), thumbnails.file_hash(THUMBNAIL_IMAGE), ".png"
+    )
+    assert os.path.exists(thumbnail_path)
+    if thumbnails.Image or thumbnails.QtGui:
+        assert _image_size(thumbnail_path) == (128, 128)
+
+    # no temporary files are left
+    assert os.listdir(os.path.dirname(thumbnail_path)) == [
+        os.path.basename(thumbnail_path)
+    ]
+
+
+def test_store_thumbnail_deduplicates(tmpdir):
+    copied_image = tmpdir.join("copy.png")
+    with open(THUMBNAIL_IMAGE, "rb") as f:
+        copied_image.write_binary(f.read())
+    thumbnail_root = str(tmpdir.join("thumbnails"))
+
+    first_path = thumbnails.store_thumbnail(THUMBNAIL_IMAGE, thumbnail_root)
+
+    with mock.patch("ktrack_api.thumbnails.resize_image") as mock_resize_image:
+        second_path = thumbnails.store_thumbnail(str(copied_image), thumbnail_root)
+
+    assert first_path == second_path
+    assert not mock_resize_image.called
+
+
+def test_store_thumbnail_without_image_library(tmpdir):
+    with mock.patch.multiple(thumbnails, Image=None, QtGui=None):
+        thumbnail_path = thumbnails.store_thumbnail(
+            THUMBNAIL_IMAGE, str(tmpdir), max_size=128
+        )
+
+    # copied unchanged
+    assert thumbnails.file_hash(thumbnail_path) == thumbnails.file_hash(THUMBNAIL_IMAGE)
+
+
+def test_store_thumbnail_concurrent(tmpdir):
+    with ThreadPoolExecutor(8) as executor:
+        paths = list(
+            executor.map(
+                lambda _: thumbnails.store_thumbnail(THUMBNAIL_IMAGE, str(tmpdir)),
+                range(16),
+            )
+        )
+
+    assert len(set(paths)) == 1
+    assert os.listdir(os.path.dirname(paths[0])) == [os.path.basename(paths[0])]
+
+
+def test_store_thumbnail_target_created_while_renaming(tmpdir):
+    def rename_after_other_upload(source, target):
+        # another upload of the same image finished first, on Windows renaming to an existing file fails
+        shutil.copy(source, target)
+        raise OSError(17, "File exists")
+
+    with mock.patch("os.rename", side_effect=rename_after_other_upload), mock.patch(
+        "os.replace", side_effect=rename_after_other_upload, create=True
+    ):
+        thumbnail_path = thumbnails.store_thumbnail(THUMBNAIL_IMAGE, str(tmpdir))
+
+    assert os.listdir(os.path.dirname(thumbnail_path)) == [
+        os.path.basename(thumbnail_path)
+    ]
+
+
+@pytest.mark.slow
+def test_benchmark_upload_thumbnails(ktrack_instance, tmpdir):
+    # sequence ingest: small thumbnails for many shots
+    from Qt import QtGui
+
+    kt = Ktrack(ktrack_instance)
+    project = kt.create("project", {"name": "project"})
+    items = []
+    for i in range(300):
+        shot = kt.create("shot", {"project": project, "code": "shot{}".format(i)})
+        image = QtGui.QImage(64, 64, QtGui.QImage.Format_RGB32)
+        image.fill(i)
+        image_path = str(tmpdir.join("shot{}.png".format(i)))
+        image.save(image_path)
+        items.append(("shot", shot["id"], image_path))
+
+    with mock.patch("ktrack_api.ktrack.Ktrack._get_thumbnail_root") as mock_root:
+        mock_root.return_value = str(tmpdir.join("single"))
+        start = time.time()
+        for entity_type, entity_id, path in items:
+            kt.upload_thumbnail(entity_type, entity_id, path)
+        single_seconds = time.time() - start
+
+        mock_root.return_value = str(tmpdir.join("bulk"))
+        start = time.time()
+        results = kt.upload_thumbnails(items)
+        bulk_seconds = time.time() - start
+
+    assert all(result.succeeded for result in results)
+    print(
+        "\n{} thumbnails: upload_thumbnail {:.2f}s, upload_thumbnails {:.2f}s".format(
+            len(items), single_seconds, bulk_seconds
+        )
+    )
+
+
+@pytest.mark.slow
+def test_benchmark_batch_upload(tmpdir):
+    images = []
+    for i in range(100):
+        image = tmpdir.join("image_{}.png".format(i))
+        with open(THUMBNAIL_IMAGE, "rb") as f:
+            # different content for every image, so nothing is deduplicated
+            image.write_binary(f.read() + str(i).encode())
+        images.append(str(image))
+
+    start = time.time()
+    for image in images:
+        thumbnails.store_thumbnail(image, str(tmpdir.join("serial")))
+    serial_seconds = time.time() - start
+
+    start = time.time()
+    futures = [
+        thumbnails.get_executor().submit(
+            thumbnails.store_thumbnail, image, str(tmpdir.join("pool"))
+        )
+        for image in images
+    ]
+    for future in futures:
+        future.result()
+    pool_seconds = time.time() - start
+
+    start = time.time()
+    for image in images:
+        thumbnails.store_thumbnail(image, str(tmpdir.join("pool")))
+    deduplicated_seconds = time.time() - start
+
+    print(
+        "\n{} thumbnails: serial {:.2f}s ({:.0f}/s), pool {:.2f}s ({:.0f}/s), "
+        "already stored {:.2f}s ({:.0f}/s)".format(
+            len(images),
+            serial_seconds,
+            len(images) / serial_seconds,
+            pool_seconds,
+            len(images) / pool_seconds,
+            deduplicated_seconds,
+            len(images) / deduplicated_seconds,
+        )
+    )
@@ -7,7 +7,8 @@ import pytest
 from mock import MagicMock
 
 import ktrack_api
-from kttk import path_cache_manager
+from ktrack_api.exceptions import EntityNotFoundException
+from kttk import folder_scanner, path_cache_manager
 from kttk.context import Context
 from scripts import ktrack_command
 
@@ -136,6 +137,55 @@ def test_print_context_valid_path(mock_print_result):
         mock_print_result.assert_called_once_with(mock_from_path.return_value)
 
 
+def test_scan(mock_print_result):
+    scan_result = folder_scanner.ScanResult(
+        directories=10,
+        seconds=2.0,
+        registered=["M:/a"],
+        mismatches=[("M:/b", "project b not found")],
+    )
+    with mock.patch("kttk.folder_scanner.scan") as mock_scan:
+        mock_scan.return_value = scan_result
+        ktrack_command.scan("some_path", workers=4, dry_run=True)
+
+    mock_scan.assert_called_once_with("some_path", max_workers=4, dry_run=True)
+    assert mock_print_result.call_args_list[0] == mock.call(
+        "Scanned 10 directories in 2.00s (5 dirs/sec)"
+    )
+    assert mock_print_result.call_args_list[1] == mock.call(
+        "Would register 1 paths, 0 already registered, 0 not matching any folder template"
+    )
+    assert "project b not found" in mock_print_result.call_args_list[2][0][0]
+
+
+def test_migrate_path_entries(mock_print_result):
+    with mock.patch("kttk.path_cache_manager.migrate_path_entries") as mock_migrate:
+        mock_migrate.return_value = 3
+        ktrack_command.migrate_path_entries()
+
+    mock_print_result.assert_called_once_with("Migrated 3 path entries")
+
+
+def test_export_snapshot(mock_print_result):
+    with mock.patch("ktrack_api.sqlite_impl.snapshot.export_project") as mock_export:
+        mock_export.return_value = {"project": 1, "shot": 12}
+        ktrack_command.export_snapshot("some_id", "/farm/my_project.db")
+
+    assert mock_export.call_args[0][1:] == ("some_id", "/farm/my_project.db")
+    assert "shot" in mock_print_result.call_args_list[0][0][0]
+    assert mock_print_result.call_args_list[1] == mock.call(
+        "Snapshot written to /farm/my_project.db"
+    )
+
+
+def test_export_snapshot_not_existing_project(mock_print_result):
+    with mock.patch("ktrack_api.sqlite_impl.snapshot.export_project") as mock_export:
+        mock_export.side_effect = EntityNotFoundException("some_id")
+        ktrack_command.export_snapshot("some_id", "/farm/my_project.db")
+
+    mock_print_result.assert_called_once_with('Project with id "some_id" not found..')
+
+
 @pytest.mark.integration_test_only
 class TestContextCommand(object):
     @staticmethod
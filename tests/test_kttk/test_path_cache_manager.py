@@ -1,8 +1,10 @@
 import uuid
 
 import pytest
+from mock import mock
 
 from kttk import path_cache_manager
+from kttk.config import config_manager
 from kttk.context import Context
 
 
@@ -54,6 +56,21 @@ def test_register_path(ktrack_instance, context_for_testing):
     assert context.project["id"] == context_for_testing.project["id"]
 
 
+def test_register_paths(ktrack_instance, context_for_testing):
+    paths = [r"C:\some\path", "C:/some/other/path"]
+
+    path_entries = path_cache_manager.register_paths(
+        [(path, context_for_testing) for path in paths]
+    )
+
+    assert [entry["path"] for entry in path_entries] == [
+        "C:/some/path",
+        "C:/some/other/path",
+    ]
+    for path in paths:
+        assert path_cache_manager.context_from_path(path) == context_for_testing
+
+
 def test_restore_context_no_path_registered():
     assert path_cache_manager.context_from_path(str(uuid.uuid4())) is None
 
@@ -70,3 +87,155 @@ def test_unregister_path(context_for_testing, ktrack_instance):
 
     path_entry_removed = len(entries) == 0
     assert path_entry_removed
+
+
+def test_register_path_normalized(ktrack_instance, populated_context):
+    PATH = "normalized_path"
+    with mock.patch(
+        "kttk.path_cache_manager.get_storage_mode",
+        return_value=path_cache_manager.STORAGE_NORMALIZED,
+    ):
+        path_cache_manager.register_path(PATH, populated_context)
+
+    entry = ktrack_instance.find("path_entry", [["path", "is", PATH]])[0]
+
+    assert not entry["context"]
+    assert entry["project_id"] == populated_context.project["id"]
+    assert entry["entity_type"] == "asset"
+    assert entry["entity_id"] == populated_context.entity["id"]
+    assert entry["task_id"] == populated_context.task["id"]
+    assert entry["step"] == "anim"
+
+    # workfile and user are not stored
+    assert path_cache_manager.context_from_path(PATH) == populated_context.copy_context(
+        workfile=None, user=None
+    )
+
+    # paths can be found by the indexed fields
+    entries = ktrack_instance.find(
+        "path_entry",
+        [
+            ["entity_type", "is", "asset"],
+            ["entity_id", "is", populated_context.entity["id"]],
+        ],
+    )
+    assert [entry["path"] for entry in entries] == [PATH]
+
+
+def test_register_path_embedded(ktrack_instance, populated_context):
+    PATH = "embedded_path"
+    with mock.patch(
+        "kttk.path_cache_manager.get_storage_mode",
+        return_value=path_cache_manager.STORAGE_EMBEDDED,
+    ):
+        path_cache_manager.register_path(PATH, populated_context)
+
+    entry = ktrack_instance.find("path_entry", [["path", "is", PATH]])[0]
+
+    assert entry["context"] == populated_context.as_compact_dict()
+    assert entry["project_id"] == populated_context.project["id"]
+    assert path_cache_manager.context_from_path(PATH) == populated_context
+
+
+def test_invalid_storage_mode():
+    with mock.patch(
+        "kttk.config.config_manager._general_data",
+        {path_cache_manager.PATH_ENTRY_STORAGE: "somewhere"},
+    ):
+        with pytest.raises(config_manager.InvalidConfigException):
+            path_cache_manager.get_storage_mode()
+
+
+def test_storage_mode_missing_in_config():
+    # general.yml of a deployment created before path_entry_storage existed
+    with mock.patch(
+        "kttk.config.config_manager._general_data", {"project_root": "some/root"}
+    ):
+        assert (
+            path_cache_manager.get_storage_mode()
+            == path_cache_manager.STORAGE_NORMALIZED
+        )
+
+
+def test_context_from_path_legacy_entry(ktrack_instance, context_for_testing):
+    PATH = "legacy_path"
+    ktrack_instance.create(
+        "path_entry", {"path": PATH, "context": context_for_testing.as_dict()}
+    )
+
+    assert path_cache_manager.context_from_path(PATH) == context_for_testing
+
+
+def test_paths_for_entity(ktrack_instance, populated_context):
+    project_context = Context(project=populated_context.project)
+    entity_context = project_context.copy_context(entity=populated_context.entity)
+    task_context = entity_context.copy_context(step="anim", task=populated_context.task)
+    other_context = Context(
+        project=ktrack_instance.create("project", {"name": "other"})
+    )
+
+    path_cache_manager.register_path("project", project_context)
+    path_cache_manager.register_path("project/asset", entity_context)
+    path_cache_manager.register_path("project/asset/anim", task_context)
+    path_cache_manager.register_path("other", other_context)
+
+    assert sorted(
+        path_cache_manager.paths_for_project(populated_context.project["id"])
+    ) == ["project", "project/asset", "project/asset/anim"]
+    assert sorted(path_cache_manager.paths_for_entity(populated_context.entity)) == [
+        "project/asset",
+        "project/asset/anim",
+    ]
+    assert path_cache_manager.paths_for_entity(populated_context.task) == [
+        "project/asset/anim"
+    ]
+    assert path_cache_manager.paths_for_entity(populated_context.workfile) == []
+
+
+def test_migrate_path_entries(ktrack_instance, populated_context):
+    # registered before path entries had id fields
+    for path, context in [
+        ("project", Context(project=populated_context.project)),
+        ("project/asset/anim", populated_context.copy_context(workfile=None)),
+        ("other", Context(project=ktrack_instance.create("project", {"name": "x"}))),
+    ]:
+        ktrack_instance.create(
+            "path_entry", {"path": path, "context": context.as_dict()}
+        )
+    path_cache_manager.register_path(
+        "project/assets", Context(project=populated_context.project)
+    )
+
+    # only the indexed fields are queried
+    assert path_cache_manager.paths_for_project(populated_context.project["id"]) == [
+        "project/assets"
+    ]
+
+    assert path_cache_manager.migrate_path_entries() == 3
+    assert path_cache_manager.migrate_path_entries() == 0
+
+    assert path_cache_manager.context_from_path("project/asset/anim") == (
+        populated_context.copy_context(workfile=None)
+    )
+    assert sorted(
+        path_cache_manager.paths_for_project(populated_context.project["id"])
+    ) == ["project", "project/asset/anim", "project/assets"]
+    assert path_cache_manager.paths_for_entity(populated_context.entity) == [
+        "project/asset/anim"
+    ]
+    assert path_cache_manager.paths_for_entity(populated_context.task) == [
+        "project/asset/anim"
+    ]
+
+
+def test_registered_paths(ktrack_instance, context_for_testing):
+    path_cache_manager.register_path("project/assets", context_for_testing)
+    ktrack_instance.create(
+        "path_entry",
+        {"path": "project/shots", "context": context_for_testing.as_dict()},
+    )
+
+    assert path_cache_manager.registered_paths(
+        ["project\\assets", "project/shots", "project/other"]
+    ) == {"project/assets", "project/shots"}
+    assert path_cache_manager.registered_paths([]) == set()
@@ -1,10 +1,12 @@
 from mock import mock
 
-from kttk.context import PopulatedContext
+from kttk.context import PopulatedContext, Context, clear_populated_context_cache
 
 
 def test_populated_context_full(populated_context, ktrack_instance):
-    with mock.patch("ktrack_api.ktrack.Ktrack.find_one") as mock_find_one:
+    with mock.patch("ktrack_api.ktrack.Ktrack.find_links") as mock_find_links:
+        mock_find_links.return_value = [None] * 5
+
         context = PopulatedContext(
             project=populated_context.project,
             entity=populated_context.entity,
@@ -14,18 +16,63 @@ def test_populated_context_full(populated_context, ktrack_instance):
             user=populated_context.user,
         )
 
-        # make sure calls to ktrack are correct
-        mock_find_one.assert_any_call("project", populated_context.project["id"])
-        mock_find_one.assert_any_call(
-            populated_context.entity["type"], populated_context.entity["id"]
+        # make sure all links are resolved with a single call
+        mock_find_links.assert_called_once_with(
+            [
+                {"type": "project", "id": populated_context.project["id"]},
+                populated_context.entity,
+                {"type": "task", "id": populated_context.task["id"]},
+                {"type": "workfile", "id": populated_context.workfile["id"]},
+                {"type": "user", "id": populated_context.user["id"]},
+            ]
         )
-        mock_find_one.assert_any_call("task", populated_context.task["id"])
-        mock_find_one.assert_any_call("workfile", populated_context.workfile["id"])
-        mock_find_one.assert_any_call("user", populated_context.user["id"])
+
+
+def test_populated_context_resolves_entities(populated_context, ktrack_instance):
+    context = populated_context.populate_context()
+
+    assert context.project["name"] == "my_project"
+    assert context.entity["code"] == "my_entity"
+    assert context.step == "anim"
+    assert context.task["name"] == "task"
+    assert context.workfile["name"] == "workfile"
+    assert context.user["name"] == "user"
+    assert context == populated_context
+
+
+def test_populated_context_partial(populated_context, ktrack_instance):
+    context = PopulatedContext(
+        project=populated_context.project, task=populated_context.task
+    )
+
+    assert context.project["name"] == "my_project"
+    assert context.entity is None
+    assert context.task["name"] == "task"
+    assert context.workfile is None
 
 
 def test_populated_context_with_none(populated_context, ktrack_instance):
-    with mock.patch("ktrack_api.ktrack.Ktrack.find_one") as mock_find_one:
+    with mock.patch("ktrack_api.ktrack.Ktrack.find_links") as mock_find_links:
         context = PopulatedContext()
 
-        mock_find_one.assert_not_called()
+        mock_find_links.assert_not_called()
+
+
+def test_populate_context_cache(populated_context, ktrack_instance):
+    clear_populated_context_cache()
+
+    context = populated_context.populate_context(use_cache=True)
+
+    with mock.patch("ktrack_api.ktrack.Ktrack.find_links") as mock_find_links:
+        # same ids, but a different context instance
+        cached_context = Context.from_dict(
+            populated_context.as_dict()
+        ).populate_context(use_cache=True)
+
+        mock_find_links.assert_not_called()
+        assert cached_context is context
+
+    # without cache, the context is always queried
+    assert populated_context.populate_context() is not context
+
+    clear_populated_context_cache()
@@ -5,6 +5,7 @@ from mock import mock, patch
 
 import kttk
 from kttk import project_bootstrapper
+from kttk.context import Context
 
 data = {
     "project_name": "Finding Dory",
@@ -100,10 +101,27 @@ def test_remove_bootstrapped_project(ktrack_instance_patched):
             )
             entities.append(workfile)
 
+    # register paths for the project, they have to be unregistered without walking the file system
+    entities.append(
+        kttk.path_cache_manager.register_path(
+            "Finding_Dory/assets", Context(project=project)
+        )
+    )
+    # registered before path entries had id fields
+    entities.append(
+        kt.create(
+            "path_entry",
+            {
+                "path": "Finding_Dory/shots",
+                "context": Context(project=project).as_dict(),
+            },
+        )
+    )
+
+    kttk.path_cache_manager.migrate_path_entries()
+
     # mock file system access
     with mock.patch("os.walk") as mock_walk:
-        mock_walk.return_value = [("", "", "")]
-
         with mock.patch("shutil.rmtree") as mock_rmtree:
             with mock.patch(
                 "kttk.path_cache_manager.unregister_path"
@@ -112,9 +130,11 @@ def test_remove_bootstrapped_project(ktrack_instance_patched):
                 project_bootstrapper.remove_bootstrapped_project(project["id"])
 
                 mock_rmtree.assert_called()
+                mock_walk.assert_not_called()
+                # path entries are deleted by id
+                mock_unregister_path.assert_not_called()
 
-                # make sure all entities where deleted
-
+    # make sure all entities where deleted
     for entity in entities:
         print(entity["type"])
         assert kt.find_one(entity["type"], entity["id"]) is None
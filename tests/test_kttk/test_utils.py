@@ -1,7 +1,8 @@
+import pickle
+
 import pytest
 
 from kttk import utils
-from kttk.utils import FrozenDict
 
 
 def test_entity_id_dict():
@@ -58,12 +59,48 @@ def test_frozen_entity_id_dict():
         utils.entity_id_dict({"tyepe": "shot", "ied": 123, "code": "awesome"})
 
 
-def test_frozen_dict():
-    d = FrozenDict({"type": "shot", "id": 123, "code": "awesome"})
-    assert d["type"] == "shot"
-    assert d["id"] == 123
-    assert d["code"] == "awesome"
-    assert len(d.keys()) == 3
+def test_entity_link():
+    link = utils.EntityLink("shot", 123)
+
+    assert link["type"] == "shot"
+    assert link["id"] == 123
+    assert dict(link) == {"type": "shot", "id": 123}
+
+    # compares equal to dicts in both directions
+    assert link == {"type": "shot", "id": 123}
+    assert {"type": "shot", "id": 123} == link
+    assert link != {"type": "shot", "id": 123, "code": "awesome"}
+    assert link != utils.EntityLink("shot", 124)
+
+    # links are interned and can be used as dict keys
+    assert utils.EntityLink("shot", 123) is link
+    assert {link: "value"}[utils.EntityLink("shot", 123)] == "value"
 
     with pytest.raises(TypeError):
-        d["id"] = 123
+        link["id"] = 124
+
+    with pytest.raises(AttributeError):
+        link.some_attribute = 124
+
+    assert pickle.loads(pickle.dumps(link)) is link
+
+
+def test_lru_cache():
+    cache = utils.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert cache.get("a") == 1
+
+    # b is least recently used now
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("b", "default") == "default"
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+    assert cache.pop("a") == 1
+    cache.clear()
+    assert len(cache) == 0
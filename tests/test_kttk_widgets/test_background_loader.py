@@ -0,0 +1,86 @@
+import threading
+
+try:
+    from kttk_widgets.background_loader import BackgroundLoader
+except ImportError:
+    pass
+
+from tests.test_kttk_widgets import pyside_only
+
+
+@pyside_only
+def test_load_delivers_result(qtbot):
+    loader = BackgroundLoader()
+
+    with qtbot.wait_signal(loader.loaded) as blocker:
+        loader.load("tasks", lambda a, b: a + b, 1, 2)
+
+    assert blocker.args == ["tasks", 3]
+
+
+@pyside_only
+def test_load_failed(qtbot):
+    loader = BackgroundLoader()
+
+    def fail():
+        raise ValueError("database down")
+
+    with qtbot.wait_signal(loader.load_failed) as blocker:
+        loader.load("tasks", fail)
+
+    assert blocker.args[0] == "tasks"
+    assert isinstance(blocker.args[1], ValueError)
+
+
+@pyside_only
+def test_stale_result_is_dropped(qtbot):
+    loader = BackgroundLoader()
+    release_first = threading.Event()
+    results = []
+    loader.loaded.connect(lambda key, result: results.append(result))
+
+    def slow_load():
+        release_first.wait(5)
+        return "old task"
+
+    loader.load("workfiles", slow_load)
+
+    with qtbot.wait_signal(loader.loaded):
+        loader.load("workfiles", lambda: "new task")
+
+    release_first.set()
+    loader.wait_for_done()
+    qtbot.wait(50)
+
+    assert results == ["new task"]
+
+
+@pyside_only
+def test_cancel(qtbot):
+    loader = BackgroundLoader()
+    release = threading.Event()
+    results = []
+    loader.loaded.connect(lambda key, result: results.append(result))
+
+    loader.load("context", lambda: release.wait(5))
+    loader.cancel("context")
+
+    release.set()
+    loader.wait_for_done()
+    qtbot.wait(50)
+
+    assert results == []
+
+
+@pyside_only
+def test_different_keys_do_not_cancel_each_other(qtbot):
+    loader = BackgroundLoader()
+    results = {}
+    loader.loaded.connect(lambda key, result: results.update({key: result}))
+
+    loader.load("tasks", lambda: 1)
+    loader.load("workfiles", lambda: 2)
+
+    qtbot.wait_until(lambda: len(results) == 2)
+
+    assert results == {"tasks": 1, "workfiles": 2}
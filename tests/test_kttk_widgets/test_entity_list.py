@@ -0,0 +1,190 @@
+import pytest
+
+try:
+    from Qt import QtCore
+    from kttk_widgets.entity_list import EntityListModel
+except ImportError:
+    pass
+
+from tests.test_kttk_widgets import pyside_only
+
+
+def _workfile(workfile_id, name):
+    return {"type": "workfile", "id": workfile_id, "name": name}
+
+
+class _ModelSignalRecorder(object):
+    def __init__(self, model):
+        self.inserted = []
+        self.removed = []
+        self.changed = []
+        self.resets = 0
+
+        model.rowsInserted.connect(
+            lambda parent, first, last: self.inserted.append((first, last))
+        )
+        model.rowsRemoved.connect(
+            lambda parent, first, last: self.removed.append((first, last))
+        )
+        model.dataChanged.connect(
+            lambda top_left, bottom_right, *args: self.changed.append(
+                (top_left.row(), bottom_right.row())
+            )
+        )
+        model.modelReset.connect(self._reset)
+
+    def _reset(self):
+        self.resets += 1
+
+
+def _names(model):
+    return [
+        model.data(model.index(row), QtCore.Qt.DisplayRole)
+        for row in range(model.rowCount())
+    ]
+
+
+@pyside_only
+def test_model(qtmodeltester):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b")])
+
+    qtmodeltester.check(model)
+
+
+@pyside_only
+def test_set_entities_only_inserts_new_rows(qtbot):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "a"), _workfile("3", "c")])
+    recorder = _ModelSignalRecorder(model)
+
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b"), _workfile("3", "c")])
+
+    assert recorder.inserted == [(1, 1)]
+    assert recorder.removed == []
+    assert recorder.changed == []
+    assert recorder.resets == 0
+    assert _names(model) == ["a", "b", "c"]
+
+
+@pyside_only
+def test_set_entities_only_removes_old_rows(qtbot):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b"), _workfile("3", "c")])
+    recorder = _ModelSignalRecorder(model)
+
+    model.set_entities([_workfile("2", "b")])
+
+    assert recorder.removed == [(2, 2), (0, 0)]
+    assert recorder.inserted == []
+    assert recorder.resets == 0
+    assert _names(model) == ["b"]
+
+
+@pyside_only
+def test_set_entities_changed_entity(qtbot):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b")])
+    recorder = _ModelSignalRecorder(model)
+
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b_renamed")])
+
+    assert recorder.changed == [(1, 1)]
+    assert recorder.inserted == []
+    assert recorder.removed == []
+    assert _names(model) == ["a", "b_renamed"]
+
+
+@pyside_only
+def test_set_entities_reordered_resets(qtbot):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "a"), _workfile("2", "b")])
+    recorder = _ModelSignalRecorder(model)
+
+    model.set_entities([_workfile("2", "b"), _workfile("1", "a")])
+
+    assert recorder.resets == 1
+    assert _names(model) == ["b", "a"]
+
+
+@pyside_only
+@pytest.mark.parametrize(
+    "old,new",
+    [
+        ([], ["a", "b"]),
+        (["a", "b"], []),
+        (["a", "b", "c", "d"], ["x", "b", "y", "d", "z"]),
+        (["a", "b"], ["a", "a"]),
+    ],
+)
+def test_set_entities_results_in_new_entities(qtmodeltester, old, new):
+    model = EntityListModel()
+    model.set_entities(old)
+    qtmodeltester.check(model)
+
+    model.set_entities(new)
+
+    assert _names(model) == new
+
+
+@pyside_only
+def test_paging(qtmodeltester):
+    model = EntityListModel(page_size=10)
+    model.set_entities([_workfile(str(i), str(i)) for i in range(25)])
+
+    assert model.rowCount() == 0
+    assert model.canFetchMore(QtCore.QModelIndex())
+
+    model.fetchMore(QtCore.QModelIndex())
+    assert model.rowCount() == 10
+
+    model.fetchMore(QtCore.QModelIndex())
+    model.fetchMore(QtCore.QModelIndex())
+    assert model.rowCount() == 25
+    assert not model.canFetchMore(QtCore.QModelIndex())
+
+    qtmodeltester.check(model)
+
+
+@pyside_only
+def test_paging_diff_only_touches_fetched_rows(qtbot):
+    model = EntityListModel(page_size=10)
+    entities = [_workfile(str(i), str(i)) for i in range(25)]
+    model.set_entities(entities)
+    model.fetchMore(QtCore.QModelIndex())
+    recorder = _ModelSignalRecorder(model)
+
+    # remove one fetched and one not fetched entity, add one at the end
+    new_entities = (
+        entities[:5] + entities[6:20] + entities[21:] + [_workfile("new", "new")]
+    )
+    model.set_entities(new_entities)
+
+    assert recorder.removed == [(5, 5)]
+    assert recorder.inserted == []
+    assert model.rowCount() == 9
+
+    while model.canFetchMore(QtCore.QModelIndex()):
+        model.fetchMore(QtCore.QModelIndex())
+
+    assert _names(model) == [entity["name"] for entity in new_entities]
+
+
+@pyside_only
+def test_set_entities_updates_search_index(qtbot):
+    model = EntityListModel()
+    model.set_entities([_workfile("1", "anim_v001"), _workfile("2", "anim_v002")])
+    search_index = model.search_index
+
+    model.set_entities(
+        [
+            _workfile("2", "lookdev_v002"),
+            _workfile("3", "anim_v003"),
+            _workfile("4", "lookdev_v004"),
+        ]
+    )
+
+    # the index is updated instead of being rebuilt
+    assert model.search_index is search_index
+    assert search_index.search("anim") == {("workfile", "3")}
+    assert search_index.search("lookdev") == {("workfile", "2"), ("workfile", "4")}
@@ -0,0 +1,63 @@
+import pytest
+
+from kttk_widgets.entity_search_index import EntitySearchIndex, tokenize
+
+
+@pytest.fixture
+def search_index():
+    return EntitySearchIndex(
+        [
+            (1, {"type": "task", "name": "anim", "step": "anim"}),
+            (2, {"type": "task", "name": "lookdev", "step": "lsr"}),
+            (3, {"type": "workfile", "name": "shot010_anim_v001.mb"}),
+            (4, {"type": "shot", "code": "shot020"}),
+            (5, "Fluke and Rudder"),
+        ]
+    )
+
+
+def test_tokenize():
+    assert tokenize("Shot010_anim_v001.mb") == ["shot010", "anim", "v001", "mb"]
+    assert tokenize("  ") == []
+
+
+@pytest.mark.parametrize(
+    "search_text,keys",
+    [
+        ("anim", {1, 3}),
+        ("ANI", {1, 3}),
+        ("shot", {3, 4}),
+        ("shot010_anim", {3}),
+        ("anim v002", set()),
+        ("lsr", {2}),
+        ("rud", {5}),
+        ("fluke rudder", {5}),
+        ("nothing", set()),
+    ],
+)
+def test_search(search_index, search_text, keys):
+    assert search_index.search(search_text) == keys
+
+
+def test_empty_search_matches_everything(search_index):
+    assert search_index.search("") is None
+    assert search_index.search(" _ ") is None
+
+
+def test_add_and_remove(search_index):
+    search_index.add(6, {"type": "shot", "code": "shot030_anim"})
+    assert search_index.search("anim") == {1, 3, 6}
+
+    search_index.remove(1, {"type": "task", "name": "anim", "step": "anim"})
+    search_index.remove(6, {"type": "shot", "code": "shot030_anim"})
+    assert search_index.search("anim") == {3}
+    assert search_index.search("shot") == {3, 4}
+
+
+def test_changes_increment_revision(search_index):
+    revision = search_index.revision
+
+    search_index.add(6, "Vending Machine")
+    search_index.remove(6, "Vending Machine")
+
+    assert search_index.revision == revision + 2
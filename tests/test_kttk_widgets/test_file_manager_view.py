@@ -0,0 +1,114 @@
+import mock
+import pytest
+
+from kttk.context import PopulatedContext
+
+try:
+    from kttk_widgets import file_manager_view
+    from kttk_widgets.file_manager_view import FileManagerWidget
+except ImportError:
+    pass
+
+from tests.test_kttk_widgets import pyside_only
+
+
+@pytest.fixture
+def tasks(ktrack_instance_patched):
+    kt = ktrack_instance_patched
+    project = kt.create("project", {"name": "my_project"})
+    shot = kt.create("shot", {"project": project, "code": "shot010"})
+    return [
+        kt.create(
+            "task", {"project": project, "entity": shot, "name": step, "step": step}
+        )
+        for step in ["anim", "comp"]
+    ]
+
+
+def _create_workfile(kt, task):
+    return kt.create(
+        "workfile",
+        {
+            "project": task["project"],
+            "entity": task,
+            "name": "shot010_{}_v001.mb".format(task["step"]),
+            "path": "/some/path.mb",
+        },
+    )
+
+
+def _context(task, workfile=None):
+    return PopulatedContext(
+        project=task["project"],
+        entity=task["entity"],
+        task=task,
+        step=task["step"],
+        workfile=workfile,
+    )
+
+
+@mock.patch.object(file_manager_view, "FileManager")
+@mock.patch.object(file_manager_view, "DataRetriver")
+def _file_manager_widget(qtbot, tasks, mock_data_retriver, mock_file_manager):
+    widget = FileManagerWidget()
+    qtbot.add_widget(widget)
+
+    # results are delivered by the tests by calling _data_loaded
+    widget._loader.load = mock.MagicMock()
+    widget._data_loaded(file_manager_view.TASKS, tasks)
+    return widget
+
+
+def _select(list_widget, row):
+    list_widget._view.setCurrentIndex(list_widget._proxy_model.index(row, 0))
+
+
+@pyside_only
+def test_workfile_selected_while_task_data_loads(qtbot, ktrack_instance, tasks):
+    widget = _file_manager_widget(qtbot, tasks)
+    anim = tasks[0]
+    workfiles = [_create_workfile(ktrack_instance, anim)]
+    _select(widget._task_list_view, 0)
+    widget.workfile_model.set_entities(workfiles)
+
+    # context of the task is not loaded yet
+    _select(widget._workfile_list_view, 0)
+    assert widget._btn_open.isEnabled()
+    assert not widget._btn_create_new.isEnabled()
+
+    widget._data_loaded(file_manager_view.TASK_DATA, (workfiles, _context(anim)))
+
+    assert widget._btn_open.isEnabled()
+    assert widget._btn_create_new.isEnabled()
+    # the context of the selected workfile is loaded now
+    assert widget._loader.load.call_args[0][0] == file_manager_view.CONTEXT
+
+
+@pyside_only
+def test_context_of_previous_task_is_dropped(qtbot, ktrack_instance, tasks):
+    widget = _file_manager_widget(qtbot, tasks)
+    anim, comp = tasks
+    workfile = _create_workfile(ktrack_instance, anim)
+
+    _select(widget._task_list_view, 0)
+    widget._data_loaded(file_manager_view.TASK_DATA, ([workfile], _context(anim)))
+    _select(widget._task_list_view, 1)
+    widget._data_loaded(file_manager_view.TASK_DATA, ([], _context(comp)))
+
+    # context load for a workfile of anim finishes after comp was loaded
+    widget._data_loaded(file_manager_view.CONTEXT, _context(anim, workfile))
+
+    assert widget._context_view.context.task["id"] == comp["id"]
+
+
+@pyside_only
+def test_create_uses_loaded_context(qtbot, tasks):
+    widget = _file_manager_widget(qtbot, tasks)
+    _select(widget._task_list_view, 0)
+    context = _context(tasks[0])
+    widget._data_loaded(file_manager_view.TASK_DATA, ([], context))
+
+    widget._create()
+
+    widget._file_manager.create.assert_called_once_with(context)
+    widget._data_retriver.context_from_task.assert_not_called()
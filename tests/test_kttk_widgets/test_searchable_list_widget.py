@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+try:
+    from Qt import QtCore
+    from kttk_widgets.entity_list import EntityListModel
+    from kttk_widgets.searchable_list_widget import SearchableListWidget
+except ImportError:
+    pass
+
+from tests.test_kttk_widgets import pyside_only
+
+
+def _workfiles(count):
+    return [
+        {
+            "type": "workfile",
+            "id": str(i),
+            "name": "shot{}_anim_v{}.mb".format(
+                str(i // 100).zfill(4), str(i % 100).zfill(3)
+            ),
+        }
+        for i in range(count)
+    ]
+
+
+@pyside_only
+def test_filter_is_debounced(qtbot):
+    model = EntityListModel()
+    model.set_entities(_workfiles(300))
+    widget = SearchableListWidget(model, filter_delay=50)
+    qtbot.add_widget(widget)
+
+    widget._search_line.setText("shot0001")
+
+    # nothing is filtered right after typing
+    assert widget._proxy_model.rowCount() == 300
+
+    qtbot.wait_until(lambda: widget._proxy_model.rowCount() == 100)
+
+
+@pyside_only
+def test_filter_updates_when_entities_change(qtbot):
+    model = EntityListModel()
+    model.set_entities(_workfiles(10))
+    widget = SearchableListWidget(model)
+    qtbot.add_widget(widget)
+
+    widget._search_line.setText("v011")
+    widget.apply_filter()
+    assert widget._proxy_model.rowCount() == 0
+
+    model.set_entities(_workfiles(20))
+    assert widget._proxy_model.rowCount() == 1
+
+    widget._search_line.setText("")
+    widget.apply_filter()
+    assert widget._proxy_model.rowCount() == 20
+
+
+@pyside_only
+def test_filter_other_models(qtbot):
+    model = QtCore.QStringListModel()
+    model.setStringList(["zaser", "buvz", "azulk", "casdr"])
+    widget = SearchableListWidget(model)
+    qtbot.add_widget(widget)
+
+    widget._search_line.setText("z")
+    widget.apply_filter()
+
+    assert widget._proxy_model.rowCount() == 3
+
+
+@pyside_only
+@pytest.mark.slow
+def test_benchmark_filter_50k_rows(qtbot):
+    keystrokes = ["s", "sh", "sho", "shot", "shot0", "shot01", "shot012", "shot0123"]
+    workfiles = _workfiles(50000)
+
+    def type_search(proxy_model, apply):
+        start = time.time()
+        for text in keystrokes:
+            apply(proxy_model, text)
+        return time.time() - start, proxy_model.rowCount()
+
+    # regex filtering on every keystroke, like it was done before
+    model = EntityListModel()
+    model.set_entities(workfiles)
+    regex_proxy = QtCore.QSortFilterProxyModel()
+    regex_proxy.setSourceModel(model)
+    regex_time, regex_rows = type_search(
+        regex_proxy, lambda proxy, text: proxy.setFilterRegExp(text)
+    )
+
+    # indexed filtering
+    start = time.time()
+    model.search_index
+    index_build_time = time.time() - start
+    widget = SearchableListWidget(model)
+    qtbot.add_widget(widget)
+    index_time, index_rows = type_search(
+        widget._proxy_model, lambda proxy, text: proxy.set_search_text(text)
+    )
+
+    print(
+        "\nfilter 50k rows, {} keystrokes: regex {:.3f}s, index {:.3f}s (+ {:.3f}s building the index)".format(
+            len(keystrokes), regex_time, index_time, index_build_time
+        )
+    )
+    assert regex_rows == index_rows == 100
+
+
+@pyside_only
+def test_empty_filter_does_not_build_search_index(qtbot):
+    model = EntityListModel()
+    model.set_entities(_workfiles(10))
+    widget = SearchableListWidget(model)
+    qtbot.add_widget(widget)
+
+    model.set_entities(_workfiles(20))
+
+    assert widget._proxy_model.rowCount() == 20
+    assert model._search_index is None
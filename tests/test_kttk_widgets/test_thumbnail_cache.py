@@ -0,0 +1,74 @@
+import os
+
+import mock
+
+try:
+    from Qt import QtCore
+    from kttk_widgets.entity_list import EntityListModel
+    from kttk_widgets.thumbnail_cache import ThumbnailCache
+except ImportError:
+    pass
+
+from tests.test_kttk_widgets import pyside_only
+
+THUMBNAIL_IMAGE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "test_kttk",
+    "test_ktrack_api",
+    "maya_thumbnail_test.png",
+)
+
+
+@pyside_only
+def test_pixmap_is_decoded_once(qtbot):
+    cache = ThumbnailCache(size=32)
+
+    pixmap = cache.pixmap(THUMBNAIL_IMAGE)
+
+    assert pixmap.width() == 32
+    assert THUMBNAIL_IMAGE in cache
+    assert cache.pixmap(THUMBNAIL_IMAGE) is pixmap
+
+
+@pyside_only
+def test_pixmap_not_existing(qtbot, tmpdir):
+    cache = ThumbnailCache()
+
+    path = str(tmpdir.join("not_existing.png"))
+
+    assert cache.pixmap(path) is None
+
+    # not decoded again on every repaint
+    with mock.patch.object(cache, "load_image") as mock_load_image:
+        assert cache.pixmap(path) is None
+    assert not mock_load_image.called
+
+
+@pyside_only
+def test_put_image(qtbot):
+    cache = ThumbnailCache(size=16)
+
+    image = cache.load_image(THUMBNAIL_IMAGE)
+    cache.put_image(THUMBNAIL_IMAGE, image)
+
+    assert THUMBNAIL_IMAGE in cache
+    assert cache.pixmap(THUMBNAIL_IMAGE).width() == 16
+
+
+@pyside_only
+def test_entity_list_model_decoration(qtbot):
+    model = EntityListModel(thumbnail_cache=ThumbnailCache(size=16))
+    model.set_entities(
+        [
+            {"type": "shot", "id": "1", "code": "shot010"},
+            {
+                "type": "shot",
+                "id": "2",
+                "code": "shot020",
+                "thumbnail": {"path": THUMBNAIL_IMAGE},
+            },
+        ]
+    )
+
+    assert model.data(model.index(0), QtCore.Qt.DecorationRole) is None
+    assert model.data(model.index(1), QtCore.Qt.DecorationRole).width() == 16